@@ -1,7 +1,13 @@
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
+from psycopg2.extras import execute_values
+
+from configuration.migrations import run_migrations
 from configuration.settings import database_connection, get_cursor
-from utility.security import hash_password
+from utility.security import close_hash_pool, hash_password, verify_and_update_password
 
 REQUIRED_TABLES = {
     "users": """
@@ -142,6 +148,7 @@ REQUIRED_TABLES = {
 }
 
 # Existing local DBs may predate this schema. Recreate when critical columns are missing.
+# Additive changes (new columns, indexes) belong in configuration/migrations.py.
 SCHEMA_REQUIREMENTS = {
     "users": {"email", "password", "role", "verified", "phone"},
     "bookings": {"booking_id", "user_email", "room_type", "in_date", "out_date", "status"},
@@ -151,16 +158,38 @@ SCHEMA_REQUIREMENTS = {
 }
 
 
-def _table_columns(cursor, table_name: str) -> set[str]:
+PHASE_TIMINGS = {}
+
+
+@contextmanager
+def _phase(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        PHASE_TIMINGS[name] = round((time.perf_counter() - started) * 1000, 1)
+
+
+# Every required table that exists, with its columns, in one catalog query.
+# pg_catalog rather than information_schema, whose views check privileges
+# row by row.
+def _existing_columns(cursor) -> dict[str, set[str]]:
     cursor.execute(
         """
-        SELECT column_name
-        FROM information_schema.columns
-        WHERE table_schema = 'public' AND table_name = %s
+        SELECT c.relname AS table_name, a.attname AS column_name
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        LEFT JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+        WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p') AND c.relname = ANY(%s)
         """,
-        (table_name,),
+        (list(REQUIRED_TABLES),),
     )
-    return {row["column_name"] for row in cursor.fetchall()}
+    columns = {}
+    for row in cursor.fetchall():
+        table = columns.setdefault(row["table_name"], set())
+        if row["column_name"] is not None:
+            table.add(row["column_name"])
+    return columns
 
 
 def _retire_incompatible_table(cursor, table_name: str):
@@ -173,17 +202,13 @@ def ensure_tables():
     db = database_connection()
     cursor = get_cursor(db)
     try:
-        cursor.execute(
-            "SELECT table_name FROM information_schema.tables WHERE table_schema = 'public'"
-        )
-        existing = {row["table_name"] for row in cursor.fetchall()}
+        columns = _existing_columns(cursor)
+        existing = set(columns)
 
         for name, required_cols in SCHEMA_REQUIREMENTS.items():
-            if name in existing:
-                cols = _table_columns(cursor, name)
-                if not required_cols.issubset(cols):
-                    _retire_incompatible_table(cursor, name)
-                    existing.discard(name)
+            if name in existing and not required_cols.issubset(columns[name]):
+                _retire_incompatible_table(cursor, name)
+                existing.discard(name)
 
         for name, ddl in REQUIRED_TABLES.items():
             if name not in existing:
@@ -191,21 +216,6 @@ def ensure_tables():
                 print(f"Created table: {name}")
                 existing.add(name)
 
-        # Soft upgrades for users table created by older compatible schemas.
-        user_cols = _table_columns(cursor, "users")
-        alter_statements = []
-        if "phone" not in user_cols:
-            alter_statements.append("ADD COLUMN phone VARCHAR(50) DEFAULT ''")
-        if "verified" not in user_cols:
-            alter_statements.append("ADD COLUMN verified BOOLEAN DEFAULT FALSE")
-        if "status" not in user_cols:
-            alter_statements.append("ADD COLUMN status VARCHAR(20) DEFAULT 'active'")
-        if "last_login" not in user_cols:
-            alter_statements.append("ADD COLUMN last_login TIMESTAMP")
-        for statement in alter_statements:
-            cursor.execute(f"ALTER TABLE users {statement}")
-            print(f"Altered users: {statement}")
-
         db.commit()
     except Exception as e:
         db.rollback()
@@ -275,79 +285,92 @@ SEED_DATA = {
 }
 
 
+SEED_USER_FIELDS = ("first_name", "last_name", "phone", "role", "verified")
+
+
+# Returns the hash to store for a seed user, or None when the stored one
+# still verifies with current parameters and can stay.
+def _seed_password_hash(password: str, stored: str | None) -> str | None:
+    if stored is None:
+        return hash_password(password)
+    valid, new_hash = verify_and_update_password(password, stored)
+    if not valid:
+        return hash_password(password)
+    return new_hash
+
+
+def _seed_users(cursor):
+    emails = [user[2] for user in SEED_DATA["users"]]
+    cursor.execute(
+        "SELECT email, password, first_name, last_name, phone, role, verified, status FROM users WHERE email = ANY(%s)",
+        (emails,),
+    )
+    existing = {row["email"]: row for row in cursor.fetchall()}
+    passwords = [os.getenv(user[3], f"{user[5].title()}Demo123!") for user in SEED_DATA["users"]]
+    stored = [existing[email]["password"] if email in existing else None for email in emails]
+    # Argon2 releases the GIL, so the checks run side by side.
+    with ThreadPoolExecutor(len(emails)) as executor:
+        new_hashes = list(executor.map(_seed_password_hash, passwords, stored))
+
+    rows = []
+    for (first_name, last_name, email, _, phone, role, verified), new_hash in zip(SEED_DATA["users"], new_hashes):
+        current = existing.get(email)
+        if current is not None and new_hash is None and current["status"] == "active" and (
+            tuple(current[field] for field in SEED_USER_FIELDS) == (first_name, last_name, phone, role, verified)
+        ):
+            continue
+        rows.append((first_name, last_name, email, new_hash or current["password"], phone, role, verified))
+
+    if rows:
+        execute_values(
+            cursor,
+            """INSERT INTO users (first_name, last_name, email, password, phone, role, verified)
+               VALUES %s
+               ON CONFLICT (email) DO UPDATE
+               SET first_name = EXCLUDED.first_name, last_name = EXCLUDED.last_name,
+                   password = EXCLUDED.password, phone = EXCLUDED.phone, role = EXCLUDED.role,
+                   verified = EXCLUDED.verified, status = 'active'""",
+            rows,
+        )
+    print(f"Seeded users ({len(rows)} written, {len(emails) - len(rows)} unchanged)")
+
+
+# Tables that are only seeded while empty: (label, table, columns, rows).
+SEED_TABLES = [
+    ("rooms", "rooms",
+     "room_number, name, type, price_base, price_weekend, capacity, size_sqm, bed_type, amenities, floor",
+     SEED_DATA["rooms"]),
+    ("hotels", "hotels",
+     "name, slug, location, address, description, rating, reviews_count, amenities, "
+     "contact_phone, contact_email, contact_website",
+     SEED_DATA["hotels"]),
+    ("staff checklist", "staff_checklist", "staff_email, label",
+     [("staff@luxurygrandhotel.com", label) for label in SEED_DATA["staff_checklist_items"]]),
+    ("staff tasks", "tasks",
+     "title, description, priority, status, assigned_to, room_number, department, due_time",
+     SEED_DATA["staff_tasks"]),
+    ("staff schedule", "staff_schedule", "staff_email, day_of_week, date, shift_start, shift_end, status",
+     SEED_DATA["staff_schedule"]),
+]
+
+
 def seed_data():
     db = database_connection()
     cursor = get_cursor(db)
     try:
-        for first_name, last_name, email, password_env, phone, role, verified in SEED_DATA["users"]:
-            password = os.getenv(password_env, f"{role.title()}Demo123!")
-            cursor.execute("SELECT id FROM users WHERE email = %s", (email,))
-            existing = cursor.fetchone()
-            if existing:
-                cursor.execute(
-                    """UPDATE users
-                       SET first_name=%s, last_name=%s, password=%s, phone=%s, role=%s, verified=%s, status='active'
-                       WHERE email=%s""",
-                    (first_name, last_name, hash_password(password), phone, role, verified, email),
-                )
-            else:
-                cursor.execute(
-                    """INSERT INTO users (first_name, last_name, email, password, phone, role, verified)
-                       VALUES (%s, %s, %s, %s, %s, %s, %s)""",
-                    (first_name, last_name, email, hash_password(password), phone, role, verified),
-                )
-        print("Seeded users")
-
-        cursor.execute("SELECT COUNT(*) AS cnt FROM rooms")
-        if cursor.fetchone()["cnt"] == 0:
-            for r in SEED_DATA["rooms"]:
-                cursor.execute(
-                    """INSERT INTO rooms (room_number, name, type, price_base, price_weekend,
-                       capacity, size_sqm, bed_type, amenities, floor)
-                       VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
-                    r,
-                )
-            print("Seeded rooms")
-
-        cursor.execute("SELECT COUNT(*) AS cnt FROM hotels")
-        if cursor.fetchone()["cnt"] == 0:
-            for h in SEED_DATA["hotels"]:
-                cursor.execute(
-                    """INSERT INTO hotels (name, slug, location, address, description,
-                       rating, reviews_count, amenities, contact_phone, contact_email, contact_website)
-                       VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
-                    h,
-                )
-            print("Seeded hotels")
-
-        cursor.execute("SELECT COUNT(*) AS cnt FROM staff_checklist")
-        if cursor.fetchone()["cnt"] == 0:
-            for label in SEED_DATA["staff_checklist_items"]:
-                cursor.execute(
-                    "INSERT INTO staff_checklist (staff_email, label) VALUES (%s, %s)",
-                    ("staff@luxurygrandhotel.com", label),
-                )
-            print("Seeded staff checklist")
-
-        cursor.execute("SELECT COUNT(*) AS cnt FROM tasks")
-        if cursor.fetchone()["cnt"] == 0:
-            for task in SEED_DATA["staff_tasks"]:
-                cursor.execute(
-                    """INSERT INTO tasks (title, description, priority, status, assigned_to, room_number, department, due_time)
-                       VALUES (%s, %s, %s, %s, %s, %s, %s, %s)""",
-                    task,
-                )
-            print("Seeded staff tasks")
-
-        cursor.execute("SELECT COUNT(*) AS cnt FROM staff_schedule")
-        if cursor.fetchone()["cnt"] == 0:
-            for schedule in SEED_DATA["staff_schedule"]:
-                cursor.execute(
-                    """INSERT INTO staff_schedule (staff_email, day_of_week, date, shift_start, shift_end, status)
-                       VALUES (%s, %s, %s, %s, %s, %s)""",
-                    schedule,
-                )
-            print("Seeded staff schedule")
+        with _phase("seed users"):
+            _seed_users(cursor)
+
+        with _phase("seed tables"):
+            cursor.execute(
+                "SELECT "
+                + ", ".join(f"EXISTS (SELECT 1 FROM {table}) AS {table}" for _, table, _, _ in SEED_TABLES)
+            )
+            populated = cursor.fetchone()
+            for label, table, columns, rows in SEED_TABLES:
+                if not populated[table]:
+                    execute_values(cursor, f"INSERT INTO {table} ({columns}) VALUES %s", rows)
+                    print(f"Seeded {label}")
         db.commit()
     except Exception as e:
         db.rollback()
@@ -359,6 +382,15 @@ def seed_data():
 
 
 if __name__ == "__main__":
-    ensure_tables()
-    seed_data()
-    print("Database setup complete")
+    started = time.perf_counter()
+    try:
+        with _phase("ensure tables"):
+            ensure_tables()
+        with _phase("migrations"):
+            run_migrations()
+        seed_data()
+    finally:
+        close_hash_pool()
+    for name, elapsed_ms in PHASE_TIMINGS.items():
+        print(f"  {name:<16} {elapsed_ms:8.1f} ms")
+    print(f"Database setup complete in {(time.perf_counter() - started) * 1000:.1f} ms")
@@ -0,0 +1,54 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utility import security
+
+# Login throughput with Argon2 run in the request threads versus in the hash
+# process pool, plus how long a trivial request waits behind the hashing:
+#   python -m configuration.hash_benchmark --logins 64 --threads 16
+PASSWORD = "Benchmark-Password-1"
+
+
+def _probe_latency(stop_at: float) -> float:
+    # Stand-in for a cheap request (a cache hit) served while logins hash.
+    worst = 0.0
+    while time.perf_counter() < stop_at:
+        started = time.perf_counter()
+        sum(range(2000))
+        worst = max(worst, time.perf_counter() - started)
+        time.sleep(0.001)
+    return worst
+
+
+def _run(label: str, verify, hashed: str, logins: int, threads: int):
+    with ThreadPoolExecutor(1) as prober, ThreadPoolExecutor(threads) as executor:
+        started = time.perf_counter()
+        results = [executor.submit(verify, PASSWORD, hashed) for _ in range(logins)]
+        probe = prober.submit(_probe_latency, started + 0.5)
+        if not all(future.result() for future in results):
+            raise SystemExit(f"{label}: verification failed")
+        elapsed = time.perf_counter() - started
+        worst = probe.result()
+    print(f"{label:<24} {logins / elapsed:8.1f} logins/s  {elapsed / logins * 1000:7.1f} ms/login  "
+          f"probe worst {worst * 1000:6.2f} ms")
+
+
+def run_benchmark(logins: int, threads: int):
+    hashed = security._hash(PASSWORD)
+    print(f"argon2 t={security.ARGON2_TIME_COST} m={security.ARGON2_MEMORY_COST} "
+          f"p={security.ARGON2_PARALLELISM}, {security.HASH_WORKERS} hash workers, {threads} request threads")
+    _run("in request threads", lambda p, h: security._verify(p, h, "password"), hashed, logins, threads)
+    security.start_hash_pool()
+    try:
+        _run("hash process pool", security.verify_password, hashed, logins, threads)
+    finally:
+        security.close_hash_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark password verification throughput")
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+    run_benchmark(args.logins, args.threads)
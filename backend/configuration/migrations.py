@@ -0,0 +1,824 @@
+import argparse
+import hashlib
+
+from configuration.settings import database_connection, get_cursor
+
+
+def _transition_triggers(table: str, function: str) -> list[str]:
+    # Statement-level triggers with transition tables, so a bulk write updates
+    # a counter row once instead of once per row. Postgres only allows
+    # transition tables on single-event triggers, hence three per table.
+    events = {
+        "ins": ("INSERT", "NEW TABLE AS new_rows"),
+        "upd": ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+        "del": ("DELETE", "OLD TABLE AS old_rows"),
+    }
+    statements = []
+    for suffix, (event, referencing) in events.items():
+        name = f"{function}_{suffix}"
+        statements.append(f"DROP TRIGGER IF EXISTS {name} ON {table}")
+        statements.append(
+            f"CREATE TRIGGER {name} AFTER {event} ON {table} REFERENCING {referencing} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION {function}()"
+        )
+    return statements
+
+
+# Forward-only: never edit or reorder an entry once it has shipped, add a new
+# version instead. Applied migrations are checksummed and a mismatch aborts the
+# run. "concurrent" migrations run outside a transaction (CREATE INDEX
+# CONCURRENTLY does not lock writes), one statement at a time; any index they
+# list under "indexes" that a previous failed run left INVALID is dropped first.
+MIGRATIONS = [
+    {
+        "version": 1,
+        "name": "users_soft_upgrades",
+        "statements": [
+            "ALTER TABLE users ADD COLUMN IF NOT EXISTS phone VARCHAR(50) DEFAULT ''",
+            "ALTER TABLE users ADD COLUMN IF NOT EXISTS verified BOOLEAN DEFAULT FALSE",
+            "ALTER TABLE users ADD COLUMN IF NOT EXISTS status VARCHAR(20) DEFAULT 'active'",
+            "ALTER TABLE users ADD COLUMN IF NOT EXISTS last_login TIMESTAMP",
+        ],
+    },
+    {
+        "version": 2,
+        "name": "bookings_user_email_created_at_idx",
+        "concurrent": True,
+        "indexes": ["idx_bookings_user_email_created_at"],
+        "statements": [
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_bookings_user_email_created_at "
+            "ON bookings (user_email, created_at DESC)",
+        ],
+    },
+    {
+        "version": 3,
+        "name": "bookings_created_at_idx",
+        "concurrent": True,
+        "indexes": ["idx_bookings_created_at"],
+        "statements": [
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_bookings_created_at ON bookings (created_at DESC)",
+        ],
+    },
+    {
+        "version": 4,
+        "name": "email_otps_email_created_at_idx",
+        "concurrent": True,
+        "indexes": ["idx_email_otps_email_created_at"],
+        "statements": [
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_email_otps_email_created_at "
+            "ON email_otps (email, created_at DESC)",
+        ],
+    },
+    {
+        "version": 5,
+        "name": "tasks_assigned_to_created_at_idx",
+        "concurrent": True,
+        "indexes": ["idx_tasks_assigned_to_created_at", "idx_tasks_created_at"],
+        "statements": [
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_assigned_to_created_at "
+            "ON tasks (assigned_to, created_at DESC)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_created_at ON tasks (created_at DESC)",
+        ],
+    },
+    {
+        "version": 6,
+        "name": "staff_lookup_idx",
+        "concurrent": True,
+        "indexes": [
+            "idx_staff_attendance_email_date_created_at",
+            "idx_staff_checklist_email",
+            "idx_staff_schedule_email_date",
+        ],
+        "statements": [
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_staff_attendance_email_date_created_at "
+            "ON staff_attendance (staff_email, date, created_at DESC)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_staff_checklist_email "
+            "ON staff_checklist (staff_email, id)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_staff_schedule_email_date "
+            "ON staff_schedule (staff_email, date, shift_start)",
+        ],
+    },
+    {
+        "version": 7,
+        "name": "payments_booking_id_integer",
+        "statements": [
+            """
+            DO $$
+            BEGIN
+                IF EXISTS (
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_schema = 'public' AND table_name = 'payments'
+                      AND column_name = 'booking_id' AND data_type <> 'integer'
+                ) THEN
+                    ALTER TABLE payments ALTER COLUMN booking_id TYPE INT USING NULLIF(booking_id::text, '')::int;
+                END IF;
+            END
+            $$
+            """,
+        ],
+    },
+    {
+        "version": 8,
+        "name": "payments_booking_id_idx",
+        "concurrent": True,
+        "indexes": ["idx_payments_booking_id"],
+        "statements": [
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_payments_booking_id ON payments (booking_id)",
+        ],
+    },
+    {
+        "version": 9,
+        "name": "bookings_active_room_type_dates_idx",
+        "concurrent": True,
+        "indexes": ["idx_bookings_active_room_type_dates", "idx_rooms_type"],
+        "statements": [
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_bookings_active_room_type_dates "
+            "ON bookings (room_type, in_date, out_date) WHERE status IN ('pending', 'confirmed')",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_rooms_type ON rooms (type)",
+        ],
+    },
+    {
+        "version": 10,
+        "name": "catalog_versions",
+        "statements": [
+            """
+            CREATE TABLE IF NOT EXISTS catalog_versions (
+                name VARCHAR(50) PRIMARY KEY,
+                version BIGINT NOT NULL DEFAULT 1,
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+            """,
+            "INSERT INTO catalog_versions (name) VALUES ('rooms'), ('hotels') ON CONFLICT (name) DO NOTHING",
+            """
+            CREATE OR REPLACE FUNCTION bump_catalog_version() RETURNS trigger AS $$
+            BEGIN
+                UPDATE catalog_versions SET version = version + 1, updated_at = NOW() WHERE name = TG_ARGV[0];
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+            "DROP TRIGGER IF EXISTS rooms_catalog_version ON rooms",
+            "CREATE TRIGGER rooms_catalog_version AFTER INSERT OR UPDATE OR DELETE ON rooms "
+            "FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version('rooms')",
+            "DROP TRIGGER IF EXISTS hotels_catalog_version ON hotels",
+            "CREATE TRIGGER hotels_catalog_version AFTER INSERT OR UPDATE OR DELETE ON hotels "
+            "FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version('hotels')",
+        ],
+    },
+    {
+        "version": 11,
+        "name": "dashboard_counters",
+        "statements": [
+            """
+            CREATE TABLE IF NOT EXISTS dashboard_counters (
+                id SMALLINT PRIMARY KEY CHECK (id = 1),
+                bookings_total BIGINT NOT NULL DEFAULT 0,
+                bookings_confirmed BIGINT NOT NULL DEFAULT 0,
+                bookings_pending BIGINT NOT NULL DEFAULT 0,
+                bookings_cancelled BIGINT NOT NULL DEFAULT 0,
+                revenue_total NUMERIC(14,2) NOT NULL DEFAULT 0,
+                rooms_total BIGINT NOT NULL DEFAULT 0,
+                rooms_available BIGINT NOT NULL DEFAULT 0,
+                rooms_occupied BIGINT NOT NULL DEFAULT 0,
+                rooms_maintenance BIGINT NOT NULL DEFAULT 0,
+                room_price_sum NUMERIC(14,2) NOT NULL DEFAULT 0,
+                admins_total BIGINT NOT NULL DEFAULT 0,
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                reconciled_at TIMESTAMPTZ
+            )
+            """,
+            """
+            CREATE OR REPLACE FUNCTION dashboard_counters_bookings() RETURNS trigger AS $$
+            DECLARE
+                d_total BIGINT := 0;
+                d_confirmed BIGINT := 0;
+                d_pending BIGINT := 0;
+                d_cancelled BIGINT := 0;
+            BEGIN
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    SELECT d_total + COUNT(*),
+                           d_confirmed + COUNT(*) FILTER (WHERE status = 'confirmed'),
+                           d_pending + COUNT(*) FILTER (WHERE status = 'pending'),
+                           d_cancelled + COUNT(*) FILTER (WHERE status = 'cancelled')
+                    INTO d_total, d_confirmed, d_pending, d_cancelled
+                    FROM new_rows;
+                END IF;
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    SELECT d_total - COUNT(*),
+                           d_confirmed - COUNT(*) FILTER (WHERE status = 'confirmed'),
+                           d_pending - COUNT(*) FILTER (WHERE status = 'pending'),
+                           d_cancelled - COUNT(*) FILTER (WHERE status = 'cancelled')
+                    INTO d_total, d_confirmed, d_pending, d_cancelled
+                    FROM old_rows;
+                END IF;
+                IF d_total <> 0 OR d_confirmed <> 0 OR d_pending <> 0 OR d_cancelled <> 0 THEN
+                    UPDATE dashboard_counters
+                    SET bookings_total = bookings_total + d_total,
+                        bookings_confirmed = bookings_confirmed + d_confirmed,
+                        bookings_pending = bookings_pending + d_pending,
+                        bookings_cancelled = bookings_cancelled + d_cancelled,
+                        updated_at = NOW()
+                    WHERE id = 1;
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+            """
+            CREATE OR REPLACE FUNCTION dashboard_counters_payments() RETURNS trigger AS $$
+            DECLARE
+                d_revenue NUMERIC := 0;
+            BEGIN
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    SELECT d_revenue + COALESCE(SUM(amount) FILTER (WHERE booking_id IS NOT NULL), 0)
+                    INTO d_revenue FROM new_rows;
+                END IF;
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    SELECT d_revenue - COALESCE(SUM(amount) FILTER (WHERE booking_id IS NOT NULL), 0)
+                    INTO d_revenue FROM old_rows;
+                END IF;
+                IF d_revenue <> 0 THEN
+                    UPDATE dashboard_counters
+                    SET revenue_total = revenue_total + d_revenue, updated_at = NOW()
+                    WHERE id = 1;
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+            """
+            CREATE OR REPLACE FUNCTION dashboard_counters_rooms() RETURNS trigger AS $$
+            DECLARE
+                d_total BIGINT := 0;
+                d_available BIGINT := 0;
+                d_occupied BIGINT := 0;
+                d_maintenance BIGINT := 0;
+                d_price NUMERIC := 0;
+            BEGIN
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    SELECT d_total + COUNT(*),
+                           d_available + COUNT(*) FILTER (WHERE status = 'available'),
+                           d_occupied + COUNT(*) FILTER (WHERE status = 'occupied'),
+                           d_maintenance + COUNT(*) FILTER (WHERE status = 'maintenance'),
+                           d_price + COALESCE(SUM(price_base), 0)
+                    INTO d_total, d_available, d_occupied, d_maintenance, d_price
+                    FROM new_rows;
+                END IF;
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    SELECT d_total - COUNT(*),
+                           d_available - COUNT(*) FILTER (WHERE status = 'available'),
+                           d_occupied - COUNT(*) FILTER (WHERE status = 'occupied'),
+                           d_maintenance - COUNT(*) FILTER (WHERE status = 'maintenance'),
+                           d_price - COALESCE(SUM(price_base), 0)
+                    INTO d_total, d_available, d_occupied, d_maintenance, d_price
+                    FROM old_rows;
+                END IF;
+                IF d_total <> 0 OR d_available <> 0 OR d_occupied <> 0 OR d_maintenance <> 0 OR d_price <> 0 THEN
+                    UPDATE dashboard_counters
+                    SET rooms_total = rooms_total + d_total,
+                        rooms_available = rooms_available + d_available,
+                        rooms_occupied = rooms_occupied + d_occupied,
+                        rooms_maintenance = rooms_maintenance + d_maintenance,
+                        room_price_sum = room_price_sum + d_price,
+                        updated_at = NOW()
+                    WHERE id = 1;
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+            """
+            CREATE OR REPLACE FUNCTION dashboard_counters_users() RETURNS trigger AS $$
+            DECLARE
+                d_admins BIGINT := 0;
+            BEGIN
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    SELECT d_admins + COUNT(*) FILTER (WHERE role = 'admin') INTO d_admins FROM new_rows;
+                END IF;
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    SELECT d_admins - COUNT(*) FILTER (WHERE role = 'admin') INTO d_admins FROM old_rows;
+                END IF;
+                IF d_admins <> 0 THEN
+                    UPDATE dashboard_counters
+                    SET admins_total = admins_total + d_admins, updated_at = NOW()
+                    WHERE id = 1;
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+            *_transition_triggers("bookings", "dashboard_counters_bookings"),
+            *_transition_triggers("payments", "dashboard_counters_payments"),
+            *_transition_triggers("rooms", "dashboard_counters_rooms"),
+            *_transition_triggers("users", "dashboard_counters_users"),
+            """
+            INSERT INTO dashboard_counters (
+                id, bookings_total, bookings_confirmed, bookings_pending, bookings_cancelled,
+                revenue_total, rooms_total, rooms_available, rooms_occupied, rooms_maintenance,
+                room_price_sum, admins_total, reconciled_at
+            )
+            SELECT 1, b.total, b.confirmed, b.pending, b.cancelled,
+                   p.revenue, r.total, r.available, r.occupied, r.maintenance,
+                   r.price_sum, u.admins, NOW()
+            FROM (
+                SELECT COUNT(*) AS total,
+                       COUNT(*) FILTER (WHERE status = 'confirmed') AS confirmed,
+                       COUNT(*) FILTER (WHERE status = 'pending') AS pending,
+                       COUNT(*) FILTER (WHERE status = 'cancelled') AS cancelled
+                FROM bookings
+            ) b,
+            (SELECT COALESCE(SUM(amount), 0) AS revenue FROM payments WHERE booking_id IS NOT NULL) p,
+            (
+                SELECT COUNT(*) AS total,
+                       COUNT(*) FILTER (WHERE status = 'available') AS available,
+                       COUNT(*) FILTER (WHERE status = 'occupied') AS occupied,
+                       COUNT(*) FILTER (WHERE status = 'maintenance') AS maintenance,
+                       COALESCE(SUM(price_base), 0) AS price_sum
+                FROM rooms
+            ) r,
+            (SELECT COUNT(*) AS admins FROM users WHERE role = 'admin') u
+            ON CONFLICT (id) DO NOTHING
+            """,
+        ],
+    },
+    {
+        "version": 12,
+        "name": "daily_room_type_rollups",
+        "statements": [
+            """
+            CREATE TABLE IF NOT EXISTS daily_room_type_stats (
+                day DATE NOT NULL,
+                room_type VARCHAR(100) NOT NULL,
+                nights_sold INT NOT NULL DEFAULT 0,
+                room_revenue NUMERIC(14,2) NOT NULL DEFAULT 0,
+                rooms_available INT NOT NULL DEFAULT 0,
+                bookings_created INT NOT NULL DEFAULT 0,
+                cancellations INT NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, room_type)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS rollup_dirty_days (
+                day DATE PRIMARY KEY,
+                queued_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+            """,
+            """
+            CREATE OR REPLACE FUNCTION rollup_dirty_bookings() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    INSERT INTO rollup_dirty_days (day)
+                    SELECT night::date FROM new_rows,
+                        generate_series(in_date, GREATEST(out_date - 1, in_date), INTERVAL '1 day') AS night
+                    UNION
+                    SELECT created_at::date FROM new_rows WHERE created_at IS NOT NULL
+                    ON CONFLICT (day) DO NOTHING;
+                END IF;
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    INSERT INTO rollup_dirty_days (day)
+                    SELECT night::date FROM old_rows,
+                        generate_series(in_date, GREATEST(out_date - 1, in_date), INTERVAL '1 day') AS night
+                    UNION
+                    SELECT created_at::date FROM old_rows WHERE created_at IS NOT NULL
+                    ON CONFLICT (day) DO NOTHING;
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+            """
+            CREATE OR REPLACE FUNCTION rollup_dirty_payments() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    INSERT INTO rollup_dirty_days (day)
+                    SELECT DISTINCT night::date
+                    FROM new_rows n
+                    JOIN bookings b ON b.booking_id = n.booking_id,
+                        generate_series(b.in_date, GREATEST(b.out_date - 1, b.in_date), INTERVAL '1 day') AS night
+                    ON CONFLICT (day) DO NOTHING;
+                END IF;
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    INSERT INTO rollup_dirty_days (day)
+                    SELECT DISTINCT night::date
+                    FROM old_rows o
+                    JOIN bookings b ON b.booking_id = o.booking_id,
+                        generate_series(b.in_date, GREATEST(b.out_date - 1, b.in_date), INTERVAL '1 day') AS night
+                    ON CONFLICT (day) DO NOTHING;
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+            *_transition_triggers("bookings", "rollup_dirty_bookings"),
+            *_transition_triggers("payments", "rollup_dirty_payments"),
+            """
+            INSERT INTO rollup_dirty_days (day)
+            SELECT generate_series(
+                MIN(LEAST(in_date, created_at::date)),
+                MAX(GREATEST(out_date, created_at::date)),
+                INTERVAL '1 day'
+            )::date
+            FROM bookings
+            ON CONFLICT (day) DO NOTHING
+            """,
+        ],
+    },
+    {
+        "version": 13,
+        "name": "background_jobs",
+        "statements": [
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id BIGSERIAL PRIMARY KEY,
+                kind VARCHAR(100) NOT NULL,
+                payload JSONB NOT NULL DEFAULT '{}',
+                unique_key VARCHAR(255),
+                run_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                attempts INT NOT NULL DEFAULT 0,
+                max_attempts INT NOT NULL DEFAULT 5,
+                last_error TEXT,
+                locked_by VARCHAR(255),
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_jobs_run_at ON jobs (run_at)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_unique_key ON jobs (unique_key) WHERE unique_key IS NOT NULL",
+            """
+            CREATE TABLE IF NOT EXISTS dead_jobs (
+                id BIGINT PRIMARY KEY,
+                kind VARCHAR(100) NOT NULL,
+                payload JSONB NOT NULL,
+                attempts INT NOT NULL,
+                last_error TEXT,
+                created_at TIMESTAMPTZ NOT NULL,
+                failed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+            """,
+        ],
+    },
+    {
+        "version": 14,
+        "name": "otp_codes",
+        "statements": [
+            """
+            CREATE TABLE IF NOT EXISTS otp_codes (
+                email VARCHAR(200) PRIMARY KEY,
+                code_mac CHAR(64) NOT NULL,
+                expires_at TIMESTAMPTZ NOT NULL,
+                attempts INT NOT NULL DEFAULT 0,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_otp_codes_expires_at ON otp_codes (expires_at)",
+        ],
+    },
+    {
+        "version": 15,
+        "name": "user_profile_notifications",
+        "statements": [
+            # Every API worker LISTENs on this channel to drop cached profiles.
+            # Notifications are sent at commit and not at all on rollback.
+            # Updates that leave the cached columns alone (last_login,
+            # password) stay silent.
+            """
+            CREATE OR REPLACE FUNCTION notify_user_profile_changed() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'UPDATE' THEN
+                    PERFORM pg_notify('user_profile_changed', changed.email)
+                    FROM (
+                        SELECT o.email FROM old_rows o JOIN new_rows n ON n.id = o.id
+                        WHERE (o.first_name, o.last_name, o.email, o.role, o.phone, o.verified)
+                              IS DISTINCT FROM (n.first_name, n.last_name, n.email, n.role, n.phone, n.verified)
+                        UNION
+                        SELECT n.email FROM old_rows o JOIN new_rows n ON n.id = o.id
+                        WHERE o.email IS DISTINCT FROM n.email
+                    ) changed;
+                ELSIF TG_OP = 'DELETE' THEN
+                    PERFORM pg_notify('user_profile_changed', email) FROM (SELECT DISTINCT email FROM old_rows) o;
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+            *_transition_triggers("users", "notify_user_profile_changed"),
+        ],
+    },
+    {
+        "version": 16,
+        "name": "rate_limits",
+        "statements": [
+            # Shared limiter counters for every API worker. UNLOGGED: they are
+            # cheap to lose in a crash and not worth WAL on every request.
+            """
+            CREATE UNLOGGED TABLE IF NOT EXISTS rate_limits (
+                key TEXT PRIMARY KEY,
+                hits INT NOT NULL DEFAULT 0,
+                expires_at TIMESTAMPTZ NOT NULL
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_rate_limits_expires_at ON rate_limits (expires_at)",
+            # Sliding-window check and hit in one round trip. The upsert takes
+            # the row lock on the current window, so concurrent hits from any
+            # worker are counted one after the other and none slips past the
+            # limit. An expired row is reused as a fresh window.
+            """
+            CREATE OR REPLACE FUNCTION rate_limit_acquire(
+                current_key TEXT, previous_key TEXT, previous_weight DOUBLE PRECISION,
+                amount INT, max_hits INT, ttl_seconds DOUBLE PRECISION
+            ) RETURNS BOOLEAN AS $$
+            DECLARE
+                previous_count INT;
+                current_count INT;
+            BEGIN
+                SELECT hits INTO previous_count FROM rate_limits
+                WHERE key = previous_key AND expires_at > NOW();
+
+                INSERT INTO rate_limits AS r (key, hits, expires_at)
+                VALUES (current_key, 0, NOW() + make_interval(secs => ttl_seconds))
+                ON CONFLICT (key) DO UPDATE
+                SET hits = CASE WHEN r.expires_at <= NOW() THEN 0 ELSE r.hits END,
+                    expires_at = CASE WHEN r.expires_at <= NOW() THEN EXCLUDED.expires_at ELSE r.expires_at END
+                RETURNING hits INTO current_count;
+
+                IF floor(COALESCE(previous_count, 0) * previous_weight + current_count) + amount > max_hits THEN
+                    RETURN FALSE;
+                END IF;
+                UPDATE rate_limits SET hits = hits + amount WHERE key = current_key;
+                RETURN TRUE;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+        ],
+    },
+    {
+        "version": 17,
+        "name": "booking_room_count",
+        "statements": [
+            # A booking can hold several rooms of its type; inventory checks
+            # and occupancy sum this instead of counting bookings.
+            "ALTER TABLE bookings ADD COLUMN IF NOT EXISTS rooms INT NOT NULL DEFAULT 1 CHECK (rooms >= 1)",
+        ],
+    },
+    {
+        "version": 18,
+        "name": "dashboard_counter_deltas",
+        "statements": [
+            # The migration-11 triggers append their deltas here instead of
+            # updating the single dashboard_counters row, so concurrent
+            # booking, payment, room and user writes no longer queue on that
+            # row's lock. Reads add the pending deltas to the row and the
+            # fold_dashboard_counters job moves them into it.
+            """
+            CREATE TABLE IF NOT EXISTS dashboard_counter_deltas (
+                id BIGSERIAL PRIMARY KEY,
+                bookings_total BIGINT NOT NULL DEFAULT 0,
+                bookings_confirmed BIGINT NOT NULL DEFAULT 0,
+                bookings_pending BIGINT NOT NULL DEFAULT 0,
+                bookings_cancelled BIGINT NOT NULL DEFAULT 0,
+                revenue_total NUMERIC(14,2) NOT NULL DEFAULT 0,
+                rooms_total BIGINT NOT NULL DEFAULT 0,
+                rooms_available BIGINT NOT NULL DEFAULT 0,
+                rooms_occupied BIGINT NOT NULL DEFAULT 0,
+                rooms_maintenance BIGINT NOT NULL DEFAULT 0,
+                room_price_sum NUMERIC(14,2) NOT NULL DEFAULT 0,
+                admins_total BIGINT NOT NULL DEFAULT 0,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+            """,
+            """
+            CREATE OR REPLACE FUNCTION dashboard_counters_bookings() RETURNS trigger AS $$
+            DECLARE
+                d_total BIGINT := 0;
+                d_confirmed BIGINT := 0;
+                d_pending BIGINT := 0;
+                d_cancelled BIGINT := 0;
+            BEGIN
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    SELECT d_total + COUNT(*),
+                           d_confirmed + COUNT(*) FILTER (WHERE status = 'confirmed'),
+                           d_pending + COUNT(*) FILTER (WHERE status = 'pending'),
+                           d_cancelled + COUNT(*) FILTER (WHERE status = 'cancelled')
+                    INTO d_total, d_confirmed, d_pending, d_cancelled
+                    FROM new_rows;
+                END IF;
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    SELECT d_total - COUNT(*),
+                           d_confirmed - COUNT(*) FILTER (WHERE status = 'confirmed'),
+                           d_pending - COUNT(*) FILTER (WHERE status = 'pending'),
+                           d_cancelled - COUNT(*) FILTER (WHERE status = 'cancelled')
+                    INTO d_total, d_confirmed, d_pending, d_cancelled
+                    FROM old_rows;
+                END IF;
+                IF d_total <> 0 OR d_confirmed <> 0 OR d_pending <> 0 OR d_cancelled <> 0 THEN
+                    INSERT INTO dashboard_counter_deltas
+                        (bookings_total, bookings_confirmed, bookings_pending, bookings_cancelled)
+                    VALUES (d_total, d_confirmed, d_pending, d_cancelled);
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+            """
+            CREATE OR REPLACE FUNCTION dashboard_counters_payments() RETURNS trigger AS $$
+            DECLARE
+                d_revenue NUMERIC := 0;
+            BEGIN
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    SELECT d_revenue + COALESCE(SUM(amount) FILTER (WHERE booking_id IS NOT NULL), 0)
+                    INTO d_revenue FROM new_rows;
+                END IF;
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    SELECT d_revenue - COALESCE(SUM(amount) FILTER (WHERE booking_id IS NOT NULL), 0)
+                    INTO d_revenue FROM old_rows;
+                END IF;
+                IF d_revenue <> 0 THEN
+                    INSERT INTO dashboard_counter_deltas (revenue_total) VALUES (d_revenue);
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+            """
+            CREATE OR REPLACE FUNCTION dashboard_counters_rooms() RETURNS trigger AS $$
+            DECLARE
+                d_total BIGINT := 0;
+                d_available BIGINT := 0;
+                d_occupied BIGINT := 0;
+                d_maintenance BIGINT := 0;
+                d_price NUMERIC := 0;
+            BEGIN
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    SELECT d_total + COUNT(*),
+                           d_available + COUNT(*) FILTER (WHERE status = 'available'),
+                           d_occupied + COUNT(*) FILTER (WHERE status = 'occupied'),
+                           d_maintenance + COUNT(*) FILTER (WHERE status = 'maintenance'),
+                           d_price + COALESCE(SUM(price_base), 0)
+                    INTO d_total, d_available, d_occupied, d_maintenance, d_price
+                    FROM new_rows;
+                END IF;
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    SELECT d_total - COUNT(*),
+                           d_available - COUNT(*) FILTER (WHERE status = 'available'),
+                           d_occupied - COUNT(*) FILTER (WHERE status = 'occupied'),
+                           d_maintenance - COUNT(*) FILTER (WHERE status = 'maintenance'),
+                           d_price - COALESCE(SUM(price_base), 0)
+                    INTO d_total, d_available, d_occupied, d_maintenance, d_price
+                    FROM old_rows;
+                END IF;
+                IF d_total <> 0 OR d_available <> 0 OR d_occupied <> 0 OR d_maintenance <> 0 OR d_price <> 0 THEN
+                    INSERT INTO dashboard_counter_deltas
+                        (rooms_total, rooms_available, rooms_occupied, rooms_maintenance, room_price_sum)
+                    VALUES (d_total, d_available, d_occupied, d_maintenance, d_price);
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+            """
+            CREATE OR REPLACE FUNCTION dashboard_counters_users() RETURNS trigger AS $$
+            DECLARE
+                d_admins BIGINT := 0;
+            BEGIN
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    SELECT d_admins + COUNT(*) FILTER (WHERE role = 'admin') INTO d_admins FROM new_rows;
+                END IF;
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    SELECT d_admins - COUNT(*) FILTER (WHERE role = 'admin') INTO d_admins FROM old_rows;
+                END IF;
+                IF d_admins <> 0 THEN
+                    INSERT INTO dashboard_counter_deltas (admins_total) VALUES (d_admins);
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+        ],
+    },
+]
+
+# Arbitrary constant shared by every process that runs migrations, so two
+# workers starting at once apply them one after the other.
+MIGRATION_LOCK_ID = 7_314_002
+
+MIGRATIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT PRIMARY KEY,
+        name VARCHAR(200) NOT NULL,
+        checksum CHAR(64) NOT NULL,
+        applied_at TIMESTAMP DEFAULT NOW()
+    )
+"""
+
+
+def migration_checksum(migration: dict) -> str:
+    body = "\n".join(statement.strip() for statement in migration["statements"])
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+def _applied_migrations(cursor) -> dict[int, str]:
+    cursor.execute("SELECT version, checksum FROM schema_migrations")
+    return {row["version"]: row["checksum"] for row in cursor.fetchall()}
+
+
+def _verify_checksums(applied: dict[int, str]):
+    known = {m["version"]: m for m in MIGRATIONS}
+    for version, checksum in sorted(applied.items()):
+        migration = known.get(version)
+        if migration is None:
+            print(f"Warning: database has migration {version} that this code does not know about")
+            continue
+        if migration_checksum(migration) != checksum:
+            raise RuntimeError(
+                f"Migration {version} ({migration['name']}) was edited after it was applied"
+            )
+
+
+def _drop_invalid_indexes(cursor, names: list[str]):
+    cursor.execute(
+        """
+        SELECT c.relname
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = 'public' AND c.relname = ANY(%s) AND NOT i.indisvalid
+        """,
+        (names,),
+    )
+    for row in cursor.fetchall():
+        cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{row["relname"]}"')
+        print(f"Dropped invalid index left by an interrupted migration: {row['relname']}")
+
+
+def _record(cursor, migration: dict):
+    cursor.execute(
+        "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+        (migration["version"], migration["name"], migration_checksum(migration)),
+    )
+
+
+def _apply(db, cursor, migration: dict):
+    if migration.get("concurrent"):
+        db.autocommit = True
+        try:
+            _drop_invalid_indexes(cursor, migration.get("indexes", []))
+            for statement in migration["statements"]:
+                cursor.execute(statement)
+            _record(cursor, migration)
+        finally:
+            db.autocommit = False
+        return
+
+    try:
+        for statement in migration["statements"]:
+            cursor.execute(statement)
+        _record(cursor, migration)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+def run_migrations(dry_run: bool = False) -> list[int]:
+    db = database_connection()
+    cursor = get_cursor(db)
+    try:
+        db.autocommit = True
+        cursor.execute(MIGRATIONS_TABLE)
+        cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+        db.autocommit = False
+        try:
+            applied = _applied_migrations(cursor)
+            db.rollback()
+            _verify_checksums(applied)
+
+            pending = sorted(
+                (m for m in MIGRATIONS if m["version"] not in applied),
+                key=lambda m: m["version"],
+            )
+            for migration in pending:
+                label = f"{migration['version']:04d}_{migration['name']}"
+                if dry_run:
+                    print(f"Would apply migration {label}:")
+                    for statement in migration["statements"]:
+                        print(f"    {statement};")
+                    continue
+                _apply(db, cursor, migration)
+                print(f"Applied migration {label}")
+
+            if not pending:
+                print("Schema is up to date")
+            return [m["version"] for m in pending]
+        finally:
+            db.rollback()
+            db.autocommit = True
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+    finally:
+        cursor.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations")
+    parser.add_argument("--dry-run", action="store_true", help="print pending migrations without applying them")
+    args = parser.parse_args()
+    run_migrations(dry_run=args.dry_run)
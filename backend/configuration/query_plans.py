@@ -0,0 +1,145 @@
+import argparse
+import json
+import sys
+from contextlib import contextmanager
+
+from configuration.settings import database_connection, get_cursor
+from repository.booking_repository import ALL_BOOKINGS_SQL, USER_BOOKING_HISTORY_SQL
+
+# Plan regression check for the booking list queries. The synthetic data set
+# goes into temporary copies of bookings and payments (same columns and index
+# names, no triggers), which shadow the real tables for this session only, so
+# live writes never wait on the load and ANALYZE leaves the real statistics
+# alone. It runs EXPLAIN on the hot queries and fails when an expected index
+# is not used, a listed table is read with a sequential scan, or a
+# booking/payment join is not on the integer booking_id. tests/test_query_plans.py
+# runs it against the test database.
+PROBE_EMAIL = "plan-probe-42@example.com"
+
+# (label, query, params, indexes the plan must use, tables it must not seq scan).
+# The admin list reads every booking, so only the payments side is pinned: it
+# is pre-grouped off idx_payments_booking_id rather than hash-aggregated.
+PLAN_EXPECTATIONS = [
+    ("user booking history", USER_BOOKING_HISTORY_SQL, (PROBE_EMAIL,),
+     {"idx_bookings_user_email_created_at", "idx_payments_booking_id"}, {"bookings", "payments"}),
+    ("admin booking list", ALL_BOOKINGS_SQL, (),
+     {"idx_payments_booking_id"}, {"payments"}),
+]
+
+SCRATCH_TABLES = ("bookings", "payments")
+
+
+def _create_scratch_tables(cursor):
+    for table in SCRATCH_TABLES:
+        cursor.execute(f"CREATE TEMP TABLE {table} (LIKE public.{table} INCLUDING DEFAULTS) ON COMMIT DROP")
+        cursor.execute(
+            "SELECT pg_get_indexdef(indexrelid) AS definition FROM pg_index WHERE indrelid = %s::regclass",
+            (f"public.{table}",),
+        )
+        for row in cursor.fetchall():
+            cursor.execute(row["definition"].replace(f" ON public.{table} ", f" ON pg_temp.{table} ", 1))
+
+
+def _load_synthetic_data(cursor, bookings: int, users: int):
+    _create_scratch_tables(cursor)
+    cursor.execute(
+        """
+        INSERT INTO pg_temp.bookings
+            (booking_id, user_email, guest_name, room_type, in_date, out_date, status, created_at)
+        SELECT g, 'plan-probe-' || (g %% %s) || '@example.com', 'Plan Probe', 'standard',
+               DATE '2020-01-01' + (g %% 1500), DATE '2020-01-03' + (g %% 1500),
+               'confirmed', TIMESTAMP '2020-01-01' + g * INTERVAL '1 minute'
+        FROM generate_series(1, %s) AS g
+        """,
+        (users, bookings),
+    )
+    cursor.execute(
+        """
+        INSERT INTO pg_temp.payments (payment_id, booking_id, user_email, amount, payment_method, status, created_at)
+        SELECT booking_id, booking_id, user_email, 100, 'Card', 'completed', created_at
+        FROM pg_temp.bookings
+        """
+    )
+    cursor.execute("ANALYZE pg_temp.bookings")
+    cursor.execute("ANALYZE pg_temp.payments")
+
+
+def _index_names(plan: dict) -> set[str]:
+    names = set()
+    if plan.get("Index Name"):
+        names.add(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        names |= _index_names(child)
+    return names
+
+
+def _join_conditions(plan: dict) -> list[str]:
+    conditions = [plan[key] for key in ("Hash Cond", "Merge Cond", "Join Filter", "Index Cond") if plan.get(key)]
+    for child in plan.get("Plans", []):
+        conditions += _join_conditions(child)
+    return conditions
+
+
+def _seq_scans(plan: dict) -> set[str]:
+    tables = set()
+    if plan.get("Node Type") == "Seq Scan":
+        tables.add(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        tables |= _seq_scans(child)
+    return tables
+
+
+def plan_problems(
+    cursor, query: str, params: tuple, expected: set[str], no_seq_scan: set[str]
+) -> tuple[set[str], list[str]]:
+    cursor.execute(f"EXPLAIN (FORMAT JSON) {query}", params)
+    plan = cursor.fetchone()["QUERY PLAN"]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    root = plan[0]["Plan"]
+    used = _index_names(root)
+    problems = []
+    missing = expected - used
+    if missing:
+        problems.append(f"expected {sorted(missing)}, plan used {sorted(used) or 'no indexes'}")
+    scanned = _seq_scans(root) & no_seq_scan
+    if scanned:
+        problems.append(f"sequential scan on {sorted(scanned)}")
+    cast_joins = [c for c in _join_conditions(root) if "booking_id" in c and "::text" in c]
+    if cast_joins:
+        problems.append(f"booking_id joined through a text cast: {cast_joins}")
+    return used, problems
+
+
+@contextmanager
+def synthetic_plan_session(bookings: int, users: int):
+    db = database_connection()
+    cursor = get_cursor(db)
+    try:
+        _load_synthetic_data(cursor, bookings, users)
+        yield cursor
+    finally:
+        db.rollback()
+        cursor.close()
+        db.close()
+
+
+def check_query_plans(bookings: int = 1_000_000, users: int = 50_000) -> bool:
+    ok = True
+    with synthetic_plan_session(bookings, users) as cursor:
+        for label, query, params, expected, no_seq_scan in PLAN_EXPECTATIONS:
+            used, problems = plan_problems(cursor, query, params, expected, no_seq_scan)
+            if problems:
+                ok = False
+                print(f"FAIL {label}: {'; '.join(problems)}")
+            else:
+                print(f"ok   {label}: {sorted(used)}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that hot queries use their indexes")
+    parser.add_argument("--bookings", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=50_000)
+    args = parser.parse_args()
+    sys.exit(0 if check_query_plans(args.bookings, args.users) else 1)
@@ -0,0 +1,203 @@
+import logging
+import os
+import threading
+import time
+
+import psycopg2
+from dotenv import load_dotenv
+from fastapi import HTTPException, Request
+from limits.storage import Storage
+from limits.storage.base import SlidingWindowCounterSupport, TimestampedSlidingWindow
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+
+from dependencies import decode_access_token
+from repository import rate_limit_repository
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# "postgres://" shares counters between every worker and survives restarts;
+# "memory://" keeps them per process, which multiplies each limit by the
+# worker count. Any other limits storage URI (redis://...) works too.
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", "postgres://")
+RATE_LIMIT_STRATEGY = os.getenv("RATE_LIMIT_STRATEGY", "sliding-window-counter")
+RATE_LIMIT_COMPACT_SECONDS = float(os.getenv("RATE_LIMIT_COMPACT_SECONDS", 300))
+RATE_LIMIT_COMPACT_BATCH = int(os.getenv("RATE_LIMIT_COMPACT_BATCH", 5000))
+
+# Routes marked with @cost_limit spend from two budgets besides their own
+# limit: one per client (the signed-in user, else the IP) and a larger one per
+# IP, so a lobby behind one NAT is not throttled as a single client while one
+# IP cycling through accounts still is. A hit costs the route's weight from
+# RATE_LIMIT_COSTS ("/path=weight,..."), 1 if unlisted; routes without
+# @cost_limit (cheap reads such as /rooms) spend nothing.
+RATE_LIMIT_BUDGET = os.getenv("RATE_LIMIT_BUDGET", "100/minute")
+RATE_LIMIT_IP_BUDGET = os.getenv("RATE_LIMIT_IP_BUDGET", "1000/minute")
+# Login routes also spend from a budget per submitted email and route, which
+# holds however many IPs the attempts on one account come from.
+RATE_LIMIT_TARGET_BUDGET = os.getenv("RATE_LIMIT_TARGET_BUDGET", "200/hour")
+RATE_LIMIT_COSTS = {
+    path.strip(): int(weight)
+    for path, weight in (
+        entry.split("=", 1)
+        for entry in os.getenv(
+            "RATE_LIMIT_COSTS",
+            "/login=10,/stafflogin=10,/adminlogin=10,/signup=10,"
+            "/change-password=10,/change-profile=10,/send-otp=5,/verify-otp=2",
+        ).split(",")
+        if "=" in entry
+    )
+}
+
+
+# limits storage on the rate_limits table. With the sliding-window-counter
+# strategy each check is a single rate_limit_acquire() call that reads two
+# counter rows by primary key, whatever the number of clients. Expired rows
+# are removed by the compact_rate_limits job, scheduled from here at most once
+# per RATE_LIMIT_COMPACT_SECONDS per worker.
+class PostgresStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    STORAGE_SCHEME = ["postgres"]
+
+    def __init__(self, uri: str | None = None, wrap_exceptions: bool = False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self._compact_lock = threading.Lock()
+        self._next_compact = 0.0
+
+    @property
+    def base_exceptions(self):
+        return psycopg2.Error
+
+    def _schedule_compaction(self):
+        now = time.monotonic()
+        if now < self._next_compact or not self._compact_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_compact = now + RATE_LIMIT_COMPACT_SECONDS
+            # Lazy import: the job service pulls in the service layer, which
+            # imports the routers' limiter from here.
+            from service import job_service
+
+            job_service.enqueue(
+                "compact_rate_limits",
+                delay_seconds=RATE_LIMIT_COMPACT_SECONDS,
+                unique_key="compact_rate_limits",
+            )
+        except Exception:
+            logger.exception("Could not schedule rate limit compaction")
+        finally:
+            self._compact_lock.release()
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        hits = rate_limit_repository.incr(key, expiry, amount)
+        self._schedule_compaction()
+        return hits
+
+    def get(self, key: str) -> int:
+        return rate_limit_repository.get_hits(key)
+
+    def get_expiry(self, key: str) -> float:
+        expires_at = rate_limit_repository.get_expiry(key)
+        return expires_at if expires_at is not None else time.time()
+
+    def check(self) -> bool:
+        try:
+            rate_limit_repository.ping()
+            return True
+        except Exception:
+            return False
+
+    def reset(self) -> int | None:
+        return rate_limit_repository.reset()
+
+    def clear(self, key: str) -> None:
+        rate_limit_repository.clear(key)
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        # Share of the previous window still inside the sliding window.
+        previous_weight = 1 - (((now - expiry) / expiry) % 1)
+        acquired = rate_limit_repository.acquire_window_entry(
+            current_key, previous_key, previous_weight, amount, limit, 2 * expiry
+        )
+        self._schedule_compaction()
+        return acquired
+
+    def get_sliding_window(self, key: str, expiry: int) -> tuple[int, float, int, float]:
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        window = rate_limit_repository.get_window(previous_key, current_key)
+        previous_count = int(window["previous_count"])
+        previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry if previous_count else 0.0
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, int(window["current_count"]), current_ttl
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        rate_limit_repository.clear(*self.sliding_window_keys(key, expiry, time.time()))
+
+
+def compact_rate_limits() -> int:
+    removed = 0
+    while True:
+        batch = rate_limit_repository.compact(RATE_LIMIT_COMPACT_BATCH)
+        removed += batch
+        if batch < RATE_LIMIT_COMPACT_BATCH:
+            return removed
+
+
+def client_key(request: Request) -> str:
+    # A valid access token also leaves the principal on request.state for
+    # the handler, so this costs no second decode.
+    try:
+        email = decode_access_token(request).get("email")
+    except HTTPException:
+        email = None
+    if email:
+        return f"user:{email}"
+    return f"ip:{get_remote_address(request)}"
+
+
+def route_cost(request: Request) -> int:
+    return RATE_LIMIT_COSTS.get(request.url.path, 1)
+
+
+# Route dependency for the login endpoints: FastAPI has already parsed the
+# body, so this reads the cached JSON and leaves the account for target_key.
+async def remember_login_target(request: Request):
+    try:
+        body = await request.json()
+    except ValueError:
+        body = None
+    email = body.get("email") if isinstance(body, dict) else None
+    request.state.login_target = email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+
+def target_key(request: Request) -> str:
+    target = getattr(request.state, "login_target", None)
+    if target:
+        return f"{request.url.path}:{target}"
+    return f"{request.url.path}:ip:{get_remote_address(request)}"
+
+
+# Shared by every router; main.py installs it on the app. If the storage is
+# unreachable the limiter falls back to per-process memory counters rather
+# than failing requests, and switches back once the storage answers again.
+limiter = Limiter(
+    key_func=client_key,
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    strategy=RATE_LIMIT_STRATEGY,
+    in_memory_fallback_enabled=True,
+)
+
+
+def cost_limit(func):
+    func = limiter.shared_limit(RATE_LIMIT_IP_BUDGET, scope="ip-budget", key_func=get_remote_address, cost=route_cost)(func)
+    return limiter.shared_limit(RATE_LIMIT_BUDGET, scope="budget", cost=route_cost)(func)
+
+
+def login_limit(func):
+    func = limiter.shared_limit(RATE_LIMIT_TARGET_BUDGET, scope="target-budget", key_func=target_key, cost=route_cost)(func)
+    return cost_limit(func)
@@ -0,0 +1,56 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import STRATEGIES
+
+from configuration import rate_limit
+
+# Per-request cost of one limiter check against each storage, spread over
+# many client keys so the figure includes the cold-key path:
+#   python -m configuration.rate_limit_benchmark --checks 5000 --keys 1000 --threads 8
+#   python -m configuration.rate_limit_benchmark --storage memory:// --storage postgres://
+
+
+def _check(limiter, item, key: str) -> float:
+    started = time.perf_counter()
+    limiter.hit(item, key, "/benchmark")
+    return time.perf_counter() - started
+
+
+def _run(uri: str, strategy: str, limit: str, checks: int, keys: int, threads: int):
+    storage = storage_from_string(uri)
+    if not storage.check():
+        print(f"{uri:<24} unreachable, skipped")
+        return
+    limiter = STRATEGIES[strategy](storage)
+    item = parse(limit)
+    client_keys = [f"benchmark/{n}" for n in range(keys)]
+    try:
+        with ThreadPoolExecutor(threads) as executor:
+            started = time.perf_counter()
+            latencies = sorted(executor.map(lambda n: _check(limiter, item, client_keys[n % keys]), range(checks)))
+            elapsed = time.perf_counter() - started
+    finally:
+        for key in client_keys:
+            limiter.clear(item, key, "/benchmark")
+    print(f"{uri:<24} {checks / elapsed:9.0f} checks/s  "
+          f"p50 {latencies[len(latencies) // 2] * 1e6:8.1f} us  "
+          f"p95 {latencies[int(len(latencies) * 0.95)] * 1e6:8.1f} us  "
+          f"max {latencies[-1] * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark rate limiter overhead per request")
+    parser.add_argument("--storage", action="append", help="limits storage URI; repeatable")
+    parser.add_argument("--strategy", default=rate_limit.RATE_LIMIT_STRATEGY)
+    parser.add_argument("--limit", default="1000000/minute")
+    parser.add_argument("--checks", type=int, default=5000)
+    parser.add_argument("--keys", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+    print(f"{args.strategy}, {args.limit}, {args.keys} client keys, {args.threads} threads")
+    for uri in args.storage or ["memory://", rate_limit.RATE_LIMIT_STORAGE_URI]:
+        _run(uri, args.strategy, args.limit, args.checks, args.keys, args.threads)
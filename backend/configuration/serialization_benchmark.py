@@ -0,0 +1,89 @@
+import argparse
+import json
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+
+from service.admin_dashboard_service import BOOKING_ROWS
+from utility.json_response import ORJSONResponse
+
+# Per-row cost of GET /admin/bookings before and after the tuple cursor /
+# RowMapper / orjson path, on synthetic rows so no database is needed:
+#   python -m configuration.serialization_benchmark --rows 50000
+COLUMNS = (
+    "booking_id", "email", "guest_name", "phone", "guests", "room_type", "check_in",
+    "check_out", "status", "booking_date", "total_amount", "payment_method",
+)
+
+
+def _synthetic_rows(count: int) -> list[tuple]:
+    start = date(2026, 1, 1)
+    return [
+        (
+            f"BK-{i:08d}", f"guest{i % 5000}@example.com", f"Guest {i}", "+1 555 0100", 1 + i % 4,
+            ("standard", "deluxe", "executive", "presidential")[i % 4],
+            start + timedelta(days=i % 365), start + timedelta(days=i % 365 + 2),
+            "confirmed", datetime(2025, 12, 1) + timedelta(minutes=i),
+            Decimal("250.00") + i % 100 if i % 10 else None, "Card" if i % 10 else None,
+        )
+        for i in range(count)
+    ]
+
+
+# The row builder the endpoint used before RowMapper, kept here as the baseline.
+def _dict_booking_row(b: dict):
+    return {
+        "id": b.get("booking_id", ""),
+        "guestName": b.get("guest_name", "Guest"),
+        "email": b.get("email", ""),
+        "phone": b.get("phone", ""),
+        "roomType": b.get("room_type", ""),
+        "checkIn": str(b.get("check_in", "")),
+        "checkOut": str(b.get("check_out", "")),
+        "guests": b.get("guests", 1),
+        "total_amount": float(b.get("total_amount", 0)) if b.get("total_amount") else 0,
+        "status": b.get("status", "pending"),
+        "paymentMethod": b.get("payment_method", ""),
+        "bookingDate": str(b.get("booking_date", "")),
+    }
+
+
+def _before(rows: list[tuple]) -> bytes:
+    records = [dict(zip(COLUMNS, row)) for row in rows]
+    body = jsonable_encoder([_dict_booking_row(b) for b in records])
+    return json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _after(rows: list[tuple]) -> bytes:
+    return ORJSONResponse(BOOKING_ROWS(COLUMNS, rows)).body
+
+
+def _best_of(fn, rows, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(rows)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run_benchmark(count: int, repeat: int):
+    rows = _synthetic_rows(count)
+    if json.loads(_before(rows[:1000])) != json.loads(_after(rows[:1000])):
+        raise SystemExit("before and after produce different JSON")
+    before = _best_of(_before, rows, repeat)
+    after = _best_of(_after, rows, repeat)
+    print(f"rows: {count}")
+    for label, seconds in (("dict rows + jsonable_encoder", before), ("tuple rows + RowMapper + orjson", after)):
+        print(f"{label:<32} {seconds * 1000:8.1f} ms  {seconds / count * 1e6:6.2f} us/row")
+    print(f"speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark booking list serialization")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run_benchmark(args.rows, args.repeat)
@@ -1,11 +1,30 @@
+import logging
 import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
 
 import psycopg2
+from psycopg2 import extensions
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import PoolError
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 2))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", 20))
+DB_POOL_MAX_IDLE_SECONDS = float(os.getenv("DB_POOL_MAX_IDLE_SECONDS", 300))
+DB_POOL_HEALTH_CHECK_SECONDS = float(os.getenv("DB_POOL_HEALTH_CHECK_SECONDS", 30))
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", 10))
+
+# Serve the read-heavy endpoints from the psycopg 3 async pool instead of the
+# threadpool + psycopg2 path. Off by default so the two can be A/B tested.
+DB_ASYNC_ENABLED = os.getenv("DB_ASYNC_ENABLED", "false").lower() == "true"
+
 
 def database_connection():
     return psycopg2.connect(
@@ -18,3 +37,396 @@ def database_connection():
 
 def get_cursor(conn):
     return conn.cursor(cursor_factory=RealDictCursor)
+
+
+# Plain tuple rows for the list endpoints; pair them with column_names() and a
+# utility.row_mappers.RowMapper instead of building a dict per row.
+def get_tuple_cursor(conn):
+    return conn.cursor()
+
+
+# Named (server-side) cursor: rows stay in Postgres and arrive `itersize` at a
+# time, so a large result is never held in memory. Needs an open transaction.
+def get_server_cursor(conn, name: str, itersize: int = 2000):
+    cursor = conn.cursor(name=name)
+    cursor.itersize = itersize
+    return cursor
+
+
+def column_names(cursor) -> tuple[str, ...]:
+    return tuple(column[0] for column in cursor.description)
+
+
+# Idle connections are handed out most-recently-used first so a quiet period
+# lets the older ones age past max_idle and get closed. A connection that sat
+# idle longer than health_check_after is pinged before it is handed out.
+class ConnectionPool:
+    def __init__(
+        self,
+        connect=database_connection,
+        min_size: int = DB_POOL_MIN_SIZE,
+        max_size: int = DB_POOL_MAX_SIZE,
+        max_idle: float = DB_POOL_MAX_IDLE_SECONDS,
+        health_check_after: float = DB_POOL_HEALTH_CHECK_SECONDS,
+        timeout: float = DB_POOL_TIMEOUT_SECONDS,
+    ):
+        if max_size < 1 or min_size > max_size:
+            raise ValueError("Invalid pool sizing: need 1 <= max_size and min_size <= max_size")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.health_check_after = health_check_after
+        self.timeout = timeout
+
+        self._cond = threading.Condition()
+        self._idle = []
+        self._size = 0
+        self._closed = False
+        self._counters = {
+            "connections_created": 0,
+            "connections_closed": 0,
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "health_check_failures": 0,
+        }
+
+    def warm(self):
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            conn = self._open()
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def getconn(self, timeout: float | None = None):
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        waited = False
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolError("connection pool is closed")
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn, returned_at = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._counters["timeouts"] += 1
+                    raise PoolError("timed out waiting for a database connection")
+                if not waited:
+                    self._counters["waits"] += 1
+                    waited = True
+                self._cond.wait(remaining)
+            self._counters["checkouts"] += 1
+
+        if conn is None:
+            return self._open()
+        return self._validate(conn, returned_at)
+
+    def putconn(self, conn, discard: bool = False):
+        if not discard and not conn.closed:
+            status = conn.get_transaction_status()
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                discard = True
+            elif status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    discard = True
+
+        with self._cond:
+            if discard or conn.closed or self._closed:
+                self._size -= 1
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+                self._reap_idle()
+            self._cond.notify()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "closed": self._closed,
+                **self._counters,
+            }
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            for conn, _ in idle:
+                self._close_quietly(conn)
+            self._cond.notify_all()
+
+    def _open(self):
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._counters["connections_created"] += 1
+        return conn
+
+    def _validate(self, conn, returned_at: float):
+        idle_for = time.monotonic() - returned_at
+        if conn.closed or idle_for > self.max_idle:
+            return self._replace(conn)
+        if idle_for > self.health_check_after:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                conn.rollback()
+            except psycopg2.Error:
+                with self._cond:
+                    self._counters["health_check_failures"] += 1
+                return self._replace(conn)
+        return conn
+
+    def _replace(self, conn):
+        # The slot stays reserved for the caller; only the socket is swapped.
+        with self._cond:
+            self._close_quietly(conn)
+        return self._open()
+
+    def _reap_idle(self):
+        # Caller holds self._cond. Oldest idle connections sit at the front.
+        now = time.monotonic()
+        while self._size > self.min_size and self._idle and now - self._idle[0][1] > self.max_idle:
+            conn, _ = self._idle.pop(0)
+            self._size -= 1
+            self._close_quietly(conn)
+
+    def _close_quietly(self, conn):
+        # Caller holds self._cond.
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._counters["connections_closed"] += 1
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+def warm_pool():
+    get_pool().warm()
+
+
+# Round trip through the pool for the readiness probe. statement_timeout keeps
+# a wedged server from holding the probe past its deadline.
+def ping_database(timeout: float):
+    pool = get_pool()
+    conn = pool.getconn(timeout=timeout)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SET LOCAL statement_timeout = %s", (max(int(timeout * 1000), 1),))
+            cursor.execute("SELECT 1")
+        conn.rollback()
+    finally:
+        pool.putconn(conn)
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def pool_stats() -> dict:
+    stats = get_pool().stats()
+    if _async_pool is not None:
+        stats["async"] = _async_pool.get_stats()
+    return stats
+
+
+# A unit of work owns one pooled connection and one transaction for its whole
+# lifetime. The connection is only checked out the first time a repository
+# asks for it, so requests that never touch the database never block on the pool.
+class UnitOfWork:
+    def __init__(self, pool: ConnectionPool | None = None):
+        self._pool = pool or get_pool()
+        self._conn = None
+        self._after_commit = []
+
+    @property
+    def connection(self):
+        if self._conn is None:
+            self._conn = self._pool.getconn()
+        return self._conn
+
+    def after_commit(self, callback):
+        self._after_commit.append(callback)
+
+    def close(self, commit: bool = True):
+        callbacks, self._after_commit = self._after_commit, []
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                if commit:
+                    conn.commit()
+                else:
+                    conn.rollback()
+            finally:
+                self._pool.putconn(conn)
+        if commit:
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception:
+                    # The data is committed; a cache that missed the update
+                    # catches up on its next refresh.
+                    logger.exception("After-commit callback failed")
+
+
+_active_unit_of_work: ContextVar[UnitOfWork | None] = ContextVar("active_unit_of_work", default=None)
+
+
+def bind_unit_of_work(uow: UnitOfWork):
+    return _active_unit_of_work.set(uow)
+
+
+def unbind_unit_of_work(token):
+    _active_unit_of_work.reset(token)
+
+
+# Runs callback once the active unit of work has committed, or right away
+# outside one, so in-process indexes never count a write that rolled back.
+def after_commit(callback):
+    uow = _active_unit_of_work.get()
+    if uow is None:
+        callback()
+    else:
+        uow.after_commit(callback)
+
+
+@contextmanager
+def unit_of_work():
+    current = _active_unit_of_work.get()
+    if current is not None:
+        yield current
+        return
+
+    uow = UnitOfWork()
+    token = bind_unit_of_work(uow)
+    try:
+        yield uow
+    except BaseException:
+        unbind_unit_of_work(token)
+        uow.close(commit=False)
+        raise
+    unbind_unit_of_work(token)
+    uow.close(commit=True)
+
+
+@contextmanager
+def get_connection():
+    uow = _active_unit_of_work.get()
+    if uow is not None:
+        yield uow.connection
+        return
+
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+    finally:
+        pool.putconn(conn)
+
+
+# Repository writes go through transaction(): on their own they commit
+# immediately, inside a unit of work they leave the commit to its owner.
+@contextmanager
+def transaction():
+    uow = _active_unit_of_work.get()
+    if uow is not None:
+        yield uow.connection
+        return
+
+    with get_connection() as db:
+        try:
+            yield db
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+
+_async_pool = None
+
+
+def get_async_pool():
+    global _async_pool
+    if _async_pool is None:
+        from psycopg.conninfo import make_conninfo
+        from psycopg.rows import dict_row
+        from psycopg_pool import AsyncConnectionPool
+
+        _async_pool = AsyncConnectionPool(
+            make_conninfo(
+                host=os.getenv("DB_HOST"),
+                dbname=os.getenv("DB_NAME"),
+                user=os.getenv("DB_USER"),
+                password=os.getenv("DB_PASSWORD"),
+            ),
+            kwargs={"row_factory": dict_row},
+            min_size=DB_POOL_MIN_SIZE,
+            max_size=DB_POOL_MAX_SIZE,
+            max_idle=DB_POOL_MAX_IDLE_SECONDS,
+            timeout=DB_POOL_TIMEOUT_SECONDS,
+            check=AsyncConnectionPool.check_connection,
+            open=False,
+        )
+    return _async_pool
+
+
+async def open_async_pool():
+    await get_async_pool().open(wait=True, timeout=DB_POOL_TIMEOUT_SECONDS)
+
+
+async def close_async_pool():
+    global _async_pool
+    if _async_pool is not None:
+        await _async_pool.close()
+        _async_pool = None
+
+
+def get_async_tuple_cursor(conn):
+    from psycopg.rows import tuple_row
+
+    return conn.cursor(row_factory=tuple_row)
+
+
+@asynccontextmanager
+async def get_async_connection():
+    async with get_async_pool().connection() as conn:
+        yield conn
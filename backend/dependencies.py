@@ -1,9 +1,12 @@
 from typing import Optional
 
-from fastapi import HTTPException, Request
+from fastapi import HTTPException, Request, Response
+from starlette.concurrency import run_in_threadpool
 
+from configuration.settings import DB_ASYNC_ENABLED, UnitOfWork, bind_unit_of_work, unbind_unit_of_work
 from helper.generate_token import decoded_token
-from repository.user_repository import get_user_by_email
+from service import catalog_version_service, user_cache_service
+from utility.http_cache import cache_headers, catalog_etag, is_not_modified, last_modified
 
 
 def get_token_from_request(request: Request, allow_bearer: bool = False) -> Optional[str]:
@@ -19,7 +22,15 @@ def get_token_from_request(request: Request, allow_bearer: bool = False) -> Opti
     return None
 
 
+# The verified payload is kept on request.state.principal, so role checks and
+# handlers that ask again in the same request do not decode twice. Treat it
+# as read-only: it is shared with the verified-token cache. A payload that came
+# from the Authorization header is not reused by a cookie-only check.
 def decode_access_token(request: Request, allow_bearer: bool = False) -> dict:
+    principal = getattr(request.state, "principal", None)
+    if principal is not None and (allow_bearer or request.state.principal_source == "cookie"):
+        return principal
+
     token = get_token_from_request(request, allow_bearer=allow_bearer)
     if not token:
         raise HTTPException(status_code=401, detail={"message": "No token", "user": None})
@@ -30,6 +41,8 @@ def decode_access_token(request: Request, allow_bearer: bool = False) -> dict:
             status_code=401,
             detail={"message": "Invalid or expired token", "user": None},
         )
+    request.state.principal = decoded
+    request.state.principal_source = "cookie" if token == request.cookies.get("access_token") else "bearer"
     return decoded
 
 
@@ -50,7 +63,50 @@ def get_authenticated_user(request: Request):
     if not email:
         raise HTTPException(status_code=401, detail={"message": "Invalid token payload"})
 
-    user = get_user_by_email(email)
+    user = user_cache_service.get_profile(email)
     if not user:
         raise HTTPException(status_code=404, detail={"user": None})
     return user
+
+
+# Declare with Depends(request_unit_of_work, scope="function") so the commit
+# happens before the response is sent. It is an async generator on purpose:
+# the unit of work is bound in the request task's context, which FastAPI then
+# copies into the worker thread that runs a sync endpoint.
+async def request_unit_of_work():
+    uow = UnitOfWork()
+    token = bind_unit_of_work(uow)
+    try:
+        yield uow
+    except BaseException:
+        await run_in_threadpool(uow.close, False)
+        raise
+    else:
+        await run_in_threadpool(uow.close, True)
+    finally:
+        unbind_unit_of_work(token)
+
+
+# Conditional GET for public catalog reads, e.g.
+# dependencies=[Depends(catalog_cache("rooms"))]. The ETag comes from the
+# catalog version counters, so a matching If-None-Match is answered with a 304
+# before the endpoint touches the database.
+def catalog_cache(*names: str):
+    async def dependency(request: Request, response: Response):
+        versions = catalog_version_service.cached_versions()
+        if versions is None:
+            if DB_ASYNC_ENABLED:
+                versions = await catalog_version_service.get_versions_async()
+            else:
+                versions = await run_in_threadpool(catalog_version_service.get_versions)
+
+        etag = catalog_etag(versions, names)
+        if etag is None:
+            return
+        modified = last_modified(versions, names)
+        headers = cache_headers(etag, modified)
+        if is_not_modified(request, etag, modified):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    return dependency
@@ -1,39 +1,102 @@
-import email
-import secrets
-import jwt
-import os
 import datetime
+import hashlib
+import os
+
+import jwt
+from dotenv import load_dotenv
+
+from utility.ttl_cache import TTLCache
+
+load_dotenv()
+
+ACCESS_TOKEN_EXPIRES_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRES_MINUTES", 15))
+REFRESH_TOKEN_EXPIRES_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRES_DAYS", 7))
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", 10000))
+
+
+# Keys are read once. For rotation set JWT_KEYS="kid:secret,kid:secret" and
+# JWT_ACTIVE_KID to the one new tokens are signed with; tokens signed with any
+# listed key stay valid until they expire. Tokens without a kid header
+# (issued before rotation was set up) are checked against JWT_KEY.
+class KeyRing:
+    def __init__(self, keys_env: str, active_env: str, legacy_env: str):
+        legacy = os.getenv(legacy_env)
+        self.keys = {}
+        for entry in os.getenv(keys_env, "").split(","):
+            if ":" in entry:
+                kid, secret = entry.split(":", 1)
+                self.keys[kid.strip()] = secret.strip()
+        self.active_kid = os.getenv(active_env) or (next(iter(self.keys)) if self.keys else None)
+        if self.active_kid is not None and self.active_kid not in self.keys:
+            raise RuntimeError(f"{active_env} names a key that is not in {keys_env}")
+        self.legacy = legacy
+
+    def signing_key(self) -> tuple[str | None, str]:
+        if self.active_kid is not None:
+            return self.active_kid, self.keys[self.active_kid]
+        return None, self.legacy
+
+    def verification_key(self, token: str) -> str | None:
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is None:
+            return self.legacy
+        return self.keys.get(kid)
+
 
+ACCESS_KEYS = KeyRing("JWT_KEYS", "JWT_ACTIVE_KID", "JWT_KEY")
+REFRESH_KEYS = KeyRing("JWT_REFRESH_KEYS", "JWT_REFRESH_ACTIVE_KID", "JWT_REFRESH_KEY")
 
-def generate_access_token(email,role='user'):
-    payload ={
-        'email':email,
-        'role':role,
-        'exp':datetime.datetime.utcnow() + datetime.timedelta(minutes=int(os.getenv('ACCESS_TOKEN_EXPIRES_MINUTES',15))),
-        'iat':datetime.datetime.utcnow()
+
+def _encode(payload: dict, keys: KeyRing) -> str:
+    kid, secret = keys.signing_key()
+    return jwt.encode(payload, secret, algorithm="HS256", headers={"kid": kid} if kid else None)
+
+
+def generate_access_token(email, role="user"):
+    now = datetime.datetime.utcnow()
+    payload = {
+        "email": email,
+        "role": role,
+        "exp": now + datetime.timedelta(minutes=ACCESS_TOKEN_EXPIRES_MINUTES),
+        "iat": now,
     }
-    token = jwt.encode(payload,os.getenv('JWT_KEY'),algorithm='HS256')
-    return token
+    return _encode(payload, ACCESS_KEYS)
 
 
-def generate_refresh_token(email,role='user'):
+def generate_refresh_token(email, role="user"):
+    now = datetime.datetime.utcnow()
     payload = {
-        'email':email,
-        'role':role,
-        'exp':datetime.datetime.utcnow() + datetime.timedelta(days=int(os.getenv("REFRESH_TOKEN_EXPIRES_DAYS",7))),
-        'iat':datetime.datetime.utcnow()
+        "email": email,
+        "role": role,
+        "exp": now + datetime.timedelta(days=REFRESH_TOKEN_EXPIRES_DAYS),
+        "iat": now,
     }
-    token = jwt.encode(payload,os.getenv("JWT_REFRESH_KEY"),algorithm='HS256')
-    return token
+    return _encode(payload, REFRESH_KEYS)
 
-def decoded_token(token,is_refresh=False):
-    secret = os.getenv("JWT_REFRESH_KEY") if is_refresh else os.getenv("JWT_KEY")
-    try:
-        payload = jwt.decode(token, secret, algorithms=['HS256'])
+
+# Verified payloads keyed by a digest of the token, so a repeat request skips
+# the signature check. Entries leave at their exp or when least recently used.
+# Only valid tokens are cached; garbage tokens cannot flush the cache.
+_verified = TTLCache(JWT_CACHE_SIZE)
+
+
+def clear_token_cache():
+    _verified.clear()
+
+
+def decoded_token(token, is_refresh=False):
+    key = (is_refresh, hashlib.sha256(token.encode()).digest())
+    payload = _verified.get(key)
+    if payload is not None:
         return payload
-    except jwt.ExpiredSignatureError as e:
-        return None
-    except jwt.InvalidTokenError as e:
+    keys = REFRESH_KEYS if is_refresh else ACCESS_KEYS
+    try:
+        secret = keys.verification_key(token)
+        if not secret:
+            return None
+        payload = jwt.decode(token, secret, algorithms=["HS256"])
+    except jwt.InvalidTokenError:
         return None
-
-        
\ No newline at end of file
+    if isinstance(payload.get("exp"), (int, float)):
+        _verified.set(key, payload, expires_at=payload["exp"])
+    return payload
@@ -1,13 +1,31 @@
+import asyncio
+import logging
 import os
+from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
+from fastapi.responses import JSONResponse, Response
+from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
+from starlette.concurrency import run_in_threadpool
 
+from configuration.rate_limit import limiter
+from configuration.settings import (
+    DB_ASYNC_ENABLED,
+    close_async_pool,
+    close_pool,
+    open_async_pool,
+    ping_database,
+    pool_stats,
+    warm_pool,
+)
+from repository import job_repository
+from service import job_service, occupancy_service, user_cache_service
+from utility.json_response import ORJSONResponse
+from utility.security import close_hash_pool, start_hash_pool
+from utility.utility_email import close_email_backend, email_stats
 from router.admin_router import router as admin_router
 from router.auth_router import router as auth_router
 from router.booking_router import router as booking_router
@@ -20,22 +38,66 @@ from router.user_router import router as user_router
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+READY_TIMEOUT_SECONDS = float(os.getenv("READY_TIMEOUT_SECONDS", 2))
+
 frontend_origins = os.getenv("FRONTEND_ORIGINS", "")
 allowed_origins = [origin.strip() for origin in frontend_origins.split(",") if origin.strip()]
 if "*" in allowed_origins:
     allowed_origins = ["http://localhost:3000"]
 
-limiter = Limiter(key_func=get_remote_address)
-app = FastAPI(title="Hotel System API")
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # /ready answers 503 until every warm-up step below has run.
+    _app.state.ready = False
+    try:
+        await run_in_threadpool(warm_pool)
+    except Exception:
+        logger.exception("Database pool warm-up failed; connections will be opened on demand")
+    if DB_ASYNC_ENABLED:
+        try:
+            await open_async_pool()
+        except Exception:
+            logger.exception("Async database pool warm-up failed; connections will be opened on demand")
+    try:
+        await run_in_threadpool(occupancy_service.rebuild_occupancy)
+    except Exception:
+        logger.exception("Occupancy matrix build failed; it will be built on first use")
+    try:
+        await run_in_threadpool(start_hash_pool)
+    except Exception:
+        logger.exception("Hash pool start failed; workers will be started on first use")
+    job_service.start_workers()
+    user_cache_service.start_listener()
+    occupancy_service.start_listener()
+    _app.state.ready = True
+    yield
+    _app.state.ready = False
+    await run_in_threadpool(user_cache_service.stop_listener)
+    await run_in_threadpool(occupancy_service.stop_listener)
+    await run_in_threadpool(job_service.stop_workers)
+    await run_in_threadpool(close_email_backend)
+    await run_in_threadpool(close_hash_pool)
+    await close_async_pool()
+    await run_in_threadpool(close_pool)
+
+
+app = FastAPI(title="Hotel System API", lifespan=lifespan, default_response_class=ORJSONResponse)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 
 @app.exception_handler(HTTPException)
 async def http_exception_handler(_request, exc: HTTPException):
+    # A 304 from catalog_cache must keep its ETag/Cache-Control headers and
+    # carry no body, or clients cannot revalidate.
+    if exc.status_code < 200 or exc.status_code in (204, 304):
+        return Response(status_code=exc.status_code, headers=exc.headers)
     if isinstance(exc.detail, dict):
-        return JSONResponse(content=exc.detail, status_code=exc.status_code)
-    return JSONResponse(content={"message": exc.detail}, status_code=exc.status_code)
+        return JSONResponse(content=exc.detail, status_code=exc.status_code, headers=exc.headers)
+    return JSONResponse(content={"message": exc.detail}, status_code=exc.status_code, headers=exc.headers)
 
 
 app.add_middleware(
@@ -63,6 +125,36 @@ def health_check():
     return {"status": "ok"}
 
 
+# Load balancer probe, unlike /health: 503 until this worker has warmed up,
+# while it shuts down, and while a SELECT 1 through the pool does not come
+# back within READY_TIMEOUT_SECONDS.
+@app.get("/ready")
+async def readiness_check():
+    if not getattr(app.state, "ready", False):
+        return JSONResponse(content={"status": "starting"}, status_code=503)
+    try:
+        await asyncio.wait_for(run_in_threadpool(ping_database, READY_TIMEOUT_SECONDS), READY_TIMEOUT_SECONDS)
+    except Exception:
+        return JSONResponse(content={"status": "database unavailable"}, status_code=503)
+    return {"status": "ready"}
+
+
+@app.get("/health/jobs")
+def jobs_health():
+    return job_repository.get_job_stats()
+
+
+@app.get("/health/email")
+def email_health():
+    return email_stats()
+
+
+@app.get("/health/db-pool")
+def db_pool_health():
+    return pool_stats()
+
+
+# Development server; production runs through server.py.
 if __name__ == "__main__":
     import uvicorn
 
@@ -1,6 +1,6 @@
-from datetime import date
+from datetime import date, datetime
 from decimal import Decimal
-from typing import Any, Optional
+from typing import Any, Literal, Optional
 
 from pydantic import BaseModel, EmailStr, Field
 
@@ -11,6 +11,10 @@ from utility.validators import (
     BookingValidators,
 )
 
+# Every booking status the occupancy sync, dashboard counters and inventory
+# checks know about; the admin status endpoint and bulk import accept only these.
+BookingStatus = Literal["pending", "confirmed", "cancelled", "checked-in", "checked-out"]
+
 
 class UserSignup(BaseModel, UserValidators):
     email: EmailStr
@@ -100,9 +104,9 @@ class PaymentRequest(BaseModel):
 
 
 class RoomCreate(BaseModel):
-    room_number: str
-    name: str
-    type: str
+    room_number: str = Field(max_length=10)
+    name: str = Field(max_length=200)
+    type: str = Field(max_length=50)
     description: str = ""
 
     price_base: Decimal = Decimal("0")
@@ -111,19 +115,37 @@ class RoomCreate(BaseModel):
     capacity: int = 2
     size_sqm: int = 0
 
-    bed_type: str = ""
+    bed_type: str = Field(default="", max_length=100)
 
     amenities: list[str] = Field(default_factory=list)
 
     floor: int = 1
 
 
+# A historical reservation for bulk import; amount, when given, is recorded
+# as one completed payment.
+class BookingImport(BaseModel, BookingValidators):
+    user_email: EmailStr
+    guest_name: str = Field(default="", max_length=200)
+    phone: str = Field(default="", max_length=50)
+    guests: int = Field(default=1, ge=1)
+
+    room_type: str = Field(max_length=100)
+    in_date: date
+    out_date: date
+    status: BookingStatus = "confirmed"
+    created_at: Optional[datetime] = None
+
+    amount: Optional[Decimal] = Field(default=None, ge=0, max_digits=10, decimal_places=2)
+    payment_method: str = Field(default="", max_length=100)
+
+
 class RoomStatusUpdate(BaseModel):
     status: str
 
 
 class BookingStatusUpdate(BaseModel):
-    status: str
+    status: BookingStatus
 
 
 class TaskCreate(BaseModel):
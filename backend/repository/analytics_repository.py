@@ -0,0 +1,137 @@
+from configuration.settings import get_connection, get_cursor, transaction
+
+# Claims a batch of queued days. SKIP LOCKED lets two refreshers split the
+# queue; a day re-queued by a write that commits after this claim is picked
+# up by the next batch.
+CLAIM_DIRTY_DAYS_SQL = """
+    DELETE FROM rollup_dirty_days
+    WHERE day IN (
+        SELECT day FROM rollup_dirty_days
+        ORDER BY day
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING day
+"""
+
+# Stay nights are sold nights; a booking's payments are spread evenly over its
+# nights as room revenue. Cancellations count on the check-in day. Supply is
+# today's sellable room count per type, as room history is not kept. Every
+# part joins against the claimed days themselves, which can lie years apart,
+# so a sparse batch never expands stays over the span between them.
+ROLLUP_DAYS_SQL = """
+    WITH days AS (
+        SELECT unnest(%(days)s::date[]) AS day
+    ),
+    types AS (
+        SELECT type AS room_type, COUNT(*) FILTER (WHERE status <> 'maintenance') AS sellable
+        FROM rooms
+        GROUP BY type
+    ),
+    stays AS (
+        SELECT b.room_type, b.rooms, d.day,
+               COALESCE(p.total, 0) / (b.out_date - b.in_date) AS nightly_revenue
+        FROM days d
+        JOIN bookings b ON b.in_date <= d.day AND b.out_date > d.day
+        LEFT JOIN LATERAL (
+            SELECT SUM(amount) AS total FROM payments WHERE booking_id = b.booking_id
+        ) p ON TRUE
+        WHERE b.status <> 'cancelled'
+    ),
+    sold AS (
+        SELECT day, room_type, SUM(rooms) AS nights_sold, SUM(nightly_revenue) AS revenue
+        FROM stays
+        GROUP BY day, room_type
+    ),
+    created AS (
+        SELECT d.day, b.room_type, COUNT(*) AS bookings_created
+        FROM days d
+        JOIN bookings b ON b.created_at >= d.day AND b.created_at < d.day + 1
+        GROUP BY 1, 2
+    ),
+    cancelled AS (
+        SELECT d.day, b.room_type, COUNT(*) AS cancellations
+        FROM days d
+        JOIN bookings b ON b.in_date = d.day
+        WHERE b.status = 'cancelled'
+        GROUP BY 1, 2
+    )
+    INSERT INTO daily_room_type_stats
+        (day, room_type, nights_sold, room_revenue, rooms_available, bookings_created, cancellations)
+    SELECT d.day, t.room_type,
+           COALESCE(s.nights_sold, 0), COALESCE(s.revenue, 0), t.sellable,
+           COALESCE(c.bookings_created, 0), COALESCE(x.cancellations, 0)
+    FROM days d
+    CROSS JOIN types t
+    LEFT JOIN sold s ON s.day = d.day AND s.room_type = t.room_type
+    LEFT JOIN created c ON c.day = d.day AND c.room_type = t.room_type
+    LEFT JOIN cancelled x ON x.day = d.day AND x.room_type = t.room_type
+"""
+
+TIMESERIES_SQL = """
+    SELECT date_trunc(%(bucket)s, day)::date AS bucket,
+           SUM(nights_sold) AS nights_sold,
+           SUM(room_revenue) AS revenue,
+           SUM(rooms_available) AS available_room_nights,
+           SUM(bookings_created) AS bookings,
+           SUM(cancellations) AS cancellations
+    FROM daily_room_type_stats
+    WHERE day BETWEEN %(start)s AND %(end)s
+      AND (%(room_type)s = '' OR room_type = %(room_type)s)
+    GROUP BY 1
+    ORDER BY 1
+"""
+
+
+def refresh_dirty_days(limit: int) -> list:
+    with transaction() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute(CLAIM_DIRTY_DAYS_SQL, (limit,))
+            days = [row["day"] for row in cursor.fetchall()]
+            if days:
+                cursor.execute("DELETE FROM daily_room_type_stats WHERE day = ANY(%s)", (days,))
+                cursor.execute(ROLLUP_DAYS_SQL, {"days": days})
+            return days
+        finally:
+            cursor.close()
+
+
+def mark_days_dirty(start, end) -> int:
+    with transaction() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute(
+                """
+                INSERT INTO rollup_dirty_days (day)
+                SELECT generate_series(%s::date, %s::date, INTERVAL '1 day')::date
+                ON CONFLICT (day) DO NOTHING
+                """,
+                (start, end),
+            )
+            return cursor.rowcount
+        finally:
+            cursor.close()
+
+
+def count_dirty_days() -> int:
+    with get_connection() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute("SELECT COUNT(*) AS pending FROM rollup_dirty_days")
+            return cursor.fetchone()["pending"]
+        finally:
+            cursor.close()
+
+
+def get_timeseries(bucket: str, start, end, room_type: str = ""):
+    with get_connection() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute(
+                TIMESERIES_SQL,
+                {"bucket": bucket, "start": start, "end": end, "room_type": room_type},
+            )
+            return cursor.fetchall()
+        finally:
+            cursor.close()
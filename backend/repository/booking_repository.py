@@ -1,70 +1,177 @@
+from configuration.settings import (
+    column_names,
+    get_async_connection,
+    get_async_tuple_cursor,
+    get_connection,
+    get_cursor,
+    get_server_cursor,
+    get_tuple_cursor,
+    transaction,
+)
+
+# Bookings in these states hold a room for every night in [in_date, out_date).
+# The SQL below spells the list out so it matches the partial index predicate.
+ACTIVE_BOOKING_STATUSES = ("pending", "confirmed")
+
+# First key of the two-key advisory lock that serialises inventory checks per
+# room type; the second key is hashtext(room_type).
+ROOM_INVENTORY_LOCK_NAMESPACE = 6001
+
+ROOM_TYPE_PEAK_OCCUPANCY_SQL = """
+    SELECT
+        (SELECT COUNT(*) FROM rooms WHERE type = %(room_type)s AND status <> 'maintenance') AS sellable,
+        COALESCE(MAX(per_night.booked), 0) AS peak_booked
+    FROM (
+        SELECT n.night, COALESCE(SUM(b.rooms), 0) AS booked
+        FROM generate_series(%(in_date)s::date, %(out_date)s::date - 1, INTERVAL '1 day') AS n(night)
+        LEFT JOIN bookings b
+            ON b.room_type = %(room_type)s
+            AND b.status IN ('pending', 'confirmed')
+            AND b.in_date <= n.night
+            AND b.out_date > n.night
+        GROUP BY n.night
+    ) per_night
+"""
+
+
+class RoomUnavailableError(Exception):
+    pass
+
+
+# A booking can carry several payments (deposit + balance, retries). Both list
+# queries return one row per booking with the payments summed and the most
+# recent payment method, joined on the integer FK so idx_payments_booking_id
+# is usable. The history query is selective, so it probes payments per booking;
+# the full list aggregates payments once and hash-joins.
+USER_BOOKING_HISTORY_SQL = """
+    SELECT b.booking_id, b.user_email, b.guest_name, b.phone, b.guests,
+           b.room_type, b.in_date, b.out_date, b.status, b.created_at,
+           p.total_amount, p.payment_method
+    FROM bookings b
+    LEFT JOIN LATERAL (
+        SELECT SUM(amount) AS total_amount,
+               (ARRAY_AGG(payment_method ORDER BY created_at DESC, payment_id DESC))[1] AS payment_method
+        FROM payments
+        WHERE payments.booking_id = b.booking_id
+    ) p ON TRUE
+    WHERE b.user_email = %s
+    ORDER BY b.created_at DESC
+"""
+
+ALL_BOOKINGS_SQL = """
+    SELECT b.booking_id, b.user_email AS email, b.guest_name, b.phone, b.guests,
+           b.room_type, b.in_date AS check_in,
+           b.out_date AS check_out, b.status, b.created_at AS booking_date,
+           p.total_amount, p.payment_method
+    FROM bookings b
+    LEFT JOIN (
+        SELECT booking_id,
+               SUM(amount) AS total_amount,
+               (ARRAY_AGG(payment_method ORDER BY created_at DESC, payment_id DESC))[1] AS payment_method
+        FROM payments
+        GROUP BY booking_id
+    ) p ON p.booking_id = b.booking_id
+    ORDER BY b.created_at DESC
+"""
+
+
+# Same columns as ALL_BOOKINGS_SQL, but payments are summed per booking with a
+# LATERAL lookup on idx_payments_booking_id so rows can stream out in created_at
+# order without aggregating the whole payments table first.
+BOOKINGS_EXPORT_SQL = """
+    SELECT b.booking_id, b.user_email AS email, b.guest_name, b.phone, b.guests,
+           b.room_type, b.in_date AS check_in,
+           b.out_date AS check_out, b.status, b.created_at AS booking_date,
+           p.total_amount, p.payment_method
+    FROM bookings b
+    LEFT JOIN LATERAL (
+        SELECT SUM(amount) AS total_amount,
+               (ARRAY_AGG(payment_method ORDER BY created_at DESC, payment_id DESC))[1] AS payment_method
+        FROM payments
+        WHERE booking_id = b.booking_id
+    ) p ON TRUE
+    WHERE (%(start)s::date IS NULL OR b.created_at >= %(start)s::date)
+      AND (%(end)s::date IS NULL OR b.created_at < %(end)s::date + 1)
+    ORDER BY b.created_at, b.booking_id
+"""
 
-from configuration.settings import database_connection, get_cursor
 
 def get_booking_by_id(booking_id: str, user_email: str | None = None):
-    db = database_connection()
-    cursor = get_cursor(db)
-    try:
-        if user_email:
-            cursor.execute(
-                "SELECT * FROM bookings WHERE booking_id = %s AND user_email = %s",
-                (booking_id, user_email),
-            )
-        else:
+    with get_connection() as db:
+        cursor = get_cursor(db)
+        try:
+            if user_email:
+                cursor.execute(
+                    "SELECT * FROM bookings WHERE booking_id = %s AND user_email = %s",
+                    (booking_id, user_email),
+                )
+            else:
+                cursor.execute(
+                    "SELECT * FROM bookings WHERE booking_id = %s",
+                    (booking_id,),
+                )
+            return cursor.fetchone()
+        finally:
+            cursor.close()
+
+
+# Only active bookings can be cancelled, so the returned row always held
+# rooms that the availability index and occupancy matrix must give back.
+def cancel_booking(booking_id: str):
+    with transaction() as db:
+        cursor = get_cursor(db)
+        try:
             cursor.execute(
-                "SELECT * FROM bookings WHERE booking_id = %s",
-                (booking_id,),
+                """UPDATE bookings
+                SET status = %s
+                WHERE booking_id = %s
+                AND status IN ('pending', 'confirmed')
+                RETURNING *
+                """,
+                ("cancelled", booking_id),
             )
-        return cursor.fetchone()
-    finally:
-        cursor.close()
-        db.close()
+            updated = cursor.fetchone()
+            return updated
+        finally:
+            cursor.close()
 
 
-def cancel_booking(booking_id: str):
-    db = database_connection()
-    cursor = get_cursor(db)
-    try:
-        cursor.execute(
-            """UPDATE bookings
-            SET status = %s
-            WHERE booking_id = %s
-            AND status != %s
-            RETURNING *
-            """,
-            ("cancelled", booking_id, "cancelled"),
-        )
-        updated = cursor.fetchone()
-        db.commit()
-        return updated
-    except Exception:
-        db.rollback()
-        raise
-    finally:
-        cursor.close()
-        db.close()
+def _claim_room_type_inventory(cursor, room_type: str, in_date, out_date, rooms: int = 1):
+    # The lock is held until the surrounding transaction ends, so a concurrent
+    # booking for the same type waits here and then sees this one's row.
+    cursor.execute(
+        "SELECT pg_advisory_xact_lock(%s, hashtext(%s))",
+        (ROOM_INVENTORY_LOCK_NAMESPACE, room_type),
+    )
+    cursor.execute(
+        ROOM_TYPE_PEAK_OCCUPANCY_SQL,
+        {
+            "room_type": room_type,
+            "in_date": in_date,
+            "out_date": out_date,
+        },
+    )
+    row = cursor.fetchone()
+    if row["peak_booked"] + rooms > row["sellable"]:
+        if rooms == 1:
+            raise RoomUnavailableError(f"No {room_type} rooms available for the selected dates")
+        raise RoomUnavailableError(f"Not enough {room_type} rooms available for the selected dates")
 
 
 def get_user_booking_history(user_email: str):
-    db = database_connection()
-    cursor = get_cursor(db)
-    try:
-        cursor.execute(
-            """
-            SELECT b.booking_id, b.user_email, b.guest_name, b.phone, b.guests,
-                   b.room_type, b.in_date, b.out_date, b.status, b.created_at,
-                   p.amount AS total_amount, p.payment_method
-            FROM bookings b
-            LEFT JOIN payments p ON b.booking_id::text = p.booking_id::text
-            WHERE b.user_email = %s
-            ORDER BY b.created_at DESC
-            """,
-            (user_email,),
-        )
-        return cursor.fetchall()
-    finally:
-        cursor.close()
-        db.close()
+    with get_connection() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute(USER_BOOKING_HISTORY_SQL, (user_email,))
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+
+async def get_user_booking_history_async(user_email: str):
+    async with get_async_connection() as db:
+        cursor = await db.execute(USER_BOOKING_HISTORY_SQL, (user_email,))
+        return await cursor.fetchall()
 
 
 def create_booking(
@@ -76,84 +183,109 @@ def create_booking(
     guest_name: str = "",
     phone: str = "",
     guests: int = 1,
+    rooms: int = 1,
 ):
-    db = database_connection()
-    cursor = get_cursor(db)
-    try:
-
-        if in_date >= out_date:
-            raise ValueError("Check-out date must be after check-in date")
-        cursor.execute(
-            """
-            INSERT INTO bookings (user_email, guest_name, phone, guests, room_type, in_date, out_date, status, created_at)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW())
-            RETURNING booking_id, user_email, guest_name, phone, guests, room_type, in_date, out_date, status, created_at
-            """,
-            (user_email, guest_name, phone, guests, room_type, in_date, out_date, status),
-        )
-        booking = cursor.fetchone()
-        db.commit()
-        return booking
-    except Exception:
-        db.rollback()
-        raise
-    finally:
-        cursor.close()
-        db.close()
+    with transaction() as db:
+        cursor = get_cursor(db)
+        try:
+
+            if in_date >= out_date:
+                raise ValueError("Check-out date must be after check-in date")
+            _claim_room_type_inventory(cursor, room_type, in_date, out_date, rooms)
+            cursor.execute(
+                """
+                INSERT INTO bookings (user_email, guest_name, phone, guests, rooms, room_type, in_date, out_date, status, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
+                RETURNING booking_id, user_email, guest_name, phone, guests, rooms, room_type, in_date, out_date, status, created_at
+                """,
+                (user_email, guest_name, phone, guests, rooms, room_type, in_date, out_date, status),
+            )
+            booking = cursor.fetchone()
+            return booking
+        finally:
+            cursor.close()
 
 
 def get_all_bookings():
-    db = database_connection()
-    cursor = get_cursor(db)
-    try:
-        cursor.execute("""
-            SELECT b.booking_id, b.user_email AS email, b.guest_name, b.phone, b.guests,
-                   b.room_type, b.in_date AS check_in,
-                   b.out_date AS check_out, b.status, b.created_at AS booking_date,
-                   p.amount AS total_amount, p.payment_method
-            FROM bookings b
-            LEFT JOIN payments p ON b.booking_id::text = p.booking_id::text
-            ORDER BY b.created_at DESC
-        """)
-        return cursor.fetchall()
-    finally:
-        cursor.close()
-        db.close()
+    with get_connection() as db:
+        cursor = get_tuple_cursor(db)
+        try:
+            cursor.execute(ALL_BOOKINGS_SQL)
+            return column_names(cursor), cursor.fetchall()
+        finally:
+            cursor.close()
+
+
+def iter_bookings_for_export(start=None, end=None, batch_size: int = 2000):
+    # Holds one pooled connection until the generator is exhausted or closed.
+    with get_connection() as db:
+        cursor = get_server_cursor(db, "bookings_export", batch_size)
+        try:
+            cursor.execute(BOOKINGS_EXPORT_SQL, {"start": start, "end": end})
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    return
+                yield column_names(cursor), batch
+        finally:
+            cursor.close()
+
+
+async def get_all_bookings_async():
+    async with get_async_connection() as db:
+        cursor = get_async_tuple_cursor(db)
+        await cursor.execute(ALL_BOOKINGS_SQL)
+        return column_names(cursor), await cursor.fetchall()
 
 
 def update_booking_status(booking_id: str, status: str):
-    db = database_connection()
-    cursor = get_cursor(db)
-    try:
-        cursor.execute(
-            "UPDATE bookings SET status = %s WHERE booking_id = %s RETURNING *",
-            (status, booking_id),
-        )
-        db.commit()
-        return cursor.fetchone()
-    except Exception:
-        db.rollback()
-        raise
-    finally:
-        cursor.close()
-        db.close()
-
-
-def get_booking_stats():
-    db = database_connection()
-    cursor = get_cursor(db)
-    try:
-        cursor.execute("""
-            SELECT
-                COUNT(*) AS total,
-                COUNT(*) FILTER (WHERE status = 'confirmed') AS confirmed,
-                COUNT(*) FILTER (WHERE status = 'pending') AS pending,
-                COUNT(*) FILTER (WHERE status = 'cancelled') AS cancelled,
-                COALESCE(SUM(p.amount), 0) AS total_revenue
-            FROM bookings b
-            LEFT JOIN payments p ON b.booking_id::text = p.booking_id::text
-        """)
-        return cursor.fetchone()
-    finally:
-        cursor.close()
-        db.close()
+    with transaction() as db:
+        cursor = get_cursor(db)
+        try:
+            if status in ACTIVE_BOOKING_STATUSES:
+                cursor.execute(
+                    "SELECT room_type, in_date, out_date, rooms, status FROM bookings WHERE booking_id = %s FOR UPDATE",
+                    (booking_id,),
+                )
+                current = cursor.fetchone()
+                # Bringing an inactive booking back takes its rooms again, so
+                # it goes through the same check as a new booking.
+                if current and current["status"] not in ACTIVE_BOOKING_STATUSES:
+                    _claim_room_type_inventory(
+                        cursor, current["room_type"], current["in_date"], current["out_date"], current["rooms"]
+                    )
+            cursor.execute(
+                "UPDATE bookings SET status = %s WHERE booking_id = %s RETURNING *",
+                (status, booking_id),
+            )
+            return cursor.fetchone()
+        finally:
+            cursor.close()
+
+
+# Delivered to every listening worker once the surrounding transaction
+# commits.
+def notify(channel: str, payload: str = ""):
+    with transaction() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute("SELECT pg_notify(%s, %s)", (channel, payload))
+        finally:
+            cursor.close()
+
+
+def get_active_booking_ranges():
+    with get_connection() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute(
+                """
+                SELECT booking_id, room_type, rooms, in_date, out_date
+                FROM bookings
+                WHERE status IN ('pending', 'confirmed') AND out_date > CURRENT_DATE
+                ORDER BY in_date, booking_id
+                """
+            )
+            return cursor.fetchall()
+        finally:
+            cursor.close()
@@ -0,0 +1,19 @@
+from configuration.settings import get_async_connection, get_connection, get_cursor
+
+CATALOG_VERSIONS_SQL = "SELECT name, version, updated_at FROM catalog_versions"
+
+
+def get_catalog_versions():
+    with get_connection() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute(CATALOG_VERSIONS_SQL)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+
+async def get_catalog_versions_async():
+    async with get_async_connection() as db:
+        cursor = await db.execute(CATALOG_VERSIONS_SQL)
+        return await cursor.fetchall()
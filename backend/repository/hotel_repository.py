@@ -1,45 +1,61 @@
-from configuration.settings import database_connection, get_cursor
+from configuration.settings import (
+    column_names,
+    get_async_connection,
+    get_async_tuple_cursor,
+    get_connection,
+    get_cursor,
+    get_tuple_cursor,
+)
 
 
 def get_all_hotels():
-    db = database_connection()
-    cursor = get_cursor(db)
-    try:
-        cursor.execute("SELECT * FROM hotels ORDER BY name")
-        return cursor.fetchall()
-    finally:
-        cursor.close()
-        db.close()
+    with get_connection() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute("SELECT * FROM hotels ORDER BY name")
+            return cursor.fetchall()
+        finally:
+            cursor.close()
 
 
 def get_hotel_by_id(hotel_id: int):
-    db = database_connection()
-    cursor = get_cursor(db)
-    try:
-        cursor.execute("SELECT * FROM hotels WHERE id = %s", (hotel_id,))
-        return cursor.fetchone()
-    finally:
-        cursor.close()
-        db.close()
+    with get_connection() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute("SELECT * FROM hotels WHERE id = %s", (hotel_id,))
+            return cursor.fetchone()
+        finally:
+            cursor.close()
+
+
+async def get_hotel_by_id_async(hotel_id: int):
+    async with get_async_connection() as db:
+        cursor = await db.execute("SELECT * FROM hotels WHERE id = %s", (hotel_id,))
+        return await cursor.fetchone()
 
 
 def get_hotel_by_slug(slug: str):
-    db = database_connection()
-    cursor = get_cursor(db)
-    try:
-        cursor.execute("SELECT * FROM hotels WHERE slug = %s", (slug,))
-        return cursor.fetchone()
-    finally:
-        cursor.close()
-        db.close()
+    with get_connection() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute("SELECT * FROM hotels WHERE slug = %s", (slug,))
+            return cursor.fetchone()
+        finally:
+            cursor.close()
 
 
 def get_all_rooms_for_hotel():
-    db = database_connection()
-    cursor = get_cursor(db)
-    try:
-        cursor.execute("SELECT * FROM rooms ORDER BY price_base ASC")
-        return cursor.fetchall()
-    finally:
-        cursor.close()
-        db.close()
+    with get_connection() as db:
+        cursor = get_tuple_cursor(db)
+        try:
+            cursor.execute("SELECT * FROM rooms ORDER BY price_base ASC")
+            return column_names(cursor), cursor.fetchall()
+        finally:
+            cursor.close()
+
+
+async def get_all_rooms_for_hotel_async():
+    async with get_async_connection() as db:
+        cursor = get_async_tuple_cursor(db)
+        await cursor.execute("SELECT * FROM rooms ORDER BY price_base ASC")
+        return column_names(cursor), await cursor.fetchall()
@@ -0,0 +1,158 @@
+from configuration.settings import get_connection, get_cursor, transaction
+
+ROOM_IMPORT_COLUMNS = (
+    "line", "room_number", "name", "type", "description", "price_base", "price_weekend",
+    "capacity", "size_sqm", "bed_type", "amenities", "floor",
+)
+
+BOOKING_IMPORT_COLUMNS = (
+    "line", "user_email", "guest_name", "phone", "guests", "room_type", "in_date", "out_date",
+    "status", "created_at", "amount", "payment_method",
+)
+
+# Staging tables are temporary and dropped at commit, so concurrent imports
+# never see each other's rows.
+ROOM_STAGING_SQL = """
+    CREATE TEMP TABLE room_import (
+        line INT NOT NULL,
+        room_number VARCHAR(10) NOT NULL,
+        name VARCHAR(200) NOT NULL,
+        type VARCHAR(50) NOT NULL,
+        description TEXT,
+        price_base NUMERIC(10,2),
+        price_weekend NUMERIC(10,2),
+        capacity INT,
+        size_sqm INT,
+        bed_type VARCHAR(100),
+        amenities TEXT[],
+        floor INT
+    ) ON COMMIT DROP
+"""
+
+ROOM_MERGE_SQL = """
+    WITH merged AS (
+        INSERT INTO rooms (room_number, name, type, description, price_base, price_weekend,
+                           capacity, size_sqm, bed_type, amenities, floor)
+        SELECT room_number, name, type, description, price_base, price_weekend,
+               capacity, size_sqm, bed_type, amenities, floor
+        FROM room_import
+        ORDER BY line
+        ON CONFLICT (room_number) DO UPDATE SET
+            name = EXCLUDED.name,
+            type = EXCLUDED.type,
+            description = EXCLUDED.description,
+            price_base = EXCLUDED.price_base,
+            price_weekend = EXCLUDED.price_weekend,
+            capacity = EXCLUDED.capacity,
+            size_sqm = EXCLUDED.size_sqm,
+            bed_type = EXCLUDED.bed_type,
+            amenities = EXCLUDED.amenities,
+            floor = EXCLUDED.floor
+        RETURNING (xmax = 0) AS inserted
+    )
+    SELECT COUNT(*) FILTER (WHERE inserted) AS inserted,
+           COUNT(*) FILTER (WHERE NOT inserted) AS updated
+    FROM merged
+"""
+
+BOOKING_STAGING_SQL = """
+    CREATE TEMP TABLE booking_import (
+        line INT NOT NULL,
+        booking_id INT,
+        user_email VARCHAR(200) NOT NULL,
+        guest_name VARCHAR(200),
+        phone VARCHAR(50),
+        guests INT,
+        room_type VARCHAR(100) NOT NULL,
+        in_date DATE NOT NULL,
+        out_date DATE NOT NULL,
+        status VARCHAR(30),
+        created_at TIMESTAMP,
+        amount NUMERIC(10,2),
+        payment_method VARCHAR(100)
+    ) ON COMMIT DROP
+"""
+
+# Re-running a legacy file must not load its stays twice. A staged row that
+# matches an existing booking for the same guest, room type and dates (and
+# created_at, when the file gives one) is dropped and reported by line.
+BOOKING_DROP_EXISTING_SQL = """
+    DELETE FROM booking_import i
+    USING bookings b
+    WHERE b.user_email = i.user_email
+      AND b.room_type = i.room_type
+      AND b.in_date = i.in_date
+      AND b.out_date = i.out_date
+      AND (i.created_at IS NULL OR b.created_at = i.created_at)
+    RETURNING i.line
+"""
+
+# Booking ids are drawn from the bookings sequence up front so payments can be
+# attached to the rows they came with.
+BOOKING_ASSIGN_IDS_SQL = (
+    "UPDATE booking_import SET booking_id = nextval(pg_get_serial_sequence('bookings', 'booking_id'))"
+)
+
+BOOKING_MERGE_SQL = """
+    INSERT INTO bookings (booking_id, user_email, guest_name, phone, guests, room_type,
+                          in_date, out_date, status, created_at)
+    SELECT booking_id, user_email, guest_name, phone, guests, room_type,
+           in_date, out_date, status, COALESCE(created_at, NOW())
+    FROM booking_import
+    ORDER BY line
+"""
+
+PAYMENT_MERGE_SQL = """
+    INSERT INTO payments (booking_id, user_email, amount, payment_method, status, created_at)
+    SELECT booking_id, user_email, amount, payment_method, 'completed', COALESCE(created_at, NOW())
+    FROM booking_import
+    WHERE amount IS NOT NULL
+    ORDER BY line
+"""
+
+
+def _copy_sql(table: str, columns: tuple[str, ...]) -> str:
+    # CSV defaults: an unquoted empty field is NULL, a quoted one is text.
+    return f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+
+
+def get_room_types() -> set[str]:
+    with get_connection() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute("SELECT DISTINCT type FROM rooms")
+            return {row["type"] for row in cursor.fetchall()}
+        finally:
+            cursor.close()
+
+
+def copy_rooms(source) -> dict:
+    with transaction() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute(ROOM_STAGING_SQL)
+            cursor.copy_expert(_copy_sql("room_import", ROOM_IMPORT_COLUMNS), source)
+            cursor.execute(ROOM_MERGE_SQL)
+            return cursor.fetchone()
+        finally:
+            cursor.close()
+
+
+def copy_bookings(source) -> dict:
+    with transaction() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute(BOOKING_STAGING_SQL)
+            cursor.copy_expert(_copy_sql("booking_import", BOOKING_IMPORT_COLUMNS), source)
+            # Concurrent imports of the same file wait here, so the second
+            # one sees the first one's rows as existing.
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext('booking_import'))")
+            cursor.execute(BOOKING_DROP_EXISTING_SQL)
+            existing = sorted(row["line"] for row in cursor.fetchall())
+            cursor.execute(BOOKING_ASSIGN_IDS_SQL)
+            cursor.execute(BOOKING_MERGE_SQL)
+            bookings = cursor.rowcount
+            cursor.execute(PAYMENT_MERGE_SQL)
+            return {"bookings": bookings, "payments": cursor.rowcount, "existing": existing}
+        finally:
+            cursor.close()
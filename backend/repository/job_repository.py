@@ -0,0 +1,154 @@
+from psycopg2.extras import Json
+
+from configuration.settings import get_connection, get_cursor, transaction
+
+# A claimed job is leased rather than held in a transaction: run_at moves
+# past the lease, so if the worker dies the job becomes due again. SKIP
+# LOCKED lets any number of workers claim from the same queue.
+CLAIM_JOBS_SQL = """
+    UPDATE jobs
+    SET attempts = attempts + 1,
+        locked_by = %(worker)s,
+        run_at = NOW() + make_interval(secs => %(lease)s)
+    WHERE id IN (
+        SELECT id FROM jobs
+        WHERE run_at <= NOW()
+        ORDER BY run_at
+        LIMIT %(limit)s
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, kind, payload, attempts, max_attempts
+"""
+
+BURY_JOB_SQL = """
+    WITH failed AS (
+        DELETE FROM jobs WHERE id = %(id)s
+        RETURNING id, kind, payload, attempts, created_at
+    )
+    INSERT INTO dead_jobs (id, kind, payload, attempts, last_error, created_at)
+    SELECT id, kind, payload, attempts, %(error)s, created_at FROM failed
+    ON CONFLICT (id) DO UPDATE
+    SET attempts = EXCLUDED.attempts, last_error = EXCLUDED.last_error, failed_at = NOW()
+"""
+
+REQUEUE_DEAD_JOB_SQL = """
+    WITH revived AS (
+        DELETE FROM dead_jobs WHERE id = %s
+        RETURNING id, kind, payload, created_at
+    )
+    INSERT INTO jobs (id, kind, payload, created_at)
+    SELECT id, kind, payload, created_at FROM revived
+    RETURNING id
+"""
+
+
+# A job with a unique_key is dropped while another with the same key is
+# still queued; returns the new id, or None when it was deduplicated.
+def enqueue_job(kind: str, payload: dict, run_at=None, max_attempts: int = 5, unique_key: str | None = None):
+    with transaction() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute(
+                """
+                INSERT INTO jobs (kind, payload, run_at, max_attempts, unique_key)
+                VALUES (%s, %s, COALESCE(%s, NOW()), %s, %s)
+                ON CONFLICT (unique_key) WHERE unique_key IS NOT NULL DO NOTHING
+                RETURNING id
+                """,
+                (kind, Json(payload), run_at, max_attempts, unique_key),
+            )
+            row = cursor.fetchone()
+            return row["id"] if row else None
+        finally:
+            cursor.close()
+
+
+def claim_jobs(worker: str, limit: int, lease_seconds: float) -> list:
+    with transaction() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute(CLAIM_JOBS_SQL, {"worker": worker, "limit": limit, "lease": lease_seconds})
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+
+def complete_job(job_id: int):
+    with transaction() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute("DELETE FROM jobs WHERE id = %s", (job_id,))
+        finally:
+            cursor.close()
+
+
+def retry_job(job_id: int, delay_seconds: float, error: str):
+    with transaction() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute(
+                """
+                UPDATE jobs
+                SET run_at = NOW() + make_interval(secs => %s), last_error = %s, locked_by = NULL
+                WHERE id = %s
+                """,
+                (delay_seconds, error, job_id),
+            )
+        finally:
+            cursor.close()
+
+
+def bury_job(job_id: int, error: str):
+    with transaction() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute(BURY_JOB_SQL, {"id": job_id, "error": error})
+        finally:
+            cursor.close()
+
+
+def requeue_dead_job(job_id: int) -> bool:
+    with transaction() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute(REQUEUE_DEAD_JOB_SQL, (job_id,))
+            return cursor.fetchone() is not None
+        finally:
+            cursor.close()
+
+
+def get_job_stats() -> dict:
+    with get_connection() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute(
+                """
+                SELECT
+                    (SELECT COUNT(*) FROM jobs WHERE run_at <= NOW()) AS due,
+                    (SELECT COUNT(*) FROM jobs WHERE run_at > NOW() AND locked_by IS NOT NULL) AS running,
+                    (SELECT COUNT(*) FROM jobs WHERE run_at > NOW() AND locked_by IS NULL) AS scheduled,
+                    (SELECT COUNT(*) FROM dead_jobs) AS dead,
+                    (SELECT EXTRACT(EPOCH FROM NOW() - MIN(run_at)) FROM jobs WHERE run_at <= NOW()) AS oldest_due_seconds
+                """
+            )
+            return cursor.fetchone()
+        finally:
+            cursor.close()
+
+
+def get_dead_jobs(limit: int = 50) -> list:
+    with get_connection() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute(
+                """
+                SELECT id, kind, payload, attempts, last_error, created_at, failed_at
+                FROM dead_jobs
+                ORDER BY failed_at DESC
+                LIMIT %s
+                """,
+                (limit,),
+            )
+            return cursor.fetchall()
+        finally:
+            cursor.close()
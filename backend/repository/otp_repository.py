@@ -1,71 +1,68 @@
-from datetime import datetime
+from configuration.settings import get_cursor, transaction
 
-from configuration.settings import database_connection, get_cursor
+# One statement per verify: a matching, live, not-locked code is consumed and
+# the account marked verified; anything else counts an attempt. Comparing
+# the MACs in SQL leaks nothing useful, as they cannot be computed without
+# the server key.
+VERIFY_CODE_SQL = """
+    WITH hit AS (
+        DELETE FROM otp_codes
+        WHERE email = %(email)s AND code_mac = %(mac)s
+          AND expires_at > NOW() AND attempts < %(max_attempts)s
+        RETURNING email
+    ),
+    miss AS (
+        UPDATE otp_codes SET attempts = attempts + 1
+        WHERE email = %(email)s AND NOT EXISTS (SELECT 1 FROM hit)
+        RETURNING attempts, expires_at <= NOW() AS expired
+    ),
+    verified AS (
+        UPDATE users SET verified = TRUE
+        WHERE email IN (SELECT email FROM hit)
+        RETURNING email
+    )
+    SELECT EXISTS (SELECT 1 FROM hit) AS matched,
+           (SELECT attempts FROM miss) AS attempts,
+           (SELECT expired FROM miss) AS expired
+"""
 
 
-def delete_otps_for_email(email: str):
-    db = database_connection()
-    cursor = get_cursor(db)
-    try:
-        cursor.execute("DELETE FROM email_otps WHERE email = %s", (email,))
-        db.commit()
-    except Exception:
-        db.rollback()
-        raise
-    finally:
-        cursor.close()
-        db.close()
+# Saving the code that is already stored (a re-run email job) leaves its
+# expiry and attempt count alone.
+def save_code(email: str, code_mac: str, ttl_seconds: float):
+    with transaction() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute(
+                """
+                INSERT INTO otp_codes (email, code_mac, expires_at)
+                VALUES (%s, %s, NOW() + make_interval(secs => %s))
+                ON CONFLICT (email) DO UPDATE
+                SET code_mac = EXCLUDED.code_mac, expires_at = EXCLUDED.expires_at,
+                    attempts = 0, created_at = NOW()
+                WHERE otp_codes.code_mac <> EXCLUDED.code_mac
+                """,
+                (email, code_mac, ttl_seconds),
+            )
+        finally:
+            cursor.close()
 
 
-def save_otp(email: str, otp_hash: str, expires_at: datetime):
-    db = database_connection()
-    cursor = get_cursor(db)
-    try:
-        cursor.execute(
-            """
-            INSERT INTO email_otps (email, otp_hash, expires_at, used, created_at)
-            VALUES (%s, %s, %s, %s, NOW())
-            """,
-            (email, otp_hash, expires_at, False),
-        )
-        db.commit()
-    except Exception:
-        db.rollback()
-        raise
-    finally:
-        cursor.close()
-        db.close()
+def verify_code(email: str, code_mac: str, max_attempts: int) -> dict:
+    with transaction() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute(VERIFY_CODE_SQL, {"email": email, "mac": code_mac, "max_attempts": max_attempts})
+            return cursor.fetchone()
+        finally:
+            cursor.close()
 
 
-def get_latest_otp(email: str):
-    db = database_connection()
-    cursor = get_cursor(db)
-    try:
-        cursor.execute(
-            """
-            SELECT id, otp_hash, expires_at, used, created_at
-            FROM email_otps
-            WHERE email = %s
-            ORDER BY created_at DESC
-            LIMIT 1
-            """,
-            (email,),
-        )
-        return cursor.fetchone()
-    finally:
-        cursor.close()
-        db.close()
-
-
-def mark_otp_used(otp_id: int):
-    db = database_connection()
-    cursor = get_cursor(db)
-    try:
-        cursor.execute("UPDATE email_otps SET used = TRUE WHERE id = %s", (otp_id,))
-        db.commit()
-    except Exception:
-        db.rollback()
-        raise
-    finally:
-        cursor.close()
-        db.close()
+def purge_expired_codes() -> int:
+    with transaction() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute("DELETE FROM otp_codes WHERE expires_at <= NOW()")
+            return cursor.rowcount
+        finally:
+            cursor.close()
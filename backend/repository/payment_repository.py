@@ -1,24 +1,19 @@
-from configuration.settings import database_connection, get_cursor
+from configuration.settings import get_cursor, transaction
 
 
 def create_payment(booking_id, user_email: str, amount: float, payment_method: str, status: str):
-    db = database_connection()
-    cursor = get_cursor(db)
-    try:
-        cursor.execute(
-            """
-            INSERT INTO payments (booking_id, user_email, amount, payment_method, status, created_at)
-            VALUES (%s, %s, %s, %s, %s, NOW())
-            RETURNING payment_id, booking_id, user_email, amount, payment_method, status, created_at
-            """,
-            (booking_id, user_email, amount, payment_method, status),
-        )
-        payment = cursor.fetchone()
-        db.commit()
-        return payment
-    except Exception:
-        db.rollback()
-        raise
-    finally:
-        cursor.close()
-        db.close()
+    with transaction() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute(
+                """
+                INSERT INTO payments (booking_id, user_email, amount, payment_method, status, created_at)
+                VALUES (%s, %s, %s, %s, %s, NOW())
+                RETURNING payment_id, booking_id, user_email, amount, payment_method, status, created_at
+                """,
+                (booking_id, user_email, amount, payment_method, status),
+            )
+            payment = cursor.fetchone()
+            return payment
+        finally:
+            cursor.close()
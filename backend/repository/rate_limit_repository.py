@@ -0,0 +1,116 @@
+from contextlib import contextmanager
+
+from configuration.settings import get_cursor, get_pool
+
+# Fixed-window hit: an expired row starts a new window.
+INCR_SQL = """
+    INSERT INTO rate_limits AS r (key, hits, expires_at)
+    VALUES (%(key)s, %(amount)s, NOW() + make_interval(secs => %(expiry)s))
+    ON CONFLICT (key) DO UPDATE
+    SET hits = CASE WHEN r.expires_at <= NOW() THEN EXCLUDED.hits ELSE r.hits + EXCLUDED.hits END,
+        expires_at = CASE WHEN r.expires_at <= NOW() THEN EXCLUDED.expires_at ELSE r.expires_at END
+    RETURNING hits
+"""
+
+# Removes at most %(limit)s rows per call so compaction never holds many
+# row locks at once.
+COMPACT_SQL = """
+    DELETE FROM rate_limits
+    WHERE key IN (
+        SELECT key FROM rate_limits
+        WHERE expires_at <= NOW()
+        LIMIT %(limit)s
+        FOR UPDATE SKIP LOCKED
+    )
+"""
+
+
+# Limiter counters always commit on their own connection. Going through
+# transaction() would join the request's unit of work, and a request that
+# fails (a wrong password, say) would roll its own hit back.
+@contextmanager
+def _connection():
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        cursor = get_cursor(conn)
+        try:
+            yield cursor
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    finally:
+        pool.putconn(conn)
+
+
+def acquire_window_entry(current_key: str, previous_key: str, previous_weight: float,
+                         amount: int, limit: int, ttl_seconds: float) -> bool:
+    with _connection() as cursor:
+        cursor.execute(
+            "SELECT rate_limit_acquire(%s, %s, %s, %s, %s, %s) AS acquired",
+            (current_key, previous_key, previous_weight, amount, limit, ttl_seconds),
+        )
+        return cursor.fetchone()["acquired"]
+
+
+def get_window(previous_key: str, current_key: str) -> dict:
+    with _connection() as cursor:
+        cursor.execute(
+            """
+            SELECT
+                COALESCE(SUM(hits) FILTER (WHERE key = %(previous)s), 0) AS previous_count,
+                COALESCE(SUM(hits) FILTER (WHERE key = %(current)s), 0) AS current_count
+            FROM rate_limits
+            WHERE key IN (%(previous)s, %(current)s) AND expires_at > NOW()
+            """,
+            {"previous": previous_key, "current": current_key},
+        )
+        return cursor.fetchone()
+
+
+def incr(key: str, expiry: float, amount: int = 1) -> int:
+    with _connection() as cursor:
+        cursor.execute(INCR_SQL, {"key": key, "amount": amount, "expiry": expiry})
+        return cursor.fetchone()["hits"]
+
+
+def get_hits(key: str) -> int:
+    with _connection() as cursor:
+        cursor.execute("SELECT hits FROM rate_limits WHERE key = %s AND expires_at > NOW()", (key,))
+        row = cursor.fetchone()
+        return row["hits"] if row else 0
+
+
+def get_expiry(key: str) -> float | None:
+    with _connection() as cursor:
+        cursor.execute(
+            "SELECT EXTRACT(EPOCH FROM expires_at) AS expires_at FROM rate_limits WHERE key = %s AND expires_at > NOW()",
+            (key,),
+        )
+        row = cursor.fetchone()
+        return float(row["expires_at"]) if row else None
+
+
+def clear(*keys: str):
+    with _connection() as cursor:
+        cursor.execute("DELETE FROM rate_limits WHERE key = ANY(%s)", (list(keys),))
+
+
+def reset() -> int:
+    with _connection() as cursor:
+        cursor.execute("DELETE FROM rate_limits")
+        return cursor.rowcount
+
+
+def compact(limit: int) -> int:
+    with _connection() as cursor:
+        cursor.execute(COMPACT_SQL, {"limit": limit})
+        return cursor.rowcount
+
+
+def ping():
+    with _connection() as cursor:
+        cursor.execute("SELECT 1")
@@ -1,99 +1,135 @@
-from configuration.settings import database_connection, get_cursor
-
-
-def get_all_rooms(type_filter: str = "", min_price: float = 0, max_price: float = 99999, amenity: str = ""):
-    db = database_connection()
-    cursor = get_cursor(db)
-    conditions = []
-    params = []
-    if type_filter:
-        conditions.append("type = %s")
-        params.append(type_filter)
-    if min_price > 0:
-        conditions.append("price_base >= %s")
-        params.append(min_price)
-    if max_price < 99999:
-        conditions.append("price_base <= %s")
-        params.append(max_price)
-    if amenity:
-        conditions.append("%s = ANY(amenities)")
-        params.append(amenity)
-    where = ""
-    if conditions:
-        where = "WHERE " + " AND ".join(conditions)
-    try:
-        cursor.execute(f"SELECT * FROM rooms {where} ORDER BY price_base ASC", tuple(params))
-        return cursor.fetchall()
-    finally:
-        cursor.close()
-        db.close()
+from configuration.settings import (
+    column_names,
+    get_async_connection,
+    get_async_tuple_cursor,
+    get_connection,
+    get_cursor,
+    get_tuple_cursor,
+    transaction,
+)
+
+
+def get_all_rooms():
+    with get_connection() as db:
+        cursor = get_tuple_cursor(db)
+        try:
+            cursor.execute("SELECT * FROM rooms ORDER BY price_base ASC")
+            return column_names(cursor), cursor.fetchall()
+        finally:
+            cursor.close()
+
+
+async def get_all_rooms_async():
+    async with get_async_connection() as db:
+        cursor = get_async_tuple_cursor(db)
+        await cursor.execute("SELECT * FROM rooms ORDER BY price_base ASC")
+        return column_names(cursor), await cursor.fetchall()
 
 
 def get_room_by_id(room_id: int):
-    db = database_connection()
-    cursor = get_cursor(db)
-    try:
-        cursor.execute("SELECT * FROM rooms WHERE id = %s", (room_id,))
-        return cursor.fetchone()
-    finally:
-        cursor.close()
-        db.close()
+    with get_connection() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute("SELECT * FROM rooms WHERE id = %s", (room_id,))
+            return cursor.fetchone()
+        finally:
+            cursor.close()
+
+
+async def get_room_by_id_async(room_id: int):
+    async with get_async_connection() as db:
+        cursor = await db.execute("SELECT * FROM rooms WHERE id = %s", (room_id,))
+        return await cursor.fetchone()
 
 
 def create_room(data: dict):
-    db = database_connection()
-    cursor = get_cursor(db)
-    try:
-        cursor.execute(
-            """INSERT INTO rooms (room_number, name, type, description, price_base, price_weekend,
-               capacity, size_sqm, bed_type, amenities, floor)
-               VALUES (%(room_number)s, %(name)s, %(type)s, %(description)s, %(price_base)s,
-               %(price_weekend)s, %(capacity)s, %(size_sqm)s, %(bed_type)s, %(amenities)s, %(floor)s)
-               RETURNING *""",
-            data,
-        )
-        db.commit()
-        return cursor.fetchone()
-    except Exception:
-        db.rollback()
-        raise
-    finally:
-        cursor.close()
-        db.close()
+    with transaction() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute(
+                """INSERT INTO rooms (room_number, name, type, description, price_base, price_weekend,
+                   capacity, size_sqm, bed_type, amenities, floor)
+                   VALUES (%(room_number)s, %(name)s, %(type)s, %(description)s, %(price_base)s,
+                   %(price_weekend)s, %(capacity)s, %(size_sqm)s, %(bed_type)s, %(amenities)s, %(floor)s)
+                   RETURNING *""",
+                data,
+            )
+            return cursor.fetchone()
+        finally:
+            cursor.close()
 
 
 def update_room_status(room_id: int, status: str):
-    db = database_connection()
-    cursor = get_cursor(db)
-    try:
-        cursor.execute(
-            "UPDATE rooms SET status = %s WHERE id = %s RETURNING *",
-            (status, room_id),
-        )
-        db.commit()
-        return cursor.fetchone()
-    except Exception:
-        db.rollback()
-        raise
-    finally:
-        cursor.close()
-        db.close()
+    with transaction() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute(
+                "UPDATE rooms SET status = %s WHERE id = %s RETURNING *",
+                (status, room_id),
+            )
+            return cursor.fetchone()
+        finally:
+            cursor.close()
 
 
 def get_room_stats():
-    db = database_connection()
-    cursor = get_cursor(db)
-    try:
-        cursor.execute("""
-            SELECT
-                COUNT(*) AS total,
-                COUNT(*) FILTER (WHERE status = 'available') AS available,
-                COUNT(*) FILTER (WHERE status = 'occupied') AS occupied,
-                COUNT(*) FILTER (WHERE status = 'maintenance') AS maintenance,
-                COALESCE(AVG(price_base), 0) AS avg_price
-            FROM rooms
-        """)
-        return cursor.fetchone()
-    finally:
-        cursor.close()
-        db.close()
+    with get_connection() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute("""
+                SELECT
+                    COUNT(*) AS total,
+                    COUNT(*) FILTER (WHERE status = 'available') AS available,
+                    COUNT(*) FILTER (WHERE status = 'occupied') AS occupied,
+                    COUNT(*) FILTER (WHERE status = 'maintenance') AS maintenance,
+                    COALESCE(AVG(price_base), 0) AS avg_price
+                FROM rooms
+            """)
+            return cursor.fetchone()
+        finally:
+            cursor.close()
+
+
+def get_sellable_room_counts():
+    with get_connection() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute(
+                """
+                SELECT type, COUNT(*) AS sellable
+                FROM rooms
+                WHERE status <> 'maintenance'
+                GROUP BY type
+                """
+            )
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+
+def get_room_inventory():
+    with get_connection() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute("SELECT id, room_number, type, status FROM rooms ORDER BY type, room_number")
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+
+# Both rates of each type come from its cheapest room (by base rate).
+def get_room_type_rates():
+    with get_connection() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute(
+                """
+                SELECT DISTINCT ON (type) type, price_base, NULLIF(price_weekend, 0) AS price_weekend
+                FROM rooms
+                WHERE status <> 'maintenance'
+                ORDER BY type, price_base, price_weekend
+                """
+            )
+            return cursor.fetchall()
+        finally:
+            cursor.close()
@@ -0,0 +1,161 @@
+from configuration.settings import get_connection, get_cursor, get_pool, transaction
+
+COUNTER_COLUMNS = (
+    "bookings_total", "bookings_confirmed", "bookings_pending", "bookings_cancelled", "revenue_total",
+    "rooms_total", "rooms_available", "rooms_occupied", "rooms_maintenance", "room_price_sum", "admins_total",
+)
+
+# What the triggers on bookings, payments, rooms and users keep
+# dashboard_counters plus its pending deltas equal to.
+LIVE_COUNTERS_SQL = """
+    SELECT b.total AS bookings_total, b.confirmed AS bookings_confirmed,
+           b.pending AS bookings_pending, b.cancelled AS bookings_cancelled,
+           p.revenue AS revenue_total,
+           r.total AS rooms_total, r.available AS rooms_available, r.occupied AS rooms_occupied,
+           r.maintenance AS rooms_maintenance, r.price_sum AS room_price_sum,
+           u.admins AS admins_total
+    FROM (
+        SELECT COUNT(*) AS total,
+               COUNT(*) FILTER (WHERE status = 'confirmed') AS confirmed,
+               COUNT(*) FILTER (WHERE status = 'pending') AS pending,
+               COUNT(*) FILTER (WHERE status = 'cancelled') AS cancelled
+        FROM bookings
+    ) b,
+    (SELECT COALESCE(SUM(amount), 0) AS revenue FROM payments WHERE booking_id IS NOT NULL) p,
+    (
+        SELECT COUNT(*) AS total,
+               COUNT(*) FILTER (WHERE status = 'available') AS available,
+               COUNT(*) FILTER (WHERE status = 'occupied') AS occupied,
+               COUNT(*) FILTER (WHERE status = 'maintenance') AS maintenance,
+               COALESCE(SUM(price_base), 0) AS price_sum
+        FROM rooms
+    ) r,
+    (SELECT COUNT(*) AS admins FROM users WHERE role = 'admin') u
+"""
+
+MONEY_COLUMNS = ("revenue_total", "room_price_sum")
+
+
+def _cast(column: str, expression: str) -> str:
+    return f"({expression})::{'NUMERIC(14,2)' if column in MONEY_COLUMNS else 'BIGINT'} AS {column}"
+
+
+# The counter row plus the deltas the triggers appended since the last fold.
+COUNTERS_SQL = f"""
+    SELECT c.id,
+           {", ".join(_cast(column, f"c.{column} + COALESCE(d.{column}, 0)") for column in COUNTER_COLUMNS)},
+           GREATEST(c.updated_at, d.updated_at) AS updated_at, c.reconciled_at
+    FROM dashboard_counters c,
+    (
+        SELECT {", ".join(f"SUM({column}) AS {column}" for column in COUNTER_COLUMNS)},
+               MAX(created_at) AS updated_at
+        FROM dashboard_counter_deltas
+    ) d
+    WHERE c.id = 1
+"""
+
+# Moves every committed delta into the counter row. Deltas committed while it
+# runs are left for the next fold; only the counter row is locked.
+FOLD_COUNTERS_SQL = f"""
+    WITH moved AS (
+        DELETE FROM dashboard_counter_deltas
+        WHERE EXISTS (SELECT 1 FROM dashboard_counters WHERE id = 1)
+        RETURNING *
+    ),
+    total AS (
+        SELECT {", ".join(f"COALESCE(SUM({column}), 0) AS {column}" for column in COUNTER_COLUMNS)},
+               COUNT(*) AS folded
+        FROM moved
+    )
+    UPDATE dashboard_counters c
+    SET {", ".join(f"{column} = c.{column} + total.{column}" for column in COUNTER_COLUMNS)},
+        updated_at = NOW()
+    FROM total
+    WHERE c.id = 1
+    RETURNING total.folded
+"""
+
+CORRECTION_SQL = f"""
+    INSERT INTO dashboard_counter_deltas ({", ".join(COUNTER_COLUMNS)})
+    VALUES ({", ".join(f"%({column})s" for column in COUNTER_COLUMNS)})
+"""
+
+INIT_COUNTERS_SQL = f"""
+    INSERT INTO dashboard_counters (id, {", ".join(COUNTER_COLUMNS)}, reconciled_at)
+    SELECT 1, live.*, NOW() FROM ({LIVE_COUNTERS_SQL}) live
+    ON CONFLICT (id) DO NOTHING
+"""
+
+
+def get_dashboard_counters():
+    with get_connection() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute(COUNTERS_SQL)
+            return cursor.fetchone()
+        finally:
+            cursor.close()
+
+
+def compute_dashboard_counters():
+    with get_connection() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute(LIVE_COUNTERS_SQL)
+            return cursor.fetchone()
+        finally:
+            cursor.close()
+
+
+def fold_dashboard_counters() -> int:
+    with transaction() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute(FOLD_COUNTERS_SQL)
+            row = cursor.fetchone()
+            return row["folded"] if row else 0
+        finally:
+            cursor.close()
+
+
+# Counters and live totals are read from one REPEATABLE READ snapshot, in
+# which every committed write and the delta its trigger appended are either
+# both visible or both not. The difference goes in as one more delta, so no
+# table is locked and concurrent writes keep their own deltas. Runs on its
+# own connection: the isolation level has to be set before any other
+# statement of the transaction.
+def reconcile_dashboard_counters():
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        cursor = get_cursor(conn)
+        try:
+            cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+            cursor.execute(COUNTERS_SQL)
+            before = cursor.fetchone()
+            if before is None:
+                cursor.execute(INIT_COUNTERS_SQL)
+                cursor.execute(LIVE_COUNTERS_SQL)
+                after = cursor.fetchone()
+            else:
+                cursor.execute(LIVE_COUNTERS_SQL)
+                after = cursor.fetchone()
+                correction = {column: after[column] - before[column] for column in COUNTER_COLUMNS}
+                if any(correction.values()):
+                    cursor.execute(CORRECTION_SQL, correction)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    finally:
+        pool.putconn(conn)
+
+    with transaction() as db:
+        cursor = get_cursor(db)
+        try:
+            cursor.execute("UPDATE dashboard_counters SET reconciled_at = NOW() WHERE id = 1 RETURNING reconciled_at")
+            return before, {**after, **cursor.fetchone()}
+        finally:
+            cursor.close()
@@ -1,12 +1,42 @@
-from fastapi import APIRouter, Query, Request, status
+import tempfile
+from datetime import date
 
-from dependencies import require_role
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from configuration.settings import DB_ASYNC_ENABLED, UnitOfWork
+from dependencies import request_unit_of_work, require_role
 from models.schemas import BookingStatusUpdate, CreateAdmin, DeleteAdmin, RoomCreate, RoomStatusUpdate
-from service import admin_dashboard_service, admin_service, room_service
+from service import (
+    admin_dashboard_service,
+    admin_service,
+    analytics_service,
+    export_service,
+    import_service,
+    occupancy_service,
+    room_service,
+)
+from utility.json_response import json_response
 
 router = APIRouter(tags=["admin"])
 
 
+async def _spool_body(request: Request):
+    # The upload is copied to a spooled temp file as it arrives, so a large
+    # import never sits in memory; parsing happens in the threadpool after.
+    body = tempfile.SpooledTemporaryFile(max_size=import_service.IMPORT_SPOOL_BYTES)
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > import_service.IMPORT_MAX_BYTES:
+            body.close()
+            raise HTTPException(status_code=413, detail={"message": "Import file is too large"})
+        body.write(chunk)
+    body.seek(0)
+    return body
+
+
 @router.post("/superadmin/create_admin", status_code=status.HTTP_201_CREATED)
 def create_admin(data: CreateAdmin, request: Request):
     require_role(request, ["superadmin"])
@@ -31,14 +61,51 @@ def dashboard_stats(request: Request):
     return admin_dashboard_service.get_dashboard_stats()
 
 
+@router.post("/admin/dashboard/stats/reconcile")
+def dashboard_stats_reconcile(request: Request):
+    require_role(request, ["admin", "superadmin"])
+    return admin_dashboard_service.reconcile_dashboard_counters()
+
+
 @router.get("/admin/bookings")
-def admin_list_bookings(request: Request):
+async def admin_list_bookings(request: Request):
     require_role(request, ["admin", "superadmin"])
-    return admin_dashboard_service.get_all_bookings()
+    if DB_ASYNC_ENABLED:
+        return json_response(await admin_dashboard_service.get_all_bookings_async())
+    return json_response(await run_in_threadpool(admin_dashboard_service.get_all_bookings))
+
+
+@router.get("/admin/bookings/export")
+def admin_export_bookings(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson)$", description="csv or ndjson"),
+    start: date | None = Query(None, alias="from", description="First booking date, inclusive"),
+    end: date | None = Query(None, alias="to", description="Last booking date, inclusive"),
+    gzip: bool = Query(False, description="Send the stream gzip-encoded"),
+):
+    require_role(request, ["admin", "superadmin"])
+    chunks, media_type, headers = export_service.export_bookings(format, start, end, gzip)
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
+
+@router.post("/admin/bookings/import")
+async def admin_import_bookings(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson)$", description="csv or ndjson"),
+    dry_run: bool = Query(False, description="Validate only, load nothing"),
+):
+    require_role(request, ["admin", "superadmin"])
+    with await _spool_body(request) as body:
+        return await run_in_threadpool(import_service.import_bookings, body, format, dry_run)
 
 
 @router.patch("/admin/bookings/{booking_id}/status")
-def admin_update_booking_status(booking_id: str, data: BookingStatusUpdate, request: Request):
+def admin_update_booking_status(
+    booking_id: str,
+    data: BookingStatusUpdate,
+    request: Request,
+    _uow: UnitOfWork = Depends(request_unit_of_work, scope="function"),
+):
     require_role(request, ["admin", "superadmin"])
     return admin_dashboard_service.update_booking_status(booking_id, data.status)
 
@@ -55,6 +122,17 @@ def admin_create_room(data: RoomCreate, request: Request):
     return room_service.create_new_room(data)
 
 
+@router.post("/admin/rooms/import")
+async def admin_import_rooms(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson)$", description="csv or ndjson"),
+    dry_run: bool = Query(False, description="Validate only, load nothing"),
+):
+    require_role(request, ["admin", "superadmin"])
+    with await _spool_body(request) as body:
+        return await run_in_threadpool(import_service.import_rooms, body, format, dry_run)
+
+
 @router.patch("/admin/rooms/{room_id}/status")
 def admin_update_room_status(room_id: int, data: RoomStatusUpdate, request: Request):
     require_role(request, ["admin", "superadmin"])
@@ -65,3 +143,59 @@ def admin_update_room_status(room_id: int, data: RoomStatusUpdate, request: Requ
 def admin_room_stats(request: Request):
     require_role(request, ["admin", "superadmin"])
     return room_service.room_stats()
+
+
+@router.get("/admin/occupancy")
+def admin_occupancy(
+    request: Request,
+    days: int = Query(30, ge=1, le=366, description="Number of nights from today"),
+    room_type: str = Query("", description="Restrict to one room type"),
+):
+    require_role(request, ["admin", "superadmin"])
+    return occupancy_service.occupancy_report(days, room_type)
+
+
+@router.get("/admin/occupancy/free-rooms")
+def admin_free_rooms(
+    request: Request,
+    in_date: date = Query(...),
+    out_date: date = Query(...),
+    room_type: str = Query(""),
+):
+    require_role(request, ["admin", "superadmin"])
+    return occupancy_service.free_rooms_report(in_date, out_date, room_type)
+
+
+@router.get("/admin/occupancy/pickup")
+def admin_occupancy_pickup(
+    request: Request,
+    in_date: date = Query(..., alias="from"),
+    out_date: date = Query(..., alias="to"),
+):
+    require_role(request, ["admin", "superadmin"])
+    return occupancy_service.pickup_report(in_date, out_date)
+
+
+@router.post("/admin/occupancy/rebuild")
+def admin_rebuild_occupancy(request: Request):
+    require_role(request, ["admin", "superadmin"])
+    return occupancy_service.rebuild_report()
+
+
+@router.get("/admin/analytics/timeseries")
+def admin_analytics_timeseries(
+    request: Request,
+    start: date = Query(..., alias="from"),
+    end: date = Query(..., alias="to"),
+    metric: str = Query("all", description="One metric, a comma-separated list, or all"),
+    bucket: str = Query("day", description="day, week or month"),
+    room_type: str = Query("", description="Restrict to one room type"),
+):
+    require_role(request, ["admin", "superadmin"])
+    return analytics_service.timeseries(metric, bucket, start, end, room_type)
+
+
+@router.post("/admin/analytics/refresh")
+def admin_analytics_refresh(request: Request):
+    require_role(request, ["admin", "superadmin"])
+    return analytics_service.refresh_report()
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Request, Response, status
+from fastapi import APIRouter, Depends, Request, Response, status
 
-from main import limiter
+from configuration.rate_limit import cost_limit, limiter, login_limit, remember_login_target
 from models.schemas import AdminLogin, StaffLogin, UserLogin, UserSignup
 from service import auth_service
 
@@ -9,24 +9,28 @@ router = APIRouter(tags=["auth"])
 
 @router.post("/signup", status_code=status.HTTP_201_CREATED)
 @limiter.limit("5/minute")
+@cost_limit
 def signup(data: UserSignup, request: Request, response: Response):
     return auth_service.signup(data, request, response)
 
 
-@router.post("/login")
+@router.post("/login", dependencies=[Depends(remember_login_target)])
 @limiter.limit("10/minute")
+@login_limit
 def login(data: UserLogin, request: Request, response: Response):
     return auth_service.login(data, request, response)
 
 
-@router.post("/stafflogin")
+@router.post("/stafflogin", dependencies=[Depends(remember_login_target)])
 @limiter.limit("10/minute")
+@login_limit
 def staff_login(data: StaffLogin, request: Request, response: Response):
     return auth_service.staff_login(data, request, response)
 
 
-@router.post("/adminlogin")
+@router.post("/adminlogin", dependencies=[Depends(remember_login_target)])
 @limiter.limit("10/minute")
+@login_limit
 def admin_login(data: AdminLogin, request: Request, response: Response):
     return auth_service.admin_login(data, request, response)
 
@@ -43,5 +47,6 @@ def me(request: Request):
 
 @router.post("/refresh")
 @limiter.limit("10/minute")
+@cost_limit
 def refresh(request: Request, response: Response):
     return auth_service.refresh_token(request, response)
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 
-from dependencies import get_current_user_payload
+from configuration.settings import UnitOfWork
+from dependencies import get_current_user_payload, request_unit_of_work
 from models.schemas import BookingCreate, CancelBooking
 from service import booking_service
 
@@ -8,7 +9,11 @@ router = APIRouter(tags=["bookings"])
 
 
 @router.post("/bookings")
-def create_booking(data: BookingCreate, request: Request):
+def create_booking(
+    data: BookingCreate,
+    request: Request,
+    _uow: UnitOfWork = Depends(request_unit_of_work, scope="function"),
+):
     decoded = get_current_user_payload(request)
     email = decoded.get("email")
     if not email:
@@ -17,7 +22,11 @@ def create_booking(data: BookingCreate, request: Request):
 
 
 @router.post("/cancelbooking")
-def cancel_booking(data: CancelBooking, request: Request):
+def cancel_booking(
+    data: CancelBooking,
+    request: Request,
+    _uow: UnitOfWork = Depends(request_unit_of_work, scope="function"),
+):
     decoded = get_current_user_payload(request)
     return booking_service.cancel_user_booking(
         decoded.get("email"),
@@ -1,10 +1,16 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Response
+from starlette.concurrency import run_in_threadpool
 
+from configuration.settings import DB_ASYNC_ENABLED
+from dependencies import catalog_cache
 from service import hotel_service
+from utility.json_response import json_response
 
 router = APIRouter(tags=["hotels"])
 
 
-@router.get("/hotels/{hotel_id}")
-def get_hotel(hotel_id: int):
-    return hotel_service.get_hotel_detail(hotel_id)
+@router.get("/hotels/{hotel_id}", dependencies=[Depends(catalog_cache("hotels", "rooms"))])
+async def get_hotel(hotel_id: int, response: Response):
+    if DB_ASYNC_ENABLED:
+        return json_response(await hotel_service.get_hotel_detail_async(hotel_id), response)
+    return json_response(await run_in_threadpool(hotel_service.get_hotel_detail, hotel_id), response)
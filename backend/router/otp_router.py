@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Request
 
-from main import limiter
+from configuration.rate_limit import cost_limit, limiter
 from models.schemas import OTPRequest, OTPVerify
 from service import otp_service
 
@@ -9,11 +9,13 @@ router = APIRouter(tags=["otp"])
 
 @router.post("/send-otp")
 @limiter.limit("3/minute")
+@cost_limit
 def send_otp(data: OTPRequest, request: Request):
     return otp_service.send_otp(data)
 
 
 @router.post("/verify-otp")
 @limiter.limit("5/minute")
+@cost_limit
 def verify_otp(data: OTPVerify, request: Request):
     return otp_service.verify_otp_code(data)
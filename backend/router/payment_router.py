@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Request, Response, status
+from fastapi import APIRouter, Depends, Request, Response, status
 
-from dependencies import require_role
+from configuration.settings import UnitOfWork
+from dependencies import request_unit_of_work, require_role
 from models.schemas import PaymentRequest
 from service import payment_service
 
@@ -8,6 +9,10 @@ router = APIRouter(tags=["payments"])
 
 
 @router.post("/payments", status_code=status.HTTP_201_CREATED)
-def payments(data: PaymentRequest, request: Request):
+def payments(
+    data: PaymentRequest,
+    request: Request,
+    _uow: UnitOfWork = Depends(request_unit_of_work, scope="function"),
+):
     decoded = require_role(request, ["user", "admin", "superadmin"])
     return payment_service.process_payment(decoded.get("email"), data)
@@ -1,20 +1,68 @@
-from fastapi import APIRouter, Query
+from datetime import date
 
-from service import room_service
+from fastapi import APIRouter, Depends, Query, Response
+from starlette.concurrency import run_in_threadpool
+
+from configuration.settings import DB_ASYNC_ENABLED
+from dependencies import catalog_cache
+from service import availability_service, pricing_service, room_service
+from utility.json_response import json_response
 
 router = APIRouter(tags=["rooms"])
 
 
-@router.get("/rooms")
-def list_rooms(
+def _room_query(
     type: str = Query("", description="Filter by room type"),
     min_price: float = Query(0, description="Minimum price"),
     max_price: float = Query(99999, description="Maximum price"),
-    amenity: str = Query("", description="Filter by amenity"),
+    amenity: list[str] = Query([], description="Filter by amenity, repeat to require several"),
+    min_capacity: int = Query(0, ge=0, description="Minimum guests"),
+    floor: int | None = Query(None, description="Filter by floor"),
+    sort: str = Query("price_asc", description="price_asc, price_desc, capacity_desc, rating_desc or room_number"),
+):
+    return dict(
+        type_filter=type, min_price=min_price, max_price=max_price, amenities=amenity,
+        min_capacity=min_capacity, floor=floor, sort=sort,
+    )
+
+
+async def _list_rooms(query: dict, with_facets: bool):
+    if DB_ASYNC_ENABLED:
+        return await room_service.list_rooms_async(**query, with_facets=with_facets)
+    return await run_in_threadpool(room_service.list_rooms, **query, with_facets=with_facets)
+
+
+@router.get("/rooms", dependencies=[Depends(catalog_cache("rooms"))])
+async def list_rooms(response: Response, query: dict = Depends(_room_query)):
+    return json_response(await _list_rooms(query, with_facets=False), response)
+
+
+@router.get("/rooms/search", dependencies=[Depends(catalog_cache("rooms"))])
+async def search_rooms(response: Response, query: dict = Depends(_room_query)):
+    return json_response(await _list_rooms(query, with_facets=True), response)
+
+
+@router.get("/rooms/availability")
+async def room_availability(
+    in_date: date = Query(..., description="Check-in date"),
+    out_date: date = Query(..., description="Check-out date"),
+    room_type: str = Query("", description="Room type, all types when empty"),
+):
+    return await run_in_threadpool(availability_service.check_availability, room_type, in_date, out_date)
+
+
+@router.get("/rooms/quote")
+async def room_quote(
+    in_date: date = Query(..., description="Check-in date"),
+    out_date: date = Query(..., description="Check-out date"),
+    room_type: str = Query("", description="Room type, all types when empty"),
+    rooms: int = Query(1, ge=1, description="Number of rooms"),
 ):
-    return room_service.list_rooms(type_filter=type, min_price=min_price, max_price=max_price, amenity=amenity)
+    return await run_in_threadpool(pricing_service.get_quote, room_type, in_date, out_date, rooms)
 
 
-@router.get("/rooms/{room_id}")
-def get_room(room_id: int):
-    return room_service.get_room(room_id)
+@router.get("/rooms/{room_id}", dependencies=[Depends(catalog_cache("rooms"))])
+async def get_room(room_id: int):
+    if DB_ASYNC_ENABLED:
+        return await room_service.get_room_async(room_id)
+    return await run_in_threadpool(room_service.get_room, room_id)
@@ -3,6 +3,7 @@ from fastapi import APIRouter, Request
 from dependencies import require_role, get_current_user_payload
 from models.schemas import ChecklistToggle, ClockInOut, TaskCreate, TaskStatusUpdate
 from service import staff_service
+from utility.json_response import json_response
 
 router = APIRouter(tags=["staff"])
 
@@ -15,7 +16,7 @@ def _get_email(request: Request) -> str:
 @router.get("/staff/tasks")
 def staff_tasks(request: Request):
     require_role(request, ["staff", "admin"])
-    return staff_service.list_tasks(assigned_to=_get_email(request))
+    return json_response(staff_service.list_tasks(assigned_to=_get_email(request)))
 
 
 @router.post("/staff/tasks")
@@ -1,5 +1,8 @@
 from fastapi import APIRouter, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
 
+from configuration.rate_limit import cost_limit
+from configuration.settings import DB_ASYNC_ENABLED
 from dependencies import get_current_user_payload
 from models.schemas import ProfileUpdate
 from service import user_service
@@ -21,15 +24,20 @@ def user_details(request: Request):
 
 
 @router.post("/change-password")
+@cost_limit
 def change_password(data: ProfileUpdate, request: Request):
     return user_service.update_profile(_get_email(request), data)
 
 
 @router.post("/change-profile")
+@cost_limit
 def change_profile(data: ProfileUpdate, request: Request):
     return user_service.update_profile(_get_email(request), data)
 
 
 @router.get("/user/history")
-def user_history(request: Request):
-    return user_service.get_history(_get_email(request))
+async def user_history(request: Request):
+    email = _get_email(request)
+    if DB_ASYNC_ENABLED:
+        return await user_service.get_history_async(email)
+    return await run_in_threadpool(user_service.get_history, email)
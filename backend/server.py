@@ -0,0 +1,64 @@
+import argparse
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Production entry point: uvicorn's supervisor with WEB_CONCURRENCY worker
+# processes on one shared socket, uvloop and httptools. SIGTERM stops
+# accepting connections and gives in-flight requests SHUTDOWN_GRACE_SECONDS
+# before each worker runs its lifespan shutdown. A worker only accepts
+# connections once its lifespan warm-up has finished.
+#   python server.py --workers 4
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", 5000))
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+SHUTDOWN_GRACE_SECONDS = int(os.getenv("SHUTDOWN_GRACE_SECONDS", 30))
+KEEPALIVE_SECONDS = int(os.getenv("KEEPALIVE_SECONDS", 5))
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+def preload():
+    # Import the app once in the supervisor, so bad settings (a JWT_ACTIVE_KID
+    # missing from JWT_KEYS, no signing key at all) stop the launch here
+    # instead of crash-looping every worker.
+    import main  # noqa: F401
+    from helper.generate_token import ACCESS_KEYS, REFRESH_KEYS
+
+    for name, keys in (("JWT_KEY/JWT_KEYS", ACCESS_KEYS), ("JWT_REFRESH_KEY/JWT_REFRESH_KEYS", REFRESH_KEYS)):
+        if not keys.signing_key()[1]:
+            raise SystemExit(f"{name} is not set")
+
+
+def run(workers: int, host: str, port: int):
+    # Each worker gets its own Argon2 pool; utility.security sizes it from
+    # the worker count unless HASH_WORKERS is set.
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    preload()
+
+    import uvicorn
+
+    uvicorn.run(
+        "main:app",
+        host=host,
+        port=port,
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        timeout_graceful_shutdown=SHUTDOWN_GRACE_SECONDS,
+        timeout_keep_alive=KEEPALIVE_SECONDS,
+        forwarded_allow_ips=FORWARDED_ALLOW_IPS,
+        access_log=False,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the API with multiple worker processes")
+    parser.add_argument("--workers", type=int, default=WEB_CONCURRENCY)
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    args = parser.parse_args()
+    if args.workers < 1:
+        raise SystemExit("--workers must be at least 1")
+    run(args.workers, args.host, args.port)
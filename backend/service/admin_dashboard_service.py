@@ -1,66 +1,128 @@
 from fastapi import HTTPException
 
-from repository import booking_repository, room_repository
-from repository.user_repository import list_admins
+from configuration.settings import after_commit
+from repository import booking_repository, stats_repository
+from service.availability_service import invalidate_availability
+from service.occupancy_service import get_occupancy_matrix, sync_booking_status
+from utility.row_mappers import RowMapper
+
+
+def _dashboard_counters():
+    try:
+        counters = stats_repository.get_dashboard_counters()
+    except Exception:
+        # The counter tables do not exist until migrations 11 and 18 have run.
+        counters = None
+    if counters is None:
+        counters = stats_repository.compute_dashboard_counters()
+    return counters
 
 
 def get_dashboard_stats():
     try:
-        booking_stats = booking_repository.get_booking_stats()
-        room_stats = room_repository.get_room_stats()
-        admins = list_admins()
+        counters = _dashboard_counters()
     except Exception as e:
         raise HTTPException(status_code=500, detail={"message": f"Error fetching stats: {str(e)}"})
 
-    total_rooms = room_stats.get("total", 0) or 0
-    available_rooms = room_stats.get("available", 0) or 0
+    total_rooms = counters["rooms_total"]
+    available_rooms = counters["rooms_available"]
     occupancy = round((1 - available_rooms / max(total_rooms, 1)) * 100)
 
+    try:
+        nights = get_occupancy_matrix().occupancy_by_night(30)["nights"]
+        occupancy_tonight = nights[0]["rate"]
+        occupancy_next_30_days = round(sum(n["rate"] for n in nights) / len(nights), 1)
+    except Exception:
+        occupancy_tonight = occupancy_next_30_days = None
+
     return {
-        "totalBookings": booking_stats.get("total", 0) or 0,
-        "confirmedBookings": booking_stats.get("confirmed", 0) or 0,
-        "pendingBookings": booking_stats.get("pending", 0) or 0,
-        "cancelledBookings": booking_stats.get("cancelled", 0) or 0,
-        "totalRevenue": float(booking_stats.get("total_revenue", 0) or 0),
+        "totalBookings": counters["bookings_total"],
+        "confirmedBookings": counters["bookings_confirmed"],
+        "pendingBookings": counters["bookings_pending"],
+        "cancelledBookings": counters["bookings_cancelled"],
+        "totalRevenue": float(counters["revenue_total"]),
         "totalRooms": total_rooms,
         "availableRooms": available_rooms,
-        "occupiedRooms": room_stats.get("occupied", 0) or 0,
-        "maintenanceRooms": room_stats.get("maintenance", 0) or 0,
+        "occupiedRooms": counters["rooms_occupied"],
+        "maintenanceRooms": counters["rooms_maintenance"],
         "occupancyRate": occupancy,
-        "avgRoomPrice": float(room_stats.get("avg_price", 0) or 0),
-        "totalAdmins": len(admins) if admins else 0,
+        "occupancyTonight": occupancy_tonight,
+        "occupancyNext30Days": occupancy_next_30_days,
+        "avgRoomPrice": float(counters["room_price_sum"]) / total_rooms if total_rooms else 0.0,
+        "totalAdmins": counters["admins_total"],
+    }
+
+
+def fold_dashboard_counters():
+    return stats_repository.fold_dashboard_counters()
+
+
+def reconcile_dashboard_counters():
+    try:
+        before, after = stats_repository.reconcile_dashboard_counters()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"message": f"Error reconciling stats: {str(e)}"})
+    drift = {}
+    if before:
+        for column in stats_repository.COUNTER_COLUMNS:
+            if before[column] != after[column]:
+                drift[column] = {"counter": float(before[column]), "actual": float(after[column])}
+    return {
+        "message": "Dashboard counters reconciled",
+        "created": before is None,
+        "drift": drift,
+        "reconciledAt": after["reconciled_at"].isoformat(),
     }
 
 
+BOOKING_ROWS = RowMapper(
+    "booking_rows",
+    {
+        "id": "{booking_id}",
+        "guestName": "{guest_name}",
+        "email": "{email}",
+        "phone": "{phone}",
+        "roomType": "{room_type}",
+        "checkIn": "str({check_in})",
+        "checkOut": "str({check_out})",
+        "guests": "{guests}",
+        "total_amount": "float({total_amount}) if {total_amount} else 0",
+        "status": "{status}",
+        "paymentMethod": "{payment_method}",
+        "bookingDate": "str({booking_date})",
+    },
+)
+
+
 def get_all_bookings():
     try:
-        bookings = booking_repository.get_all_bookings()
+        columns, bookings = booking_repository.get_all_bookings()
     except Exception as e:
         raise HTTPException(status_code=500, detail={"message": f"Error fetching bookings: {str(e)}"})
-    return [
-        {
-            "id": b.get("booking_id", ""),
-            "guestName": b.get("guest_name", "Guest"),
-            "email": b.get("email", ""),
-            "phone": b.get("phone", ""),
-            "roomType": b.get("room_type", ""),
-            "checkIn": str(b.get("check_in", "")),
-            "checkOut": str(b.get("check_out", "")),
-            "guests": b.get("guests", 1),
-            "total_amount": float(b.get("total_amount", 0)) if b.get("total_amount") else 0,
-            "status": b.get("status", "pending"),
-            "paymentMethod": b.get("payment_method", ""),
-            "bookingDate": str(b.get("booking_date", "")),
-        }
-        for b in bookings
-    ]
+    return BOOKING_ROWS(columns, bookings)
+
+
+async def get_all_bookings_async():
+    try:
+        columns, bookings = await booking_repository.get_all_bookings_async()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"message": f"Error fetching bookings: {str(e)}"})
+    return BOOKING_ROWS(columns, bookings)
 
 
 def update_booking_status(booking_id: str, status: str):
     try:
         booking = booking_repository.update_booking_status(booking_id, status)
+    except booking_repository.RoomUnavailableError as e:
+        raise HTTPException(status_code=409, detail={"message": str(e)})
     except Exception as e:
         raise HTTPException(status_code=500, detail={"message": f"Error updating booking: {str(e)}"})
     if not booking:
         raise HTTPException(status_code=404, detail={"message": "Booking not found"})
+    after_commit(invalidate_availability)
+    sync_booking_status(booking)
     return {"message": "Booking status updated", "status": booking["status"]}
+
+
+if __name__ == "__main__":
+    print(reconcile_dashboard_counters())
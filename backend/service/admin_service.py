@@ -3,6 +3,7 @@ import logging
 
 from models.schemas import CreateAdmin, DeleteAdmin, OTPRequest
 from repository.user_repository import create_user, delete_admin_by_email, email_exists, list_admins
+from service import user_cache_service
 from utility.security import hash_password
 
 logger = logging.getLogger(__name__)
@@ -51,6 +52,7 @@ def remove_admin(data: DeleteAdmin):
             data.email, 
         )
         raise HTTPException(status_code=500, detail={"message":"Server error"})
+    user_cache_service.invalidate_profile(data.email)
 
     if result is None:
         raise HTTPException(status_code=404, detail={"message": "User not found"})
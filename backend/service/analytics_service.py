@@ -0,0 +1,106 @@
+import argparse
+import os
+import time
+from datetime import date
+
+from fastapi import HTTPException
+
+from repository import analytics_repository
+from service import job_service
+
+ROLLUP_BATCH_DAYS = int(os.getenv("ROLLUP_BATCH_DAYS", 92))
+# Reads catch up at most this many batches themselves; anything left is
+# reported as pendingDays and queued for the refresh job right away, besides
+# its ROLLUP_REFRESH_SECONDS schedule.
+ROLLUP_READ_REFRESH_BATCHES = int(os.getenv("ROLLUP_READ_REFRESH_BATCHES", 1))
+
+TIMESERIES_BUCKETS = ("day", "week", "month")
+TIMESERIES_METRICS = (
+    "nights_sold", "revenue", "available_room_nights", "occupancy", "adr", "revpar", "bookings", "cancellations",
+)
+MAX_TIMESERIES_DAYS = 3660
+
+
+def refresh_rollups(max_batches: int | None = None) -> dict:
+    started = time.perf_counter()
+    days = batches = 0
+    while max_batches is None or batches < max_batches:
+        refreshed = analytics_repository.refresh_dirty_days(ROLLUP_BATCH_DAYS)
+        if not refreshed:
+            break
+        days += len(refreshed)
+        batches += 1
+    return {"days": days, "batches": batches, "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+
+def _metrics(row: dict) -> dict:
+    nights = int(row["nights_sold"] or 0)
+    revenue = float(row["revenue"] or 0)
+    available = int(row["available_room_nights"] or 0)
+    return {
+        "nights_sold": nights,
+        "revenue": round(revenue, 2),
+        "available_room_nights": available,
+        "occupancy": round(nights / available * 100, 1) if available else 0.0,
+        "adr": round(revenue / nights, 2) if nights else 0.0,
+        "revpar": round(revenue / available, 2) if available else 0.0,
+        "bookings": int(row["bookings"] or 0),
+        "cancellations": int(row["cancellations"] or 0),
+    }
+
+
+def timeseries(metric: str, bucket: str, start: date, end: date, room_type: str = ""):
+    metrics = list(TIMESERIES_METRICS) if metric in ("", "all") else metric.split(",")
+    unknown = [m for m in metrics if m not in TIMESERIES_METRICS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail={"message": f"Unknown metric {unknown[0]!r}, use one of: {', '.join(TIMESERIES_METRICS)}"},
+        )
+    if bucket not in TIMESERIES_BUCKETS:
+        raise HTTPException(status_code=400, detail={"message": "bucket must be day, week or month"})
+    if end < start:
+        raise HTTPException(status_code=400, detail={"message": "End date must not be before start date"})
+    if (end - start).days > MAX_TIMESERIES_DAYS:
+        raise HTTPException(status_code=400, detail={"message": f"Ranges are limited to {MAX_TIMESERIES_DAYS} days"})
+
+    try:
+        refresh_rollups(ROLLUP_READ_REFRESH_BATCHES)
+        rows = analytics_repository.get_timeseries(bucket, start, end, room_type)
+        pending = analytics_repository.count_dirty_days()
+        if pending:
+            job_service.enqueue("refresh_rollups", unique_key="refresh_rollups:catch-up")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"message": f"Error fetching analytics: {str(e)}"})
+
+    points = []
+    for row in rows:
+        values = _metrics(row)
+        points.append({"bucket": row["bucket"].isoformat(), **{m: values[m] for m in metrics}})
+    return {
+        "bucket": bucket,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "roomType": room_type or None,
+        "metrics": metrics,
+        "pendingDays": pending,
+        "points": points,
+    }
+
+
+def refresh_report():
+    try:
+        report = refresh_rollups()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"message": f"Error refreshing analytics: {str(e)}"})
+    return {"message": "Analytics rollups refreshed", **report}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the daily room-type rollups")
+    parser.add_argument("--backfill", nargs=2, metavar=("FROM", "TO"), help="re-queue every day in this range first")
+    args = parser.parse_args()
+    if args.backfill:
+        start, end = (date.fromisoformat(value) for value in args.backfill)
+        print(f"Queued {analytics_repository.mark_days_dirty(start, end)} days")
+    print(refresh_rollups())
@@ -1,3 +1,5 @@
+import logging
+
 from fastapi import HTTPException, Request, Response
 
 from helper.generate_token import (
@@ -12,9 +14,12 @@ from repository.user_repository import (
     get_user_by_email_and_role,
     get_user_credentials,
     update_last_login,
+    update_user_profile,
 )
 from utility.cookies import clear_auth_cookies, set_access_cookie, set_auth_cookies
-from utility.security import hash_password, verify_password
+from utility.security import hash_password, verify_and_update_password
+
+logger = logging.getLogger(__name__)
 
 PASSWORD_MIN_LENGTH = 8
 
@@ -36,6 +41,22 @@ def _login_response(user: dict, request: Request, response: Response, default_ro
     }
 
 
+def _check_password(user: dict, password: str):
+    valid, new_hash = verify_and_update_password(password, user["password"])
+    if not valid:
+        raise HTTPException(
+            status_code=401,
+            detail={"message": "Password incorrect", "status": "error"},
+        )
+    if new_hash:
+        # Stored with older Argon2 parameters; the login still succeeds if
+        # the upgrade cannot be saved.
+        try:
+            update_user_profile(user["email"], {"password": new_hash})
+        except Exception:
+            logger.exception("Could not rehash password for %s", user["email"])
+
+
 def signup(data: UserSignup, request: Request, response: Response):
     if len(data.password) < PASSWORD_MIN_LENGTH:
         raise HTTPException(
@@ -127,11 +148,7 @@ def login(data: UserLogin, request: Request, response: Response):
             detail={"message": "Account not found", "status": "error"},
         )
 
-    if not verify_password(data.password, user["password"]):
-        raise HTTPException(
-            status_code=401,
-            detail={"message": "Password incorrect", "status": "error"},
-        )
+    _check_password(user, data.password)
 
     if user.get("role", "user") == "user" and not user.get("verified"):
         raise HTTPException(
@@ -164,11 +181,7 @@ def staff_login(data: StaffLogin, request: Request, response: Response):
             detail={"message": "Account not found", "status": "error"},
         )
 
-    if not verify_password(data.password, user["password"]):
-        raise HTTPException(
-            status_code=401,
-            detail={"message": "Password incorrect", "status": "error"},
-        )
+    _check_password(user, data.password)
 
     if not user.get("verified"):
         raise HTTPException(
@@ -203,11 +216,7 @@ def admin_login(data: AdminLogin, request: Request, response: Response):
             detail={"message": "Account not found", "status": "error"},
         )
 
-    if not verify_password(data.password, user["password"]):
-        raise HTTPException(
-            status_code=401,
-            detail={"message": "Password incorrect", "status": "error"},
-        )
+    _check_password(user, data.password)
 
     if not user.get("verified"):
         raise HTTPException(
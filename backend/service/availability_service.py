@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+from datetime import date
+
+from fastapi import HTTPException
+
+from configuration.settings import after_commit
+from repository import booking_repository, room_repository
+
+# Other workers write bookings too, so the in-process index is rebuilt from
+# the database on this interval. Writes made by this worker are applied to it
+# as soon as they commit. create_booking re-checks inventory under a lock in Postgres, so
+# a stale index can at worst show a room that the booking then rejects.
+AVAILABILITY_REFRESH_SECONDS = float(os.getenv("AVAILABILITY_REFRESH_SECONDS", 60))
+
+
+class AvailabilityIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._sellable = {}
+        self._booked = {}
+        self._loaded_at = None
+
+    def load(self, sellable_counts, booking_ranges):
+        sellable = {row["type"]: int(row["sellable"]) for row in sellable_counts}
+        booked = {}
+        for booking in booking_ranges:
+            nights = booked.setdefault(booking["room_type"], {})
+            rooms = int(booking.get("rooms") or 1)
+            for night in range(booking["in_date"].toordinal(), booking["out_date"].toordinal()):
+                nights[night] = nights.get(night, 0) + rooms
+        with self._lock:
+            self._sellable = sellable
+            self._booked = booked
+            self._loaded_at = time.monotonic()
+
+    def is_loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def is_stale(self) -> bool:
+        loaded_at = self._loaded_at
+        return loaded_at is None or time.monotonic() - loaded_at > AVAILABILITY_REFRESH_SECONDS
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def adjust(self, room_type: str, in_date: date, out_date: date, delta: int):
+        with self._lock:
+            nights = self._booked.setdefault(room_type, {})
+            for night in range(in_date.toordinal(), out_date.toordinal()):
+                count = nights.get(night, 0) + delta
+                if count > 0:
+                    nights[night] = count
+                else:
+                    nights.pop(night, None)
+
+    def available_rooms(self, room_type: str, in_date: date, out_date: date) -> int:
+        with self._lock:
+            sellable = self._sellable.get(room_type, 0)
+            nights = self._booked.get(room_type, {})
+            peak = max((nights.get(n, 0) for n in range(in_date.toordinal(), out_date.toordinal())), default=0)
+        return max(sellable - peak, 0)
+
+    def room_types(self) -> list[str]:
+        with self._lock:
+            return sorted(self._sellable)
+
+    def refresh_if_stale(self, loader):
+        if not self.is_stale():
+            return
+        # One thread rebuilds; the rest keep answering from the previous copy
+        # unless there is none yet.
+        if not self._refresh_lock.acquire(blocking=not self.is_loaded()):
+            return
+        try:
+            if self.is_stale():
+                self.load(*loader())
+        finally:
+            self._refresh_lock.release()
+
+
+_index = AvailabilityIndex()
+
+
+def _load_from_database():
+    return room_repository.get_sellable_room_counts(), booking_repository.get_active_booking_ranges()
+
+
+def _as_date(value) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+
+def get_availability_index() -> AvailabilityIndex:
+    _index.refresh_if_stale(_load_from_database)
+    return _index
+
+
+def check_availability(room_type: str, in_date: date, out_date: date):
+    if out_date <= in_date:
+        raise HTTPException(status_code=400, detail={"message": "Check-out date must be after check-in date"})
+
+    try:
+        index = get_availability_index()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"message": f"Error checking availability: {str(e)}"})
+
+    room_types = [room_type] if room_type else index.room_types()
+    return {
+        "in_date": in_date.isoformat(),
+        "out_date": out_date.isoformat(),
+        "availability": [
+            {
+                "type": t,
+                "available_rooms": index.available_rooms(t, in_date, out_date),
+            }
+            for t in room_types
+        ],
+    }
+
+
+def _apply_booking(booking: dict | None, sign: int):
+    if not booking or not _index.is_loaded():
+        return
+    delta = sign * int(booking.get("rooms") or 1)
+    _index.adjust(booking["room_type"], _as_date(booking["in_date"]), _as_date(booking["out_date"]), delta)
+
+
+def record_booking(booking: dict | None):
+    if booking and booking.get("status") in booking_repository.ACTIVE_BOOKING_STATUSES:
+        after_commit(lambda: _apply_booking(booking, 1))
+
+
+# booking_repository.cancel_booking only returns bookings that were active,
+# so every booking released here was counted by record_booking.
+def release_booking(booking: dict | None):
+    after_commit(lambda: _apply_booking(booking, -1))
+
+
+def invalidate_availability():
+    _index.invalidate()
@@ -2,8 +2,16 @@ from datetime import date
 
 from fastapi import HTTPException
 
+from configuration.settings import unit_of_work
 from models.schemas import BookingCreate, CancelBooking
-from repository.booking_repository import cancel_booking, create_booking as repo_create_booking, get_booking_by_id
+from repository.booking_repository import (
+    RoomUnavailableError,
+    cancel_booking,
+    create_booking as repo_create_booking,
+    get_booking_by_id,
+)
+from service.availability_service import record_booking, release_booking
+from service.occupancy_service import occupy_booking, vacate_booking
 
 
 def create_booking(_email: str, data: BookingCreate):
@@ -51,8 +59,13 @@ def create_booking(_email: str, data: BookingCreate):
             guest_name=f"{data.first_name} {data.last_name}".strip(),
             phone=data.phone,
             guests=data.adult + data.children,
+            rooms=data.rooms,
         )
+        record_booking(booking)
+        occupy_booking(booking)
         return {"message": "Booking created", "booking": booking}
+    except RoomUnavailableError as e:
+        raise HTTPException(status_code=409, detail={"message": str(e)})
     except Exception as e:
         raise HTTPException(status_code=500, detail={"message": "Server error", "error": str(e)})
 
@@ -62,15 +75,23 @@ def cancel_user_booking(email: str, role: str, data: CancelBooking):
         raise HTTPException(status_code=400, detail={"message": "Booking ID is required"})
 
     try:
-        if role in ("admin", "superadmin"):
-            booking = get_booking_by_id(data.booking_id)
-        else:
-            booking = get_booking_by_id(data.booking_id, user_email=email)
+        with unit_of_work():
+            if role in ("admin", "superadmin"):
+                booking = get_booking_by_id(data.booking_id)
+            else:
+                booking = get_booking_by_id(data.booking_id, user_email=email)
 
-        if not booking:
-            raise HTTPException(status_code=404, detail={"message": "Booking not found"})
+            if not booking:
+                raise HTTPException(status_code=404, detail={"message": "Booking not found"})
 
-        updated = cancel_booking(data.booking_id)
+            updated = cancel_booking(data.booking_id)
+            if not updated:
+                raise HTTPException(
+                    status_code=409,
+                    detail={"message": f"A {booking['status']} booking cannot be cancelled"},
+                )
+        release_booking(updated)
+        vacate_booking(updated)
         return {"message": "Booking cancelled", "booking": updated}
     except HTTPException:
         raise
@@ -0,0 +1,69 @@
+import logging
+import os
+import threading
+import time
+
+from repository import catalog_repository
+
+logger = logging.getLogger(__name__)
+
+# catalog_versions is bumped by triggers on rooms and hotels. Each worker
+# re-reads it at most this often, so a change made elsewhere reaches ETags and
+# the room catalog within this many seconds.
+CATALOG_VERSION_CACHE_SECONDS = float(os.getenv("CATALOG_VERSION_CACHE_SECONDS", 5))
+
+_versions = None
+_loaded_at = 0.0
+_versions_lock = threading.Lock()
+
+
+def _is_fresh() -> bool:
+    return _versions is not None and time.monotonic() - _loaded_at <= CATALOG_VERSION_CACHE_SECONDS
+
+
+def _store(rows):
+    global _versions, _loaded_at
+    # Without the table (migrations not applied yet) there are no versions,
+    # which turns conditional GET off rather than failing the request.
+    _versions = {row["name"]: row for row in rows or []}
+    _loaded_at = time.monotonic()
+
+
+def cached_versions() -> dict | None:
+    return _versions if _is_fresh() else None
+
+
+def get_versions() -> dict:
+    if _is_fresh():
+        return _versions
+    with _versions_lock:
+        if not _is_fresh():
+            try:
+                rows = catalog_repository.get_catalog_versions()
+            except Exception:
+                logger.warning("Could not read catalog versions", exc_info=True)
+                rows = None
+            _store(rows)
+        return _versions
+
+
+async def get_versions_async() -> dict:
+    if _is_fresh():
+        return _versions
+    try:
+        rows = await catalog_repository.get_catalog_versions_async()
+    except Exception:
+        logger.warning("Could not read catalog versions", exc_info=True)
+        rows = None
+    _store(rows)
+    return _versions
+
+
+def current_version(name: str, versions: dict | None = None) -> int | None:
+    entry = (versions if versions is not None else get_versions()).get(name)
+    return entry["version"] if entry else None
+
+
+def invalidate_versions():
+    global _versions
+    _versions = None
@@ -0,0 +1,89 @@
+import csv
+import io
+import logging
+import os
+import zlib
+from datetime import date
+
+import orjson
+from fastapi import HTTPException
+
+from repository import booking_repository
+from service.admin_dashboard_service import BOOKING_ROWS
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 2000))
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _csv_chunks(batches):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(BOOKING_ROWS.template))
+    writer.writeheader()
+    yield buffer.getvalue().encode("utf-8")
+    for columns, rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(BOOKING_ROWS(columns, rows))
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _ndjson_chunks(batches):
+    for columns, rows in batches:
+        yield b"".join(orjson.dumps(row) + b"\n" for row in BOOKING_ROWS(columns, rows))
+
+
+def _gzip_chunks(chunks):
+    # wbits=31 writes a gzip header, so the stream can go out as
+    # Content-Encoding: gzip one batch at a time.
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _logged(chunks):
+    # Once the first byte is sent the status code is fixed, so a failure here
+    # can only cut the stream short.
+    try:
+        yield from chunks
+    except Exception:
+        logger.exception("Bookings export failed mid-stream")
+        raise
+
+
+def export_bookings(fmt: str, start: date | None = None, end: date | None = None, compress: bool = False):
+    if fmt not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail={"message": "format must be csv or ndjson"})
+    if start and end and end < start:
+        raise HTTPException(status_code=400, detail={"message": "End date must not be before start date"})
+
+    batches = booking_repository.iter_bookings_for_export(start, end, EXPORT_BATCH_SIZE)
+    try:
+        first = next(batches, None)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"message": f"Error exporting bookings: {str(e)}"})
+
+    def all_batches():
+        if first is not None:
+            yield first
+            yield from batches
+
+    chunks = _csv_chunks(all_batches()) if fmt == "csv" else _ndjson_chunks(all_batches())
+    if compress:
+        chunks = _gzip_chunks(chunks)
+
+    filename = "bookings"
+    if start or end:
+        filename += f"-{start or 'start'}-{end or 'today'}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return _logged(chunks), EXPORT_MEDIA_TYPES[fmt], headers
@@ -1,21 +1,30 @@
 from fastapi import HTTPException
 
 from repository import hotel_repository
+from utility.row_mappers import RowMapper
 
+HOTEL_ROOM_ROWS = RowMapper(
+    "hotel_room_rows",
+    {
+        "id": "{id}",
+        "name": "{name}",
+        "type": "{type}",
+        "price": {
+            "base": "float({price_base})",
+            "weekend": "float({price_weekend} or 0)",
+        },
+        "size": "str({size_sqm}) + ' m²' if {size_sqm} else ''",
+        "beds": "{bed_type}",
+        "maxGuests": "{capacity}",
+        "images": "{images} or []",
+        "amenities": "{amenities} or []",
+        "description": "{description}",
+        "available": "{status} == 'available'",
+    },
+)
 
-def get_hotel_detail(hotel_id: int):
-    try:
-        hotel = hotel_repository.get_hotel_by_id(hotel_id)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail={"message": f"Error fetching hotel: {str(e)}"})
-    if not hotel:
-        raise HTTPException(status_code=404, detail={"message": "Hotel not found"})
-
-    try:
-        rooms = hotel_repository.get_all_rooms_for_hotel()
-    except Exception:
-        rooms = []
 
+def _hotel_detail(hotel: dict, rooms: list[dict]):
     return {
         "id": hotel["id"],
         "name": hotel["name"],
@@ -32,23 +41,37 @@ def get_hotel_detail(hotel_id: int):
             "email": hotel.get("contact_email", ""),
             "website": hotel.get("contact_website", ""),
         },
-        "rooms": [
-            {
-                "id": r["id"],
-                "name": r["name"],
-                "type": r["type"],
-                "price": {
-                    "base": float(r["price_base"]),
-                    "weekend": float(r.get("price_weekend", 0) or 0),
-                },
-                "size": f"{r.get('size_sqm', 0)} m²" if r.get("size_sqm") else "",
-                "beds": r.get("bed_type", ""),
-                "maxGuests": r.get("capacity", 2),
-                "images": r.get("images") or [],
-                "amenities": r.get("amenities") or [],
-                "description": r.get("description", ""),
-                "available": r.get("status") == "available",
-            }
-            for r in rooms
-        ],
+        "rooms": rooms,
     }
+
+
+def get_hotel_detail(hotel_id: int):
+    try:
+        hotel = hotel_repository.get_hotel_by_id(hotel_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"message": f"Error fetching hotel: {str(e)}"})
+    if not hotel:
+        raise HTTPException(status_code=404, detail={"message": "Hotel not found"})
+
+    try:
+        rooms = HOTEL_ROOM_ROWS(*hotel_repository.get_all_rooms_for_hotel())
+    except Exception:
+        rooms = []
+
+    return _hotel_detail(hotel, rooms)
+
+
+async def get_hotel_detail_async(hotel_id: int):
+    try:
+        hotel = await hotel_repository.get_hotel_by_id_async(hotel_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"message": f"Error fetching hotel: {str(e)}"})
+    if not hotel:
+        raise HTTPException(status_code=404, detail={"message": "Hotel not found"})
+
+    try:
+        rooms = HOTEL_ROOM_ROWS(*await hotel_repository.get_all_rooms_for_hotel_async())
+    except Exception:
+        rooms = []
+
+    return _hotel_detail(hotel, rooms)
@@ -0,0 +1,227 @@
+import argparse
+import csv
+import io
+import os
+import sys
+import tempfile
+import time
+
+import orjson
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from models.schemas import BookingImport, RoomCreate
+from repository import import_repository
+from service.availability_service import invalidate_availability
+from service.catalog_version_service import invalidate_versions
+from service.occupancy_service import invalidate_occupancy
+from service.pricing_service import invalidate_rates
+from service.room_catalog_service import invalidate_catalog
+
+IMPORT_FORMATS = ("csv", "ndjson")
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", 200 * 1024 * 1024))
+IMPORT_MAX_REPORTED_ERRORS = int(os.getenv("IMPORT_MAX_REPORTED_ERRORS", 100))
+
+# Validated rows are written to this spool in COPY csv format; past the
+# threshold it moves to a temp file, so memory stays flat for large imports.
+IMPORT_SPOOL_BYTES = 8 * 1024 * 1024
+
+
+def _records(source, fmt: str):
+    # Yields (line, record, problem) from a binary file, one row at a time.
+    text = io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            for row in reader:
+                # Empty cells fall back to the schema default.
+                yield reader.line_num, {k: v for k, v in row.items() if k and v not in ("", None)}, None
+            return
+        for line, raw in enumerate(text, start=1):
+            if not raw.strip():
+                continue
+            try:
+                record = orjson.loads(raw)
+            except orjson.JSONDecodeError as e:
+                yield line, None, f"invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield line, None, "each line must be a JSON object"
+                continue
+            yield line, record, None
+    finally:
+        text.detach()
+
+
+def _list_field(value):
+    # CSV cells hold lists as a JSON array or as "wifi|tv|minibar".
+    if not isinstance(value, str):
+        return value
+    if value.lstrip().startswith("["):
+        return orjson.loads(value)
+    return [item.strip() for item in value.split("|") if item.strip()]
+
+
+def _pg_array(values: list[str]) -> str:
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for v in values)
+    return "{" + ",".join(f'"{v}"' for v in escaped) + "}"
+
+
+def _copy_field(value) -> str:
+    # COPY csv reads an unquoted empty field as NULL and a quoted one as text,
+    # so every value is quoted and "" or \\N stay the strings they were.
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        value = _pg_array(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _copy_line(values) -> str:
+    return ",".join(_copy_field(value) for value in values) + "\n"
+
+
+def _error_messages(error: ValidationError) -> list[str]:
+    return [
+        f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" if e["loc"] else e["msg"]
+        for e in error.errors()
+    ]
+
+
+class _ImportReport:
+    def __init__(self, kind: str, fmt: str, dry_run: bool):
+        self.started = time.perf_counter()
+        self.report = {"kind": kind, "format": fmt, "dry_run": dry_run, "rows": 0, "valid": 0, "rejected": 0, "errors": []}
+
+    def reject(self, line: int, messages: list[str]):
+        self.report["rejected"] += 1
+        if len(self.report["errors"]) < IMPORT_MAX_REPORTED_ERRORS:
+            self.report["errors"].append({"line": line, "errors": messages})
+
+    def finish(self, **counts) -> dict:
+        self.report.update(counts)
+        self.report["elapsed_ms"] = round((time.perf_counter() - self.started) * 1000, 1)
+        return self.report
+
+
+def _stage(source, fmt: str, report: _ImportReport, to_row):
+    # Validates every record and writes the accepted ones to a COPY spool.
+    # to_row(record) returns the staging row or raises ValueError /
+    # ValidationError with what is wrong with it.
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail={"message": "format must be csv or ndjson"})
+    spool = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES, mode="w+", newline="", encoding="utf-8")
+    try:
+        for line, record, problem in _records(source, fmt):
+            report.report["rows"] += 1
+            if problem:
+                report.reject(line, [problem])
+                continue
+            try:
+                row = to_row(record)
+            except ValidationError as e:
+                report.reject(line, _error_messages(e))
+                continue
+            except ValueError as e:
+                report.reject(line, [str(e)])
+                continue
+            spool.write(_copy_line((line, *row)))
+            report.report["valid"] += 1
+    except UnicodeDecodeError:
+        spool.close()
+        raise HTTPException(status_code=400, detail={"message": "Import file must be UTF-8"})
+    spool.seek(0)
+    return spool
+
+
+def import_rooms(source, fmt: str = "csv", dry_run: bool = False) -> dict:
+    report = _ImportReport("rooms", fmt, dry_run)
+    seen = set()
+
+    def to_row(record: dict):
+        if "amenities" in record:
+            record["amenities"] = _list_field(record["amenities"])
+        room = RoomCreate.model_validate(record)
+        if room.room_number in seen:
+            raise ValueError(f"room_number {room.room_number} appears more than once in the file")
+        seen.add(room.room_number)
+        return (
+            room.room_number, room.name, room.type, room.description, room.price_base, room.price_weekend,
+            room.capacity, room.size_sqm, room.bed_type, room.amenities, room.floor,
+        )
+
+    spool = _stage(source, fmt, report, to_row)
+    with spool:
+        if dry_run or not report.report["valid"]:
+            return report.finish(inserted=0, updated=0)
+        try:
+            counts = import_repository.copy_rooms(spool)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail={"message": f"Error importing rooms: {str(e)}"})
+
+    invalidate_catalog()
+    invalidate_versions()
+    invalidate_rates()
+    invalidate_availability()
+    invalidate_occupancy()
+    return report.finish(inserted=counts["inserted"], updated=counts["updated"])
+
+
+def import_bookings(source, fmt: str = "csv", dry_run: bool = False) -> dict:
+    report = _ImportReport("bookings", fmt, dry_run)
+    try:
+        room_types = import_repository.get_room_types()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"message": f"Error importing bookings: {str(e)}"})
+
+    def to_row(record: dict):
+        booking = BookingImport.model_validate(record)
+        if booking.room_type not in room_types:
+            raise ValueError(f"room_type {booking.room_type!r} does not match any room")
+        return (
+            booking.user_email, booking.guest_name, booking.phone, booking.guests, booking.room_type,
+            booking.in_date, booking.out_date, booking.status, booking.created_at,
+            booking.amount, booking.payment_method,
+        )
+
+    spool = _stage(source, fmt, report, to_row)
+    with spool:
+        if dry_run or not report.report["valid"]:
+            return report.finish(bookings=0, payments=0)
+        try:
+            # Historical stays are loaded as they were; they are not checked
+            # against room inventory the way new bookings are.
+            counts = import_repository.copy_bookings(spool)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail={"message": f"Error importing bookings: {str(e)}"})
+
+    for line in counts["existing"]:
+        report.reject(line, ["booking already exists for this guest, room type and dates"])
+    report.report["valid"] -= len(counts["existing"])
+    report.report["errors"].sort(key=lambda error: error["line"])
+
+    invalidate_availability()
+    invalidate_occupancy()
+    return report.finish(bookings=counts["bookings"], payments=counts["payments"])
+
+
+IMPORTERS = {"rooms": import_rooms, "bookings": import_bookings}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import rooms or historical bookings")
+    parser.add_argument("kind", choices=sorted(IMPORTERS))
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="defaults to the file extension")
+    parser.add_argument("--dry-run", action="store_true", help="validate only, load nothing")
+    args = parser.parse_args()
+
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+    try:
+        with open(args.path, "rb") as source:
+            result = IMPORTERS[args.kind](source, fmt, args.dry_run)
+    except HTTPException as e:
+        print(e.detail["message"])
+        sys.exit(1)
+    print(orjson.dumps(result, option=orjson.OPT_INDENT_2).decode())
+    sys.exit(1 if result["rejected"] else 0)
@@ -0,0 +1,237 @@
+import argparse
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from repository import job_repository
+
+logger = logging.getLogger(__name__)
+
+# In-process workers started by the app; set JOB_WORKERS=0 and run
+# `python -m service.job_service` to process the queue in its own process.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+JOB_BATCH_SIZE = int(os.getenv("JOB_BATCH_SIZE", 10))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", 1))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", 300))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 5))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", 10))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", 3600))
+JOB_SHUTDOWN_SECONDS = float(os.getenv("JOB_SHUTDOWN_SECONDS", 10))
+
+# Jobs that run on a period. Each run queues the next once it is done (or
+# buried) and start_workers queues the first, so the chain survives restarts;
+# unique_key keeps one pending run per kind across every worker.
+RECURRING_JOBS = {
+    "refresh_rollups": float(os.getenv("ROLLUP_REFRESH_SECONDS", 300)),
+    # Moves the deltas appended by the dashboard counter triggers into the
+    # counter row, so reads sum only a short tail.
+    "fold_dashboard_counters": float(os.getenv("DASHBOARD_FOLD_SECONDS", 60)),
+    # Repairs any drift between the trigger-maintained dashboard counters and
+    # the tables they summarise; reads one snapshot and locks no table.
+    "reconcile_dashboard_counters": float(os.getenv("DASHBOARD_RECONCILE_SECONDS", 3600)),
+}
+
+
+# Handlers import their service lazily: those services enqueue jobs
+# themselves, so importing them here would be circular.
+def _send_otp_email(payload: dict):
+    from service.otp_service import deliver_otp
+
+    deliver_otp(payload["email"], payload.get("nonce"))
+
+
+def _purge_expired_otps(_payload: dict):
+    from service.otp_service import purge_expired_otps
+
+    purge_expired_otps()
+
+
+def _refresh_rollups(_payload: dict):
+    from service.analytics_service import refresh_rollups
+
+    refresh_rollups()
+
+
+def _fold_dashboard_counters(_payload: dict):
+    from service.admin_dashboard_service import fold_dashboard_counters
+
+    fold_dashboard_counters()
+
+
+def _reconcile_dashboard_counters(_payload: dict):
+    from service.admin_dashboard_service import reconcile_dashboard_counters
+
+    reconcile_dashboard_counters()
+
+
+def _compact_rate_limits(_payload: dict):
+    from configuration.rate_limit import compact_rate_limits
+
+    compact_rate_limits()
+
+
+JOB_HANDLERS = {
+    "send_otp_email": _send_otp_email,
+    "purge_expired_otps": _purge_expired_otps,
+    "refresh_rollups": _refresh_rollups,
+    "fold_dashboard_counters": _fold_dashboard_counters,
+    "reconcile_dashboard_counters": _reconcile_dashboard_counters,
+    "compact_rate_limits": _compact_rate_limits,
+}
+
+_wake = threading.Event()
+_stop = threading.Event()
+_workers = []
+
+
+def enqueue(kind: str, payload: dict | None = None, delay_seconds: float = 0, unique_key: str | None = None):
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind {kind!r}")
+    run_at = None
+    if delay_seconds:
+        run_at = datetime.now(timezone.utc) + timedelta(seconds=delay_seconds)
+    job_id = job_repository.enqueue_job(kind, payload or {}, run_at, JOB_MAX_ATTEMPTS, unique_key)
+    _wake.set()
+    return job_id
+
+
+def schedule_recurring(kind: str, delay_seconds: float | None = None):
+    return enqueue(kind, delay_seconds=RECURRING_JOBS[kind] if delay_seconds is None else delay_seconds, unique_key=kind)
+
+
+def _schedule_next(kind: str):
+    if kind not in RECURRING_JOBS:
+        return
+    try:
+        schedule_recurring(kind)
+    except Exception:
+        # start_workers queues it again on the next start.
+        logger.exception("Could not schedule the next %s job", kind)
+
+
+def retry_delay(attempts: int) -> float:
+    # Exponential backoff with jitter so a burst of failures (SMTP outage)
+    # does not come back as a burst.
+    delay = min(JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), JOB_RETRY_MAX_SECONDS)
+    return delay + random.uniform(0, delay / 4)
+
+
+def run_job(job: dict):
+    handler = JOB_HANDLERS.get(job["kind"])
+    if handler is None:
+        job_repository.bury_job(job["id"], f"No handler for job kind {job['kind']!r}")
+        return False
+    try:
+        handler(job["payload"])
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        if job["attempts"] >= job["max_attempts"]:
+            logger.exception("Job %s (%s) failed for good after %s attempts", job["id"], job["kind"], job["attempts"])
+            job_repository.bury_job(job["id"], error)
+            _schedule_next(job["kind"])
+        else:
+            logger.warning("Job %s (%s) failed, attempt %s: %s", job["id"], job["kind"], job["attempts"], error)
+            job_repository.retry_job(job["id"], retry_delay(job["attempts"]), error)
+        return False
+    job_repository.complete_job(job["id"])
+    _schedule_next(job["kind"])
+    return True
+
+
+def work_once(worker: str, limit: int = JOB_BATCH_SIZE) -> int:
+    jobs = job_repository.claim_jobs(worker, limit, JOB_LEASE_SECONDS)
+    for job in jobs:
+        try:
+            run_job(job)
+        except Exception:
+            # Bookkeeping failed (database gone); the lease expiring puts
+            # the job back in the queue.
+            logger.exception("Could not record the outcome of job %s", job["id"])
+    return len(jobs)
+
+
+def _worker_loop(worker: str):
+    while not _stop.is_set():
+        try:
+            claimed = work_once(worker)
+        except Exception:
+            logger.exception("Job worker %s could not claim jobs", worker)
+            claimed = 0
+        if claimed:
+            continue
+        _wake.wait(JOB_POLL_SECONDS)
+        _wake.clear()
+
+
+def start_workers(count: int = JOB_WORKERS):
+    if _workers or count <= 0:
+        return
+    _stop.clear()
+    for kind in RECURRING_JOBS:
+        try:
+            # Dropped by the unique key when a run is already pending.
+            schedule_recurring(kind, delay_seconds=0)
+        except Exception:
+            logger.exception("Could not schedule %s jobs", kind)
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    for number in range(count):
+        thread = threading.Thread(
+            target=_worker_loop, args=(f"{prefix}:{number}",), name=f"job-worker-{number}", daemon=True
+        )
+        thread.start()
+        _workers.append(thread)
+
+
+def stop_workers(timeout: float = JOB_SHUTDOWN_SECONDS):
+    _stop.set()
+    _wake.set()
+    deadline = time.monotonic() + timeout
+    for thread in _workers:
+        thread.join(max(deadline - time.monotonic(), 0))
+    # A job still running here is abandoned; its lease brings it back.
+    _workers.clear()
+
+
+def drain(worker: str) -> int:
+    processed = 0
+    while True:
+        claimed = work_once(worker)
+        if not claimed:
+            return processed
+        processed += claimed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process background jobs")
+    parser.add_argument("--workers", type=int, default=max(JOB_WORKERS, 1))
+    parser.add_argument("--once", action="store_true", help="process every due job, then exit")
+    parser.add_argument("--stats", action="store_true", help="print queue depth and exit")
+    parser.add_argument("--dead", action="store_true", help="list dead-lettered jobs and exit")
+    parser.add_argument("--requeue", type=int, metavar="ID", help="move a dead-lettered job back to the queue")
+    parser.add_argument("--enqueue", metavar="KIND", choices=sorted(JOB_HANDLERS), help="queue a job with no payload")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.stats:
+        print(job_repository.get_job_stats())
+    elif args.dead:
+        for job in job_repository.get_dead_jobs():
+            print(f"{job['id']} {job['kind']} attempts={job['attempts']} failed_at={job['failed_at']}: {job['last_error']}")
+    elif args.requeue:
+        print("Requeued" if job_repository.requeue_dead_job(args.requeue) else "No such dead job")
+    elif args.enqueue:
+        print(f"Queued job {enqueue(args.enqueue)}")
+    elif args.once:
+        print(f"Processed {drain(f'{socket.gethostname()}:{os.getpid()}:cli')} jobs")
+    else:
+        start_workers(args.workers)
+        print(f"Processing jobs with {args.workers} workers, Ctrl+C to stop")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            stop_workers()
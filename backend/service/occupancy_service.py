@@ -0,0 +1,380 @@
+import logging
+import os
+import select
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+
+import numpy as np
+from fastapi import HTTPException
+
+from configuration.settings import after_commit, database_connection
+from repository import booking_repository, room_repository
+
+logger = logging.getLogger(__name__)
+
+OCCUPANCY_HORIZON_DAYS = int(os.getenv("OCCUPANCY_HORIZON_DAYS", 365))
+OCCUPANCY_REFRESH_SECONDS = float(os.getenv("OCCUPANCY_REFRESH_SECONDS", 300))
+
+# Each worker keeps its own matrix. A rebuild (admin endpoint or CLI) NOTIFYs
+# this channel and every worker's listener drops its copy, so the next read
+# builds it again from the database.
+OCCUPANCY_CHANNEL = "occupancy_rebuild"
+LISTEN_RETRY_SECONDS = 5
+
+# Names this process in rebuild payloads. PIDs repeat across containers and
+# hosts (PID 1 everywhere), so a random id keeps replicas from mistaking each
+# other's rebuild for their own.
+INSTANCE_ID = uuid.uuid4().hex
+
+
+def _as_date(value) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+
+# One int8 cell per (room, night) starting at `start`. Bookings are made per
+# room type, so each of a booking's rooms is pinned first-fit to a sellable
+# room of its type; rooms that find no free one (legacy overbookings) are
+# counted per type in `overflow` so occupancy still reflects them.
+class OccupancyMatrix:
+    def __init__(self, rooms: list, bookings: list, start: date, horizon: int = OCCUPANCY_HORIZON_DAYS):
+        self.start = start
+        self.horizon = horizon
+        self.built_at = time.monotonic()
+        self._lock = threading.Lock()
+
+        self.room_ids = np.array([r["id"] for r in rooms], dtype=np.int32)
+        self.room_numbers = [r["room_number"] for r in rooms]
+        self.type_names = sorted({r["type"] for r in rooms})
+        type_code = {name: code for code, name in enumerate(self.type_names)}
+        self.type_codes = np.array([type_code[r["type"]] for r in rooms], dtype=np.int16)
+        self.sellable = np.array([r.get("status") != "maintenance" for r in rooms], dtype=bool)
+        self.cells = np.zeros((len(rooms), horizon), dtype=np.int8)
+        self.overflow = {}
+        self.assignments = {}
+
+        for booking in bookings:
+            self._place(booking)
+
+    def _span(self, in_date, out_date) -> tuple[int, int]:
+        first = max((_as_date(in_date) - self.start).days, 0)
+        last = min((_as_date(out_date) - self.start).days, self.horizon)
+        return first, last
+
+    def _type_mask(self, room_type: str | None):
+        if not room_type:
+            return self.sellable
+        if room_type not in self.type_names:
+            return np.zeros_like(self.sellable)
+        return self.sellable & (self.type_codes == self.type_names.index(room_type))
+
+    def _place(self, booking: dict):
+        booking_id = booking["booking_id"]
+        if booking_id in self.assignments:
+            return
+        first, last = self._span(booking["in_date"], booking["out_date"])
+        if first >= last:
+            return
+
+        room_type = booking["room_type"]
+        free, missing = self._occupy_free(room_type, int(booking.get("rooms") or 1), first, last)
+        self.assignments[booking_id] = (free, missing, room_type, first, last)
+
+    def _occupy_free(self, room_type: str, wanted: int, first: int, last: int):
+        # Caller holds self._lock (or is still building the matrix).
+        rows = np.flatnonzero(self._type_mask(room_type))
+        free = rows[~self.cells[rows, first:last].any(axis=1)][:wanted]
+        self.cells[free, first:last] = 1
+        missing = wanted - int(free.size)
+        if missing:
+            overflow = self.overflow.setdefault(room_type, np.zeros(self.horizon, dtype=np.int16))
+            overflow[first:last] += missing
+        return free, missing
+
+    def add_booking(self, booking: dict):
+        with self._lock:
+            self._place(booking)
+
+    def remove_booking(self, booking_id):
+        with self._lock:
+            placed = self.assignments.pop(booking_id, None)
+            if placed is None:
+                return
+            rows, missing, room_type, first, last = placed
+            self.cells[rows, first:last] = 0
+            if missing:
+                self.overflow[room_type][first:last] -= missing
+
+    def set_room_status(self, room_id: int, status: str):
+        rows = np.flatnonzero(self.room_ids == room_id)
+        with self._lock:
+            self.sellable[rows] = status != "maintenance"
+            if status == "maintenance":
+                self._move_bookings_off(rows)
+
+    def _move_bookings_off(self, rows):
+        # Guests booked into a room that leaves service still stay somewhere:
+        # move them to another free room of the type, or into overflow, so
+        # they keep counting towards occupancy.
+        for booking_id, (placed, missing, room_type, first, last) in list(self.assignments.items()):
+            leaving = np.isin(placed, rows)
+            if not leaving.any():
+                continue
+            self.cells[placed[leaving], first:last] = 0
+            moved, short = self._occupy_free(room_type, int(leaving.sum()), first, last)
+            self.assignments[booking_id] = (
+                np.concatenate([placed[~leaving], moved]), missing + short, room_type, first, last,
+            )
+
+    def occupancy_by_night(self, days: int, room_type: str | None = None) -> dict:
+        days = max(1, min(days, self.horizon))
+        with self._lock:
+            mask = self._type_mask(room_type)
+            occupied = self.cells[mask, :days].sum(axis=0, dtype=np.int32)
+            for name, overflow in self.overflow.items():
+                if not room_type or name == room_type:
+                    occupied += overflow[:days]
+            sellable = int(mask.sum())
+        rates = occupied / max(sellable, 1)
+        return {
+            "start": self.start.isoformat(),
+            "sellable_rooms": sellable,
+            "nights": [
+                {
+                    "date": (self.start + timedelta(days=offset)).isoformat(),
+                    "occupied": count,
+                    "rate": round(rate * 100, 1),
+                }
+                for offset, (count, rate) in enumerate(zip(occupied.tolist(), rates.tolist()))
+            ],
+        }
+
+    def free_rooms(self, in_date: date, out_date: date, room_type: str | None = None) -> list[str]:
+        first, last = self._span(in_date, out_date)
+        with self._lock:
+            mask = self._type_mask(room_type).copy()
+            if first < last:
+                mask &= ~self.cells[:, first:last].any(axis=1)
+        return [self.room_numbers[row] for row in np.flatnonzero(mask)]
+
+    def pickup(self, in_date: date, out_date: date) -> list[dict]:
+        first, last = self._span(in_date, out_date)
+        nights = max(last - first, 0)
+        with self._lock:
+            mask = self.sellable
+            booked = np.bincount(
+                self.type_codes[mask],
+                weights=self.cells[mask, first:last].sum(axis=1),
+                minlength=len(self.type_names),
+            )
+            rooms = np.bincount(self.type_codes[mask], minlength=len(self.type_names))
+            for name, overflow in self.overflow.items():
+                if name in self.type_names:
+                    booked[self.type_names.index(name)] += overflow[first:last].sum()
+        capacity = rooms * nights
+        return [
+            {
+                "type": name,
+                "room_nights_sold": int(sold),
+                "room_nights_available": int(cap),
+                "occupancy": round(float(sold) / cap * 100, 1) if cap else 0.0,
+            }
+            for name, sold, cap in zip(self.type_names, booked.tolist(), capacity.tolist())
+        ]
+
+    def footprint(self) -> dict:
+        overflow_bytes = sum(arr.nbytes for arr in self.overflow.values())
+        index_bytes = self.room_ids.nbytes + self.type_codes.nbytes + self.sellable.nbytes
+        return {
+            "rooms": int(self.cells.shape[0]),
+            "nights": self.horizon,
+            "bookings_placed": len(self.assignments),
+            "cells_bytes": int(self.cells.nbytes),
+            "overflow_bytes": int(overflow_bytes),
+            "index_bytes": int(index_bytes),
+            "total_bytes": int(self.cells.nbytes + overflow_bytes + index_bytes),
+        }
+
+
+_matrix = None
+_matrix_lock = threading.Lock()
+_rebuild_lock = threading.Lock()
+
+
+def _is_current(matrix: OccupancyMatrix | None) -> bool:
+    return (
+        matrix is not None
+        and matrix.start == date.today()
+        and time.monotonic() - matrix.built_at <= OCCUPANCY_REFRESH_SECONDS
+    )
+
+
+def rebuild_occupancy() -> OccupancyMatrix:
+    global _matrix
+    rooms = room_repository.get_room_inventory()
+    bookings = booking_repository.get_active_booking_ranges()
+    matrix = OccupancyMatrix(rooms, bookings, start=date.today())
+    with _matrix_lock:
+        _matrix = matrix
+    return matrix
+
+
+def get_occupancy_matrix() -> OccupancyMatrix:
+    matrix = _matrix
+    if _is_current(matrix):
+        return matrix
+    with _rebuild_lock:
+        matrix = _matrix
+        if _is_current(matrix):
+            return matrix
+        return rebuild_occupancy()
+
+
+def invalidate_occupancy():
+    global _matrix
+    with _matrix_lock:
+        _matrix = None
+
+
+# The matrix is only touched once the write has committed (see after_commit).
+def _occupy(booking: dict):
+    matrix = _matrix
+    if matrix is not None:
+        matrix.add_booking(booking)
+
+
+def _vacate(booking: dict):
+    matrix = _matrix
+    if matrix is not None:
+        matrix.remove_booking(booking["booking_id"])
+
+
+def occupy_booking(booking: dict | None):
+    if booking and booking.get("status") in booking_repository.ACTIVE_BOOKING_STATUSES:
+        after_commit(lambda: _occupy(booking))
+
+
+def vacate_booking(booking: dict | None):
+    if booking:
+        after_commit(lambda: _vacate(booking))
+
+
+def sync_booking_status(booking: dict | None):
+    if booking and booking.get("status") in booking_repository.ACTIVE_BOOKING_STATUSES:
+        occupy_booking(booking)
+    else:
+        vacate_booking(booking)
+
+
+def _set_room_status(room: dict):
+    matrix = _matrix
+    if matrix is not None:
+        matrix.set_room_status(room["id"], room.get("status", "available"))
+
+
+def sync_room_status(room: dict | None):
+    if room:
+        after_commit(lambda: _set_room_status(room))
+
+
+def _matrix_or_500() -> OccupancyMatrix:
+    try:
+        return get_occupancy_matrix()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"message": f"Error building occupancy: {str(e)}"})
+
+
+def occupancy_report(days: int = 30, room_type: str = ""):
+    matrix = _matrix_or_500()
+    report = matrix.occupancy_by_night(days, room_type or None)
+    report["footprint"] = matrix.footprint()
+    return report
+
+
+def free_rooms_report(in_date: date, out_date: date, room_type: str = ""):
+    if out_date <= in_date:
+        raise HTTPException(status_code=400, detail={"message": "Check-out date must be after check-in date"})
+    matrix = _matrix_or_500()
+    return {
+        "in_date": in_date.isoformat(),
+        "out_date": out_date.isoformat(),
+        "rooms": matrix.free_rooms(in_date, out_date, room_type or None),
+    }
+
+
+def pickup_report(in_date: date, out_date: date):
+    if out_date <= in_date:
+        raise HTTPException(status_code=400, detail={"message": "End date must be after start date"})
+    matrix = _matrix_or_500()
+    return {"from": in_date.isoformat(), "to": out_date.isoformat(), "types": matrix.pickup(in_date, out_date)}
+
+
+def rebuild_report():
+    started = time.perf_counter()
+    try:
+        matrix = rebuild_occupancy()
+        build_ms = round((time.perf_counter() - started) * 1000, 2)
+        # The payload names this process, whose matrix is already fresh.
+        booking_repository.notify(OCCUPANCY_CHANNEL, INSTANCE_ID)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"message": f"Error building occupancy: {str(e)}"})
+    return {
+        "message": "Occupancy matrix rebuilt; every worker rebuilds on its next read",
+        "build_ms": build_ms,
+        "footprint": matrix.footprint(),
+    }
+
+
+_stop = threading.Event()
+_listener = None
+
+
+def _listen():
+    while not _stop.is_set():
+        conn = None
+        try:
+            conn = database_connection()
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {OCCUPANCY_CHANNEL}")
+            # A rebuild sent while we were not listening was never heard.
+            invalidate_occupancy()
+            while not _stop.is_set():
+                if select.select([conn], [], [], 1) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    if conn.notifies.pop(0).payload != INSTANCE_ID:
+                        invalidate_occupancy()
+        except Exception:
+            logger.exception("Occupancy listener lost its connection; retrying")
+            _stop.wait(LISTEN_RETRY_SECONDS)
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+
+def start_listener():
+    global _listener
+    if _listener is not None:
+        return
+    _stop.clear()
+    _listener = threading.Thread(target=_listen, name="occupancy-listener", daemon=True)
+    _listener.start()
+
+
+def stop_listener():
+    global _listener
+    _stop.set()
+    if _listener is not None:
+        _listener.join(LISTEN_RETRY_SECONDS)
+        _listener = None
+
+
+# Rebuilds from the database and tells the running API workers to do the same.
+if __name__ == "__main__":
+    print(rebuild_report())
@@ -1,50 +1,140 @@
-from datetime import datetime, timedelta
+import os
+import threading
+import time
 
 from fastapi import HTTPException
 
 from models.schemas import OTPRequest, OTPVerify
 from repository import otp_repository, user_repository
-from utility.otp import generate_otp
-from utility.security import hash_otp, verify_otp
+from service import job_service, user_cache_service
+from utility.otp import derive_otp, generate_nonce, generate_otp, otp_mac, otp_matches
 from utility.utility_email import send_otp_email
 
+OTP_TTL_SECONDS = float(os.getenv("OTP_TTL_SECONDS", 300))
+OTP_MAX_ATTEMPTS = int(os.getenv("OTP_MAX_ATTEMPTS", 5))
+# "postgres" works across workers; "memory" keeps codes in this process only,
+# so it suits a single worker that also runs the job queue.
+OTP_BACKEND = os.getenv("OTP_BACKEND", "postgres").lower()
+
+VERIFY_ERRORS = {
+    "missing": (400, "OTP NOT FOUND"),
+    "expired": (400, "OTP has expired"),
+    "locked": (429, "Too many attempts, please request a new OTP"),
+    "invalid": (400, "Invalid OTP"),
+}
+
+
+class PostgresOTPStore:
+    def save(self, email: str, otp: str):
+        otp_repository.save_code(email, otp_mac(email, otp), OTP_TTL_SECONDS)
+        # One pending purge at a time, due when this code lapses.
+        job_service.enqueue("purge_expired_otps", delay_seconds=OTP_TTL_SECONDS, unique_key="purge_expired_otps")
+
+    def verify(self, email: str, otp: str) -> str:
+        row = otp_repository.verify_code(email, otp_mac(email, otp), OTP_MAX_ATTEMPTS)
+        if row["matched"]:
+            return "verified"
+        if row["attempts"] is None:
+            return "missing"
+        if row["expired"]:
+            return "expired"
+        if row["attempts"] > OTP_MAX_ATTEMPTS:
+            return "locked"
+        return "invalid"
+
+    def purge(self) -> int:
+        return otp_repository.purge_expired_codes()
+
+
+class MemoryOTPStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._codes = {}
+
+    def save(self, email: str, otp: str):
+        with self._lock:
+            self._purge_locked()
+            code_mac = otp_mac(email, otp)
+            entry = self._codes.get(email)
+            # Saving the same code again (a re-run job) keeps its expiry and
+            # attempt count.
+            if entry is None or entry[0] != code_mac:
+                self._codes[email] = [code_mac, time.monotonic() + OTP_TTL_SECONDS, 0]
+
+    def verify(self, email: str, otp: str) -> str:
+        with self._lock:
+            entry = self._codes.get(email)
+            if entry is None:
+                return "missing"
+            code_mac, expires_at, attempts = entry
+            if time.monotonic() >= expires_at:
+                del self._codes[email]
+                return "expired"
+            if attempts >= OTP_MAX_ATTEMPTS:
+                entry[2] += 1
+                return "locked"
+            if not otp_matches(email, otp, code_mac):
+                entry[2] += 1
+                return "invalid"
+            del self._codes[email]
+        user_repository.mark_verified(email)
+        return "verified"
+
+    def purge(self) -> int:
+        with self._lock:
+            return self._purge_locked()
+
+    def _purge_locked(self) -> int:
+        now = time.monotonic()
+        expired = [email for email, (_, expires_at, _) in self._codes.items() if expires_at <= now]
+        for email in expired:
+            del self._codes[email]
+        return len(expired)
 
-def send_otp(data: OTPRequest):
-    otp = generate_otp()
-    hashed_otp = hash_otp(otp)
-    expires_at = datetime.utcnow() + timedelta(minutes=5)
 
+OTP_STORES = {"postgres": PostgresOTPStore, "memory": MemoryOTPStore}
+if OTP_BACKEND not in OTP_STORES:
+    raise RuntimeError(f"Unknown OTP_BACKEND {OTP_BACKEND!r}")
+otp_store = OTP_STORES[OTP_BACKEND]()
+
+
+# The code is derived, stored and mailed by the send_otp_email job, so the
+# request only writes the queue row. Repeat requests while one is queued
+# collapse into it.
+def send_otp(data: OTPRequest):
     try:
-        otp_repository.delete_otps_for_email(data.email)
-        otp_repository.save_otp(data.email, hashed_otp, expires_at)
+        job_service.enqueue(
+            "send_otp_email",
+            {"email": data.email, "nonce": generate_nonce()},
+            unique_key=f"send_otp_email:{data.email}",
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail={"message": "Server error", "error": str(e)})
 
-    try:
-        send_otp_email(data.email, otp)
-    except Exception:
-        raise HTTPException(status_code=500, detail={"message": "Failed to send OTP email"})
-
     return {"message": "OTP sent to email"}
 
 
-def verify_otp_code(data: OTPVerify):
-    record = otp_repository.get_latest_otp(data.email)
-    if not record:
-        raise HTTPException(status_code=400, detail={"message": "OTP NOT FOUND"})
+def deliver_otp(email: str, nonce: str | None = None):
+    # Jobs queued before nonces were added get a fresh random code.
+    otp = derive_otp(email, nonce) if nonce else generate_otp()
+    otp_store.save(email, otp)
+    send_otp_email(email, otp)
 
-    if record.get("used"):
-        raise HTTPException(status_code=400, detail={"message": "OTP has already been used"})
 
-    expires_at = record["expires_at"]
-    if datetime.utcnow() > expires_at:
-        otp_repository.mark_otp_used(record["id"])
-        raise HTTPException(status_code=400, detail={"message": "OTP has expired"})
+def purge_expired_otps() -> int:
+    return otp_store.purge()
 
-    if not verify_otp(data.otp, record["otp_hash"]):
-        raise HTTPException(status_code=400, detail={"message": "Invalid OTP"})
 
-    otp_repository.mark_otp_used(record["id"])
-    user_repository.mark_verified(data.email)
+def verify_otp_code(data: OTPVerify):
+    try:
+        outcome = otp_store.verify(data.email, data.otp)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"message": "Server error", "error": str(e)})
+
+    if outcome == "verified":
+        user_cache_service.invalidate_profile(data.email)
+    if outcome in VERIFY_ERRORS:
+        status_code, message = VERIFY_ERRORS[outcome]
+        raise HTTPException(status_code=status_code, detail={"message": message})
 
     return {"message": "OTP verified successfully", "account_verified": True}
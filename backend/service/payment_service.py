@@ -1,9 +1,13 @@
 from fastapi import HTTPException, Request, Response
 
+from configuration.settings import unit_of_work
 from helper.generate_token import generate_access_token
 from models.schemas import PaymentRequest
-from repository.booking_repository import create_booking
+from repository.booking_repository import RoomUnavailableError, create_booking
 from repository.payment_repository import create_payment
+from service.availability_service import record_booking
+from service.occupancy_service import occupy_booking
+from service.pricing_service import validate_payment_amount
 from utility.cookies import set_access_cookie
 
 
@@ -29,8 +33,15 @@ def process_payment(email: str, data: PaymentRequest):
     first_name = data.booking_data.get("first_name") or data.booking_data.get("firstName") or ""
     last_name = data.booking_data.get("last_name") or data.booking_data.get("lastName") or ""
     phone = data.booking_data.get("phone") or ""
-    adult = int(data.booking_data.get("adult") or data.booking_data.get("adults") or 1)
-    children = int(data.booking_data.get("children") or 0)
+    try:
+        adult = int(data.booking_data.get("adult") or data.booking_data.get("adults") or 1)
+        children = int(data.booking_data.get("children") or 0)
+        rooms = int(data.booking_data.get("rooms") or data.booking_data.get("roomQuantity") or 1)
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=400,
+            detail={"message": "Guests and rooms must be whole numbers"},
+        )
     booking_status = "pending" if data.payment_method == "cash-front-desk" else "confirmed"
 
     if not all([in_date, out_date, room_type]):
@@ -39,34 +50,42 @@ def process_payment(email: str, data: PaymentRequest):
             detail={"message": "Booking dates and room type are required"},
         )
 
+    validate_payment_amount(room_type, in_date, out_date, rooms, data.total_amount)
+
     safe_payment_data = _sanitize_payment_data(data.payment_data or {})
 
     try:
-        booking = create_booking(
-            user_email,
-            room_type,
-            in_date,
-            out_date,
-            booking_status,
-            guest_name=f"{first_name} {last_name}".strip(),
-            phone=phone,
-            guests=adult + children,
-        )
-        method_description = _payment_method_description(data.payment_method, safe_payment_data)
-        payment_status = "pending" if data.payment_method == "cash-front-desk" else "completed"
-        payment = create_payment(
-            booking["booking_id"],
-            user_email,
-            data.total_amount,
-            method_description,
-            payment_status,
-        )
+        with unit_of_work():
+            booking = create_booking(
+                user_email,
+                room_type,
+                in_date,
+                out_date,
+                booking_status,
+                guest_name=f"{first_name} {last_name}".strip(),
+                phone=phone,
+                guests=adult + children,
+                rooms=rooms,
+            )
+            method_description = _payment_method_description(data.payment_method, safe_payment_data)
+            payment_status = "pending" if data.payment_method == "cash-front-desk" else "completed"
+            payment = create_payment(
+                booking["booking_id"],
+                user_email,
+                data.total_amount,
+                method_description,
+                payment_status,
+            )
+    except RoomUnavailableError as e:
+        raise HTTPException(status_code=409, detail={"message": str(e)})
     except Exception:
         raise HTTPException(
             status_code=500,
             detail={"message": "Server error"},
         )
 
+    record_booking(booking)
+    occupy_booking(booking)
     return {
         "message": "Payment processed successfully",
         "booking": booking,
@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+from fastapi import HTTPException
+
+from repository import room_repository
+
+TAX_RATE = Decimal(os.getenv("TAX_RATE", "0.12"))
+SERVICE_FEE = Decimal(os.getenv("SERVICE_FEE", "25"))
+PRICING_CACHE_SECONDS = float(os.getenv("PRICING_CACHE_SECONDS", 60))
+
+# Friday and Saturday nights are charged price_weekend (date.weekday()).
+WEEKEND_WEEKDAYS = (4, 5)
+
+MAX_QUOTE_NIGHTS = 366
+
+_rates = None
+_rates_loaded_at = 0.0
+_rates_lock = threading.Lock()
+
+
+def _to_cents(value) -> int:
+    return int((Decimal(str(value or 0)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def _from_cents(cents: int) -> float:
+    return float(Decimal(int(cents)) / 100)
+
+
+def _load_rates():
+    global _rates, _rates_loaded_at
+    if _rates is not None and time.monotonic() - _rates_loaded_at <= PRICING_CACHE_SECONDS:
+        return _rates
+    with _rates_lock:
+        if _rates is None or time.monotonic() - _rates_loaded_at > PRICING_CACHE_SECONDS:
+            rows = room_repository.get_room_type_rates()
+            types = [row["type"] for row in rows]
+            base = np.array([_to_cents(row["price_base"]) for row in rows], dtype=np.int64)
+            weekend = np.array([_to_cents(row["price_weekend"]) for row in rows], dtype=np.int64)
+            # A room without a weekend rate is charged its base rate every night.
+            weekend = np.where(weekend > 0, weekend, base)
+            _rates = (types, base, weekend)
+            _rates_loaded_at = time.monotonic()
+    return _rates
+
+
+def invalidate_rates():
+    global _rates
+    _rates = None
+
+
+def compute_quotes(types: list, base_cents, weekend_cents, in_date: date, out_date: date, rooms: int = 1) -> list:
+    # Rates for every (type, night) pair come out of one np.where, so quoting
+    # a long stay across all room types costs a single pass over the grid.
+    nights = np.arange(in_date.toordinal(), out_date.toordinal())
+    weekday = (nights - 1) % 7
+    is_weekend = np.isin(weekday, WEEKEND_WEEKDAYS)
+    nightly = np.where(is_weekend[np.newaxis, :], weekend_cents[:, np.newaxis], base_cents[:, np.newaxis])
+    subtotal = nightly.sum(axis=1) * rooms
+
+    dates = [(in_date + timedelta(days=offset)).isoformat() for offset in range(len(nights))]
+    weekend_flags = is_weekend.tolist()
+    quotes = []
+    for name, per_night, sub in zip(types, nightly.tolist(), subtotal.tolist()):
+        tax = int((Decimal(sub) * TAX_RATE).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+        fee = _to_cents(SERVICE_FEE)
+        quotes.append(
+            {
+                "type": name,
+                "nights": [
+                    {"date": d, "rate": _from_cents(rate), "weekend": weekend}
+                    for d, rate, weekend in zip(dates, per_night, weekend_flags)
+                ],
+                "weekend_nights": int(is_weekend.sum()),
+                "rooms": rooms,
+                "subtotal": _from_cents(sub),
+                "tax": _from_cents(tax),
+                "tax_rate": float(TAX_RATE),
+                "service_fee": _from_cents(fee),
+                "total": _from_cents(sub + tax + fee),
+            }
+        )
+    return quotes
+
+
+def _check_range(in_date: date, out_date: date, rooms: int):
+    if out_date <= in_date:
+        raise HTTPException(status_code=400, detail={"message": "Check-out date must be after check-in date"})
+    if (out_date - in_date).days > MAX_QUOTE_NIGHTS:
+        raise HTTPException(status_code=400, detail={"message": f"Stays are limited to {MAX_QUOTE_NIGHTS} nights"})
+    if rooms < 1:
+        raise HTTPException(status_code=400, detail={"message": "At least one room is required"})
+
+
+def _quotes_for(room_type: str, in_date: date, out_date: date, rooms: int) -> list:
+    try:
+        types, base, weekend = _load_rates()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"message": f"Error fetching rates: {str(e)}"})
+    if room_type:
+        if room_type not in types:
+            raise HTTPException(status_code=404, detail={"message": "Room type not found"})
+        i = types.index(room_type)
+        types, base, weekend = [room_type], base[i:i + 1], weekend[i:i + 1]
+    return compute_quotes(types, base, weekend, in_date, out_date, rooms)
+
+
+def get_quote(room_type: str, in_date: date, out_date: date, rooms: int = 1):
+    _check_range(in_date, out_date, rooms)
+    return {
+        "in_date": in_date.isoformat(),
+        "out_date": out_date.isoformat(),
+        "nights": (out_date - in_date).days,
+        "quotes": _quotes_for(room_type, in_date, out_date, rooms),
+    }
+
+
+def validate_payment_amount(room_type: str, in_date, out_date, rooms: int, amount: Decimal) -> dict:
+    try:
+        in_date = in_date if isinstance(in_date, date) else date.fromisoformat(str(in_date))
+        out_date = out_date if isinstance(out_date, date) else date.fromisoformat(str(out_date))
+    except ValueError:
+        raise HTTPException(status_code=400, detail={"message": "Booking dates must be YYYY-MM-DD"})
+    _check_range(in_date, out_date, rooms)
+
+    quote = _quotes_for(room_type, in_date, out_date, rooms)[0]
+    # The client adds optional extras (add-ons, cash handling) on top of the
+    # stay, so only an amount below the server quote is rejected.
+    if Decimal(str(amount)) + Decimal("0.01") < Decimal(str(quote["total"])):
+        raise HTTPException(
+            status_code=400,
+            detail={"message": "Payment amount does not cover the stay", "expected_minimum": quote["total"]},
+        )
+    return quote
@@ -0,0 +1,193 @@
+import asyncio
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+
+from repository import room_repository
+from service.catalog_version_service import current_version, get_versions_async
+from utility.row_mappers import RowMapper
+
+# Rooms change a few times a day, so GET /rooms is answered from an in-process
+# catalog. It is rebuilt when the "rooms" catalog version moves, and in any
+# case after ROOM_CATALOG_REFRESH_SECONDS.
+ROOM_CATALOG_REFRESH_SECONDS = float(os.getenv("ROOM_CATALOG_REFRESH_SECONDS", 30))
+
+SORT_KEYS = {
+    "price_asc": lambda r: (float(r["price_base"]), r["id"]),
+    "price_desc": lambda r: (-float(r["price_base"]), r["id"]),
+    "capacity_desc": lambda r: (-(r.get("capacity") or 0), float(r["price_base"]), r["id"]),
+    "rating_desc": lambda r: (-float(r.get("rating") or 0), float(r["price_base"]), r["id"]),
+    "room_number": lambda r: (r["room_number"], r["id"]),
+}
+
+
+ROOM_SUMMARIES = RowMapper(
+    "room_summaries",
+    {
+        "id": "{id}",
+        "room_number": "{room_number}",
+        "name": "{name}",
+        "type": "{type}",
+        "description": "{description}",
+        "price": "float({price_base})",
+        "price_weekend": "float({price_weekend} or 0)",
+        "capacity": "{capacity}",
+        "size_sqm": "{size_sqm}",
+        "bed_type": "{bed_type}",
+        "image": "{images}[0] if {images} else ''",
+        "amenities": "{amenities} or []",
+        "status": "{status}",
+        "floor": "{floor}",
+        "rating": "float({rating} or 0)",
+        "reviews": "{reviews_count}",
+    },
+)
+
+
+def room_detail(room: dict):
+    return {
+        "id": room["id"],
+        "room_number": room["room_number"],
+        "name": room["name"],
+        "type": room["type"],
+        "description": room.get("description", ""),
+        "price": float(room["price_base"]),
+        "price_weekend": float(room.get("price_weekend", 0) or 0),
+        "capacity": room.get("capacity", 2),
+        "size_sqm": room.get("size_sqm", 0),
+        "bed_type": room.get("bed_type", ""),
+        "images": room.get("images") or [],
+        "amenities": room.get("amenities") or [],
+        "status": room.get("status", "available"),
+        "floor": room.get("floor", 1),
+        "rating": float(room.get("rating", 0) or 0),
+        "reviews": room.get("reviews_count", 0),
+    }
+
+
+# Every filter value (type, amenity, floor, capacity threshold) maps to a
+# Python int used as a bitset over rooms sorted by price, so a query is a
+# handful of ANDs and a facet count is int.bit_count(). Because of the price
+# ordering a price range is a contiguous run of bits found by bisection.
+class RoomCatalog:
+    def __init__(self, columns: tuple[str, ...], rows: list, version: int | None = None):
+        records = [dict(zip(columns, row)) for row in rows]
+        order = sorted(range(len(rows)), key=lambda i: SORT_KEYS["price_asc"](records[i]))
+        self.summaries = ROOM_SUMMARIES(columns, [rows[i] for i in order])
+        rows = [records[i] for i in order]
+        self.rows = rows
+        self.by_id = {r["id"]: r for r in rows}
+        self.prices = [float(r["price_base"]) for r in rows]
+        self.all_bits = (1 << len(rows)) - 1
+        self.version = version
+        self.built_at = time.monotonic()
+
+        self.type_bits = {}
+        self.amenity_bits = {}
+        self.floor_bits = {}
+        for i, r in enumerate(rows):
+            bit = 1 << i
+            self.type_bits[r["type"]] = self.type_bits.get(r["type"], 0) | bit
+            # floor is nullable; a room without one matches no floor filter.
+            floor = r.get("floor")
+            if floor is not None:
+                self.floor_bits[floor] = self.floor_bits.get(floor, 0) | bit
+            for amenity in set(r.get("amenities") or []):
+                self.amenity_bits[amenity] = self.amenity_bits.get(amenity, 0) | bit
+
+        self.capacities = sorted({r.get("capacity") or 0 for r in rows})
+        self.capacity_at_least = {}
+        running = 0
+        for capacity in reversed(self.capacities):
+            for i, r in enumerate(rows):
+                if (r.get("capacity") or 0) == capacity:
+                    running |= 1 << i
+            self.capacity_at_least[capacity] = running
+
+        self.orders = {name: sorted(range(len(rows)), key=lambda i, k=key: k(rows[i])) for name, key in SORT_KEYS.items()}
+
+    def match(
+        self,
+        room_type: str = "",
+        min_price: float = 0,
+        max_price: float = 99999,
+        amenities: list[str] | None = None,
+        min_capacity: int = 0,
+        floor: int | None = None,
+    ) -> int:
+        mask = self.all_bits
+        if room_type:
+            mask &= self.type_bits.get(room_type, 0)
+        if min_price > 0 or max_price < 99999:
+            lo = bisect_left(self.prices, min_price) if min_price > 0 else 0
+            hi = bisect_right(self.prices, max_price) if max_price < 99999 else len(self.prices)
+            mask &= ((1 << hi) - 1) & ~((1 << lo) - 1)
+        for amenity in amenities or []:
+            mask &= self.amenity_bits.get(amenity, 0)
+        if min_capacity:
+            at = bisect_left(self.capacities, min_capacity)
+            mask &= self.capacity_at_least[self.capacities[at]] if at < len(self.capacities) else 0
+        if floor is not None:
+            mask &= self.floor_bits.get(floor, 0)
+        return mask
+
+    def rooms(self, mask: int, sort: str = "price_asc") -> list[dict]:
+        if mask == self.all_bits and sort == "price_asc":
+            return list(self.summaries)
+        bits = bin(mask)[:1:-1]
+        return [self.summaries[i] for i in self.orders[sort] if i < len(bits) and bits[i] == "1"]
+
+    def facets(self, mask: int) -> dict:
+        matched = [self.prices[i] for i, bit in enumerate(bin(mask)[:1:-1]) if bit == "1"]
+        return {
+            "total": mask.bit_count(),
+            "types": {name: (mask & bits).bit_count() for name, bits in sorted(self.type_bits.items())},
+            "amenities": {name: (mask & bits).bit_count() for name, bits in sorted(self.amenity_bits.items())},
+            "floors": {str(floor): (mask & bits).bit_count() for floor, bits in sorted(self.floor_bits.items())},
+            "price": {"min": min(matched), "max": max(matched)} if matched else {"min": None, "max": None},
+        }
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+_async_catalog_lock = None
+
+
+def _is_fresh(catalog: RoomCatalog | None, version: int | None) -> bool:
+    return (
+        catalog is not None
+        and catalog.version == version
+        and time.monotonic() - catalog.built_at <= ROOM_CATALOG_REFRESH_SECONDS
+    )
+
+
+def get_catalog() -> RoomCatalog:
+    global _catalog
+    version = current_version("rooms")
+    catalog = _catalog
+    if _is_fresh(catalog, version):
+        return catalog
+    with _catalog_lock:
+        if not _is_fresh(_catalog, version):
+            _catalog = RoomCatalog(*room_repository.get_all_rooms(), version)
+        return _catalog
+
+
+async def get_catalog_async() -> RoomCatalog:
+    global _catalog, _async_catalog_lock
+    version = current_version("rooms", await get_versions_async())
+    catalog = _catalog
+    if _is_fresh(catalog, version):
+        return catalog
+    if _async_catalog_lock is None:
+        _async_catalog_lock = asyncio.Lock()
+    async with _async_catalog_lock:
+        if not _is_fresh(_catalog, version):
+            _catalog = RoomCatalog(*await room_repository.get_all_rooms_async(), version)
+        return _catalog
+
+
+def invalidate_catalog():
+    global _catalog
+    _catalog = None
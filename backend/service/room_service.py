@@ -2,61 +2,98 @@ from fastapi import HTTPException
 
 from models.schemas import RoomCreate, RoomStatusUpdate
 from repository import room_repository
+from service.availability_service import invalidate_availability
+from service.catalog_version_service import invalidate_versions
+from service.occupancy_service import invalidate_occupancy, sync_room_status
+from service.room_catalog_service import (
+    SORT_KEYS,
+    RoomCatalog,
+    get_catalog,
+    get_catalog_async,
+    invalidate_catalog,
+    room_detail,
+)
+from service.pricing_service import invalidate_rates
 
 
-def list_rooms(type_filter: str = "", min_price: float = 0, max_price: float = 99999, amenity: str = ""):
+SORT_OPTIONS = tuple(SORT_KEYS)
+
+
+def _check_sort(sort: str):
+    if sort not in SORT_KEYS:
+        raise HTTPException(status_code=400, detail={"message": f"sort must be one of: {', '.join(SORT_OPTIONS)}"})
+
+
+def _search(catalog: RoomCatalog, sort: str, with_facets: bool, **filters):
+    mask = catalog.match(**filters)
+    rooms = catalog.rooms(mask, sort)
+    if not with_facets:
+        return rooms
+    return {"total": len(rooms), "rooms": rooms, "facets": catalog.facets(mask)}
+
+
+def list_rooms(
+    type_filter: str = "",
+    min_price: float = 0,
+    max_price: float = 99999,
+    amenities: list[str] | None = None,
+    min_capacity: int = 0,
+    floor: int | None = None,
+    sort: str = "price_asc",
+    with_facets: bool = False,
+):
+    _check_sort(sort)
+    try:
+        catalog = get_catalog()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"message": f"Error fetching rooms: {str(e)}"})
+    return _search(
+        catalog, sort, with_facets, room_type=type_filter, min_price=min_price, max_price=max_price,
+        amenities=amenities, min_capacity=min_capacity, floor=floor,
+    )
+
+
+async def list_rooms_async(
+    type_filter: str = "",
+    min_price: float = 0,
+    max_price: float = 99999,
+    amenities: list[str] | None = None,
+    min_capacity: int = 0,
+    floor: int | None = None,
+    sort: str = "price_asc",
+    with_facets: bool = False,
+):
+    _check_sort(sort)
     try:
-        rooms = room_repository.get_all_rooms(type_filter, min_price, max_price, amenity)
+        catalog = await get_catalog_async()
     except Exception as e:
         raise HTTPException(status_code=500, detail={"message": f"Error fetching rooms: {str(e)}"})
-    return [
-        {
-            "id": r["id"],
-            "room_number": r["room_number"],
-            "name": r["name"],
-            "type": r["type"],
-            "description": r.get("description", ""),
-            "price": float(r["price_base"]),
-            "price_weekend": float(r.get("price_weekend", 0) or 0),
-            "capacity": r.get("capacity", 2),
-            "size_sqm": r.get("size_sqm", 0),
-            "bed_type": r.get("bed_type", ""),
-            "image": (r.get("images") or [None])[0] if r.get("images") else "",
-            "amenities": r.get("amenities") or [],
-            "status": r.get("status", "available"),
-            "floor": r.get("floor", 1),
-            "rating": float(r.get("rating", 0) or 0),
-            "reviews": r.get("reviews_count", 0),
-        }
-        for r in rooms
-    ]
+    return _search(
+        catalog, sort, with_facets, room_type=type_filter, min_price=min_price, max_price=max_price,
+        amenities=amenities, min_capacity=min_capacity, floor=floor,
+    )
 
 
 def get_room(room_id: int):
     try:
-        room = room_repository.get_room_by_id(room_id)
+        # Rooms created by another worker are not in this worker's catalog
+        # until its next refresh, so a miss still goes to the database.
+        room = get_catalog().by_id.get(room_id) or room_repository.get_room_by_id(room_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"message": f"Error fetching room: {str(e)}"})
+    if not room:
+        raise HTTPException(status_code=404, detail={"message": "Room not found"})
+    return room_detail(room)
+
+
+async def get_room_async(room_id: int):
+    try:
+        room = (await get_catalog_async()).by_id.get(room_id) or await room_repository.get_room_by_id_async(room_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail={"message": f"Error fetching room: {str(e)}"})
     if not room:
         raise HTTPException(status_code=404, detail={"message": "Room not found"})
-    return {
-        "id": room["id"],
-        "room_number": room["room_number"],
-        "name": room["name"],
-        "type": room["type"],
-        "description": room.get("description", ""),
-        "price": float(room["price_base"]),
-        "price_weekend": float(room.get("price_weekend", 0) or 0),
-        "capacity": room.get("capacity", 2),
-        "size_sqm": room.get("size_sqm", 0),
-        "bed_type": room.get("bed_type", ""),
-        "images": room.get("images") or [],
-        "amenities": room.get("amenities") or [],
-        "status": room.get("status", "available"),
-        "floor": room.get("floor", 1),
-        "rating": float(room.get("rating", 0) or 0),
-        "reviews": room.get("reviews_count", 0),
-    }
+    return room_detail(room)
 
 
 def create_new_room(data: RoomCreate):
@@ -64,6 +101,11 @@ def create_new_room(data: RoomCreate):
         room = room_repository.create_room(data.model_dump())
     except Exception as e:
         raise HTTPException(status_code=500, detail={"message": f"Error creating room: {str(e)}"})
+    invalidate_availability()
+    invalidate_occupancy()
+    invalidate_rates()
+    invalidate_catalog()
+    invalidate_versions()
     return {"message": "Room created successfully", "room": {"id": room["id"], "name": room["name"]}}
 
 
@@ -74,6 +116,11 @@ def change_room_status(room_id: int, data: RoomStatusUpdate):
         raise HTTPException(status_code=500, detail={"message": f"Error updating room: {str(e)}"})
     if not room:
         raise HTTPException(status_code=404, detail={"message": "Room not found"})
+    invalidate_availability()
+    sync_room_status(room)
+    invalidate_rates()
+    invalidate_catalog()
+    invalidate_versions()
     return {"message": "Room status updated", "status": room["status"]}
 
 
@@ -2,27 +2,30 @@ from fastapi import HTTPException
 
 from models.schemas import TaskCreate, TaskStatusUpdate, ChecklistToggle, ClockInOut
 from repository import staff_repository
+from utility.row_mappers import RowMapper
+
+TASK_ROWS = RowMapper(
+    "task_rows",
+    {
+        "id": "{id}",
+        "title": "{title}",
+        "description": "{description}",
+        "priority": "{priority}",
+        "status": "{status}",
+        "assignedTo": "{assigned_to}",
+        "room": "{room_number}",
+        "department": "{department}",
+        "dueTime": "{due_time}",
+    },
+)
 
 
 def list_tasks(assigned_to: str = ""):
     try:
-        tasks = staff_repository.get_tasks(assigned_to)
+        columns, tasks = staff_repository.get_tasks(assigned_to)
     except Exception as e:
         raise HTTPException(status_code=500, detail={"message": f"Error fetching tasks: {str(e)}"})
-    return [
-        {
-            "id": t["id"],
-            "title": t["title"],
-            "description": t.get("description", ""),
-            "priority": t.get("priority", "medium"),
-            "status": t.get("status", "pending"),
-            "assignedTo": t.get("assigned_to", ""),
-            "room": t.get("room_number", ""),
-            "department": t.get("department", ""),
-            "dueTime": t.get("due_time", ""),
-        }
-        for t in tasks
-    ]
+    return TASK_ROWS(columns, tasks)
 
 
 def create_new_task(data: TaskCreate):
@@ -0,0 +1,107 @@
+import logging
+import os
+import select
+import threading
+
+from configuration.settings import database_connection
+from repository import user_repository
+from utility.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Profiles (name, role, phone, verified; never the password hash) for /me and
+# get_authenticated_user. A trigger on users NOTIFYs user_profile_changed at
+# commit and every worker's listener drops the entry; the TTL bounds
+# staleness if a notification is ever missed.
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", 10000))
+PROFILE_CACHE_SECONDS = float(os.getenv("PROFILE_CACHE_SECONDS", 300))
+PROFILE_CHANNEL = "user_profile_changed"
+LISTEN_RETRY_SECONDS = 5
+
+_profiles = TTLCache(PROFILE_CACHE_SIZE, PROFILE_CACHE_SECONDS)
+_listening = threading.Event()
+_stop = threading.Event()
+_listener = None
+# Bumped on every invalidation. A read that raced with one does not cache
+# what it fetched, as the row may predate the change.
+_generation = 0
+
+
+def get_profile(email: str) -> dict | None:
+    profile = _profiles.get(email)
+    if profile is not None:
+        return profile
+    generation = _generation
+    profile = user_repository.get_user_profile(email)
+    if profile is None:
+        return None
+    profile = dict(profile)
+    # Without the listener nothing would tell us about other workers' writes.
+    if _listening.is_set() and generation == _generation:
+        _profiles.set(email, profile)
+    return profile
+
+
+def _evict(email: str | None = None):
+    global _generation
+    _generation += 1
+    if email is None:
+        _profiles.clear()
+    else:
+        _profiles.pop(email)
+
+
+# Drops this worker's copy right away; other workers hear about the change
+# from the trigger once the write commits.
+def invalidate_profile(*emails: str):
+    for email in emails:
+        if email:
+            _evict(email)
+
+
+def _listen():
+    while not _stop.is_set():
+        conn = None
+        try:
+            conn = database_connection()
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {PROFILE_CHANNEL}")
+            # Changes made while we were not listening were never heard.
+            _evict()
+            _listening.set()
+            while not _stop.is_set():
+                if select.select([conn], [], [], 1) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    _evict(conn.notifies.pop(0).payload)
+        except Exception:
+            logger.exception("Profile cache listener lost its connection; retrying")
+            _stop.wait(LISTEN_RETRY_SECONDS)
+        finally:
+            _listening.clear()
+            _evict()
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+
+def start_listener():
+    global _listener
+    if _listener is not None or PROFILE_CACHE_SIZE <= 0:
+        return
+    _stop.clear()
+    _listener = threading.Thread(target=_listen, name="profile-cache-listener", daemon=True)
+    _listener.start()
+
+
+def stop_listener():
+    global _listener
+    _stop.set()
+    if _listener is not None:
+        _listener.join(LISTEN_RETRY_SECONDS)
+        _listener = None
+
@@ -2,6 +2,7 @@ from fastapi import HTTPException, Request
 
 from models.schemas import ProfileUpdate
 from repository.user_repository import email_exists, get_user_credentials, get_user_details, update_user_profile
+from service import user_cache_service
 from utility.security import hash_password, verify_password
 
 
@@ -75,6 +76,7 @@ def update_profile(email: str, data: ProfileUpdate):
         update_user_profile(email, fields)
     except Exception:
         raise HTTPException(status_code=500, detail={"message": "Server error"})
+    user_cache_service.invalidate_profile(email, fields.get("email"))
 
     return {"message": "Profile updated successfully"}
 
@@ -86,3 +88,12 @@ def get_history(email: str):
         return get_user_booking_history(email)
     except Exception:
         raise HTTPException(status_code=500, detail={"message": "Server error"})
+
+
+async def get_history_async(email: str):
+    from repository.booking_repository import get_user_booking_history_async
+
+    try:
+        return await get_user_booking_history_async(email)
+    except Exception:
+        raise HTTPException(status_code=500, detail={"message": "Server error"})
@@ -0,0 +1,103 @@
+import time
+
+import pytest
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+from configuration.settings import ConnectionPool
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+def make_pool(**kwargs):
+    opened = []
+
+    def connect():
+        conn = FakeConnection()
+        opened.append(conn)
+        return conn
+
+    options = {"min_size": 0, "max_size": 2, "max_idle": 300, "health_check_after": 300, "timeout": 0.05}
+    options.update(kwargs)
+    return ConnectionPool(connect=connect, **options), opened
+
+
+def test_idle_connection_is_reused():
+    pool, opened = make_pool()
+    conn = pool.getconn()
+    pool.putconn(conn)
+
+    assert pool.getconn() is conn
+    assert len(opened) == 1
+
+
+def test_getconn_times_out_when_pool_is_exhausted():
+    pool, _ = make_pool(max_size=1)
+    pool.getconn()
+
+    started = time.monotonic()
+    with pytest.raises(PoolError):
+        pool.getconn()
+
+    assert time.monotonic() - started >= 0.05
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_open_transaction_is_rolled_back_on_return():
+    pool, _ = make_pool()
+    conn = pool.getconn()
+    conn.status = extensions.TRANSACTION_STATUS_INTRANS
+    pool.putconn(conn)
+
+    assert conn.rollbacks == 1
+    assert not conn.closed
+    assert pool.stats()["idle"] == 1
+
+
+def test_connection_in_unknown_state_is_discarded():
+    pool, _ = make_pool()
+    conn = pool.getconn()
+    conn.status = extensions.TRANSACTION_STATUS_UNKNOWN
+    pool.putconn(conn)
+
+    assert conn.closed
+    assert pool.stats()["size"] == 0
+    assert pool.getconn() is not conn
+
+
+def test_stale_idle_connections_are_reaped_down_to_min_size():
+    pool, _ = make_pool(min_size=1, max_size=3, max_idle=0.01)
+    first, second = pool.getconn(), pool.getconn()
+    pool.putconn(first)
+    time.sleep(0.02)
+    pool.putconn(second)
+
+    assert first.closed
+    assert not second.closed
+    assert pool.stats()["size"] == 1
+
+
+def test_close_closes_idle_connections_and_rejects_checkouts():
+    pool, _ = make_pool()
+    conn = pool.getconn()
+    pool.putconn(conn)
+    pool.close()
+
+    assert conn.closed
+    with pytest.raises(PoolError):
+        pool.getconn()
@@ -0,0 +1,37 @@
+import io
+
+import pytest
+
+from repository import import_repository
+from service import import_service
+
+HEADER = "user_email,room_type,in_date,out_date,status\n"
+
+
+@pytest.fixture(autouse=True)
+def room_types(monkeypatch):
+    monkeypatch.setattr(import_repository, "get_room_types", lambda: {"Deluxe"})
+
+
+def test_booking_rows_with_unknown_status_are_rejected():
+    body = io.BytesIO(
+        (
+            HEADER
+            + "a@example.com,Deluxe,2026-01-01,2026-01-03,checked-out\n"
+            + "b@example.com,Deluxe,2026-01-01,2026-01-03,paid\n"
+            + "c@example.com,Deluxe,2026-01-01,2026-01-03,\n"
+        ).encode()
+    )
+
+    report = import_service.import_bookings(body, "csv", dry_run=True)
+
+    assert report["valid"] == 2
+    assert report["rejected"] == 1
+    assert report["errors"][0]["line"] == 3
+    assert "status" in report["errors"][0]["errors"][0]
+
+
+def test_copy_lines_keep_empty_and_backslash_n_strings_apart_from_null():
+    line = import_service._copy_line((1, None, "", "\\N", 'say "hi"', ["wifi", "tv"]))
+
+    assert line == '"1",,"","\\N","say ""hi""","{""wifi"",""tv""}"\n'
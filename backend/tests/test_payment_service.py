@@ -0,0 +1,16 @@
+import pytest
+from fastapi import HTTPException
+
+from models.schemas import PaymentRequest
+from service.payment_service import process_payment
+
+
+@pytest.mark.parametrize("field, value", [("rooms", "two"), ("rooms", [1]), ("adults", "many"), ("children", "1.5")])
+def test_non_numeric_guest_or_room_counts_are_rejected(field, value):
+    booking = {"in_date": "2030-01-01", "out_date": "2030-01-02", "room_type": "Deluxe", field: value}
+    data = PaymentRequest(booking_data=booking, payment_method="paypal", total_amount=100)
+
+    with pytest.raises(HTTPException) as error:
+        process_payment("guest@example.com", data)
+
+    assert error.value.status_code == 400
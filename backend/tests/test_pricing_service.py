@@ -0,0 +1,62 @@
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from service import pricing_service
+
+# 2026-03-05 is a Thursday: Thursday night at the base rate, Friday and
+# Saturday nights at the weekend rate.
+CHECK_IN = date(2026, 3, 5)
+CHECK_OUT = date(2026, 3, 8)
+
+
+@pytest.fixture(autouse=True)
+def rates(monkeypatch):
+    rates = (["Deluxe"], np.array([10000], dtype=np.int64), np.array([15000], dtype=np.int64))
+    monkeypatch.setattr(pricing_service, "_load_rates", lambda: rates)
+
+
+def expected_total(rooms: int = 1) -> Decimal:
+    subtotal = Decimal("400.00") * rooms
+    return subtotal + subtotal * pricing_service.TAX_RATE + pricing_service.SERVICE_FEE
+
+
+def test_amount_covering_the_quote_is_accepted():
+    quote = pricing_service.validate_payment_amount("Deluxe", CHECK_IN, CHECK_OUT, 1, expected_total())
+
+    assert quote["subtotal"] == 400.0
+    assert quote["weekend_nights"] == 2
+    assert Decimal(str(quote["total"])) == expected_total()
+
+
+def test_amount_above_the_quote_is_accepted():
+    pricing_service.validate_payment_amount("Deluxe", "2026-03-05", "2026-03-08", 2, expected_total(2) + 50)
+
+
+def test_amount_below_the_quote_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        pricing_service.validate_payment_amount("Deluxe", CHECK_IN, CHECK_OUT, 1, expected_total() - 1)
+
+    assert error.value.status_code == 400
+    assert error.value.detail["expected_minimum"] == float(expected_total())
+
+
+@pytest.mark.parametrize(
+    "in_date, out_date",
+    [("2026-03-08", "2026-03-05"), ("03/05/2026", "2026-03-08")],
+)
+def test_bad_dates_are_rejected(in_date, out_date):
+    with pytest.raises(HTTPException) as error:
+        pricing_service.validate_payment_amount("Deluxe", in_date, out_date, 1, expected_total())
+
+    assert error.value.status_code == 400
+
+
+def test_unknown_room_type_is_not_found():
+    with pytest.raises(HTTPException) as error:
+        pricing_service.validate_payment_amount("Suite", CHECK_IN, CHECK_OUT, 1, expected_total())
+
+    assert error.value.status_code == 404
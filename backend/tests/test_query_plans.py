@@ -0,0 +1,32 @@
+import psycopg2
+import pytest
+
+from configuration import query_plans
+from configuration.settings import database_connection
+
+# Large enough that the planner costs index access against real row counts,
+# small enough to load in a few seconds.
+BOOKINGS = 100_000
+USERS = 5_000
+
+
+@pytest.fixture(scope="module")
+def plan_cursor():
+    try:
+        database_connection().close()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"no test database: {e}")
+    with query_plans.synthetic_plan_session(BOOKINGS, USERS) as cursor:
+        yield cursor
+
+
+@pytest.mark.parametrize(
+    "label, query, params, expected, no_seq_scan",
+    query_plans.PLAN_EXPECTATIONS,
+    ids=[expectation[0] for expectation in query_plans.PLAN_EXPECTATIONS],
+)
+def test_query_plan_uses_its_indexes(plan_cursor, label, query, params, expected, no_seq_scan):
+    assert expected
+    _, problems = query_plans.plan_problems(plan_cursor, query, params, expected, no_seq_scan)
+
+    assert problems == []
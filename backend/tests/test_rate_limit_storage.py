@@ -0,0 +1,73 @@
+import uuid
+
+import psycopg2
+import pytest
+
+from configuration import rate_limit
+from configuration.rate_limit import PostgresStorage
+from configuration.settings import close_pool, database_connection
+from repository import rate_limit_repository
+
+EXPIRY = 60
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    storage = PostgresStorage("postgres://")
+    monkeypatch.setattr(storage, "_schedule_compaction", lambda: None)
+    return storage
+
+
+def test_acquire_passes_both_windows_to_the_repository(storage, monkeypatch):
+    calls = []
+
+    def acquire(current_key, previous_key, previous_weight, amount, limit, ttl_seconds):
+        calls.append((current_key, previous_key, previous_weight, amount, limit, ttl_seconds))
+        return True
+
+    monkeypatch.setattr(rate_limit_repository, "acquire_window_entry", acquire)
+    monkeypatch.setattr(rate_limit.time, "time", lambda: 6015.0)
+
+    assert storage.acquire_sliding_window_entry("client", 10, EXPIRY, 3)
+
+    previous_key, current_key = storage.sliding_window_keys("client", EXPIRY, 6015.0)
+    # 15s into the current window, so three quarters of the previous one count.
+    assert calls == [(current_key, previous_key, 0.75, 3, 10, 2 * EXPIRY)]
+
+
+def test_cost_above_the_limit_is_refused_without_a_round_trip(storage, monkeypatch):
+    def acquire(*args):
+        raise AssertionError("should not reach the database")
+
+    monkeypatch.setattr(rate_limit_repository, "acquire_window_entry", acquire)
+
+    assert not storage.acquire_sliding_window_entry("client", 5, EXPIRY, 6)
+
+
+@pytest.fixture
+def database():
+    try:
+        with database_connection() as conn, conn.cursor() as cursor:
+            cursor.execute("SELECT to_regproc('rate_limit_acquire') IS NOT NULL")
+            migrated = cursor.fetchone()[0]
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"no test database: {e}")
+    if not migrated:
+        pytest.skip("rate_limits migration has not been applied")
+    yield
+    close_pool()
+
+
+def test_hits_are_counted_until_the_limit_across_storages(database, storage, monkeypatch):
+    key = f"test:{uuid.uuid4().hex}"
+    other_worker = PostgresStorage("postgres://")
+    monkeypatch.setattr(other_worker, "_schedule_compaction", lambda: None)
+    try:
+        assert storage.acquire_sliding_window_entry(key, 5, EXPIRY, 2)
+        assert other_worker.acquire_sliding_window_entry(key, 5, EXPIRY, 3)
+        assert not storage.acquire_sliding_window_entry(key, 5, EXPIRY, 1)
+
+        previous_count, _, current_count, _ = other_worker.get_sliding_window(key, EXPIRY)
+        assert (previous_count, current_count) == (0, 5)
+    finally:
+        storage.clear_sliding_window(key, EXPIRY)
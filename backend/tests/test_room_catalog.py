@@ -0,0 +1,25 @@
+from service.room_catalog_service import RoomCatalog
+
+COLUMNS = (
+    "id", "room_number", "name", "type", "description", "price_base", "price_weekend", "capacity",
+    "size_sqm", "bed_type", "images", "amenities", "status", "floor", "rating", "reviews_count",
+)
+
+
+def room(room_id: int, price: int, floor):
+    return (
+        room_id, f"{room_id:03d}", f"Room {room_id}", "Deluxe", "", price, price, 2,
+        30, "King", [], ["wifi"], "available", floor, 4.5, 10,
+    )
+
+
+def test_rooms_without_a_floor_are_searchable():
+    catalog = RoomCatalog(COLUMNS, [room(1, 100, 2), room(2, 120, None), room(3, 90, 0)])
+    everything = catalog.match()
+
+    facets = catalog.facets(everything)
+
+    assert facets["total"] == 3
+    assert facets["floors"] == {"0": 1, "2": 1}
+    assert [r["id"] for r in catalog.rooms(catalog.match(floor=2))] == [1]
+    assert [r["id"] for r in catalog.rooms(catalog.match(floor=0))] == [3]
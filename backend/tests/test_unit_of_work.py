@@ -0,0 +1,93 @@
+import pytest
+
+from configuration import settings
+from configuration.settings import UnitOfWork, after_commit
+
+
+class FakeConnection:
+    closed = 0
+
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FakePool:
+    def __init__(self):
+        self.conn = FakeConnection()
+        self.returned = []
+
+    def getconn(self):
+        return self.conn
+
+    def putconn(self, conn, discard=False):
+        self.returned.append(conn)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(settings, "get_pool", lambda: pool)
+    return pool
+
+
+def test_callbacks_run_after_commit(pool):
+    calls = []
+    with settings.unit_of_work() as uow:
+        uow.connection
+        after_commit(lambda: calls.append(pool.conn.commits))
+        assert calls == []
+
+    assert calls == [1]
+    assert pool.returned == [pool.conn]
+
+
+def test_callbacks_are_dropped_on_rollback(pool):
+    calls = []
+    with pytest.raises(RuntimeError):
+        with settings.unit_of_work() as uow:
+            uow.connection
+            after_commit(lambda: calls.append("ran"))
+            raise RuntimeError("boom")
+
+    assert calls == []
+    assert pool.conn.rollbacks == 1
+    assert pool.conn.commits == 0
+
+
+def test_nested_unit_of_work_defers_to_the_outer_one(pool):
+    calls = []
+    with settings.unit_of_work() as outer:
+        with settings.unit_of_work() as inner:
+            assert inner is outer
+            after_commit(lambda: calls.append("ran"))
+        assert calls == []
+
+    assert calls == ["ran"]
+
+
+def test_after_commit_runs_immediately_outside_a_unit_of_work():
+    calls = []
+    after_commit(lambda: calls.append("ran"))
+
+    assert calls == ["ran"]
+
+
+def test_failing_callback_does_not_stop_the_rest():
+    calls = []
+    uow = UnitOfWork(pool=FakePool())
+
+    def fail():
+        raise ValueError("cache down")
+
+    uow.after_commit(fail)
+    uow.after_commit(lambda: calls.append("ran"))
+    uow.close(commit=True)
+
+    assert calls == ["ran"]
@@ -0,0 +1,67 @@
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request
+
+CATALOG_MAX_AGE_SECONDS = int(os.getenv("CATALOG_MAX_AGE_SECONDS", 60))
+CATALOG_STALE_WHILE_REVALIDATE_SECONDS = int(os.getenv("CATALOG_STALE_WHILE_REVALIDATE_SECONDS", 300))
+
+
+def catalog_etag(versions: dict, names: tuple[str, ...]) -> str | None:
+    parts = []
+    for name in sorted(names):
+        entry = versions.get(name)
+        if not entry:
+            return None
+        parts.append(f"{name}-{entry['version']}")
+    # Weak, because GZip or a CDN may re-encode the body.
+    return 'W/"' + ".".join(parts) + '"'
+
+
+def last_modified(versions: dict, names: tuple[str, ...]) -> datetime | None:
+    stamps = [versions[name]["updated_at"] for name in names if versions.get(name)]
+    if not stamps:
+        return None
+    latest = max(stamps)
+    if latest.tzinfo is None:
+        latest = latest.replace(tzinfo=timezone.utc)
+    return latest.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def cache_headers(etag: str, modified: datetime | None) -> dict:
+    headers = {
+        "ETag": etag,
+        "Cache-Control": (
+            f"public, max-age={CATALOG_MAX_AGE_SECONDS}, "
+            f"stale-while-revalidate={CATALOG_STALE_WHILE_REVALIDATE_SECONDS}"
+        ),
+    }
+    if modified is not None:
+        headers["Last-Modified"] = format_datetime(modified, usegmt=True)
+    return headers
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored.
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def is_not_modified(request: Request, etag: str, modified: datetime | None) -> bool:
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("If-Modified-Since")
+    if if_modified_since and modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return modified <= since
+    return False
@@ -0,0 +1,28 @@
+from decimal import Decimal
+
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+# Returning a Response from an endpoint skips FastAPI's jsonable_encoder pass,
+# which dominates on large lists. That also skips merging headers set on an
+# injected Response (e.g. by catalog_cache), so pass it in to keep them.
+def json_response(content, response: Response | None = None) -> ORJSONResponse:
+    rendered = ORJSONResponse(content)
+    if response is not None:
+        rendered.headers.raw.extend(response.headers.raw)
+    return rendered
@@ -1,7 +1,45 @@
+import hashlib
+import hmac
+import logging
+import os
 import secrets
 import string
 
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Codes are stored as HMAC-SHA256(key, email:code). Six digits are too few to
+# resist an offline search whatever the hash, so the secrecy of this key, not
+# hashing cost, is what protects a leaked table.
+_otp_key = os.getenv("OTP_HMAC_KEY") or os.getenv("JWT_KEY")
+if not _otp_key:
+    logger.warning("OTP_HMAC_KEY is not set; OTP codes will not verify across processes or restarts")
+    _otp_key = secrets.token_hex(32)
+OTP_HMAC_KEY = hmac.new(_otp_key.encode(), b"otp-codes", hashlib.sha256).digest()
+
 
 def generate_otp(length=6):
     return "".join(secrets.choice(string.digits) for _ in range(length))
-    
\ No newline at end of file
+
+
+# The code for one send request, derived from the server key and a random
+# nonce carried in the email job. A re-run of the job reproduces the code it
+# already mailed instead of replacing it; the nonce alone reveals nothing.
+def derive_otp(email: str, nonce: str, length=6) -> str:
+    digest = hmac.new(OTP_HMAC_KEY, f"issue:{email.strip().lower()}:{nonce}".encode(), hashlib.sha256).digest()
+    return str(int.from_bytes(digest, "big") % 10**length).zfill(length)
+
+
+def generate_nonce() -> str:
+    return secrets.token_hex(16)
+
+
+def otp_mac(email: str, otp: str) -> str:
+    return hmac.new(OTP_HMAC_KEY, f"{email.strip().lower()}:{otp.strip()}".encode(), hashlib.sha256).hexdigest()
+
+
+def otp_matches(email: str, otp: str, code_mac: str) -> bool:
+    return hmac.compare_digest(otp_mac(email, otp), code_mac)
@@ -0,0 +1,53 @@
+import re
+import threading
+
+_COLUMN = re.compile(r"\{(\w+)\}")
+
+
+def _render(template: dict, positions: dict[str, int], indent: str) -> str:
+    def column(match):
+        name = match.group(1)
+        if name not in positions:
+            raise KeyError(f"Result set has no column {name!r}")
+        return f"row[{positions[name]}]"
+
+    items = []
+    for key, expression in template.items():
+        if isinstance(expression, dict):
+            value = _render(expression, positions, indent + "    ")
+        else:
+            value = _COLUMN.sub(column, expression)
+        items.append(f"{indent}    {key!r}: {value},")
+    return "{\n" + "\n".join(items) + f"\n{indent}}}"
+
+
+# Turns tuple rows into response dicts. The template maps each output key to a
+# Python expression in which {column} stands for that column's value; the
+# first time a column layout is seen the template is compiled into a single
+# list comprehension that indexes the row by position, so per row there is no
+# dict lookup, no .get() and no function call beyond the conversions asked for.
+class RowMapper:
+    def __init__(self, name: str, template: dict):
+        self.name = name
+        self.template = template
+        self._compiled = {}
+        self._lock = threading.Lock()
+
+    def source(self, columns: tuple[str, ...]) -> str:
+        positions = {name: i for i, name in enumerate(columns)}
+        body = _render(self.template, positions, "        ")
+        return f"def map_rows(rows):\n    return [\n        {body}\n        for row in rows\n    ]\n"
+
+    def _compile(self, columns: tuple[str, ...]):
+        namespace = {}
+        exec(compile(self.source(columns), f"<row mapper {self.name}>", "exec"), {}, namespace)
+        return namespace["map_rows"]
+
+    def __call__(self, columns: tuple[str, ...], rows) -> list[dict]:
+        map_rows = self._compiled.get(columns)
+        if map_rows is None:
+            with self._lock:
+                map_rows = self._compiled.get(columns)
+                if map_rows is None:
+                    map_rows = self._compiled[columns] = self._compile(columns)
+        return map_rows(rows)
@@ -1,41 +1,131 @@
 import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 from passlib.context import CryptContext
 from passlib.exc import UnknownHashError
 
 logger = logging.getLogger(__name__)
 
+# Changing a cost parameter only affects new hashes; existing ones are
+# rehashed with the new parameters the next time their owner logs in.
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", 3))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", 65536))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", 4))
+
+# Hashing runs in worker processes so it neither holds the GIL nor a request
+# thread's CPU time: the auth, user and admin handlers are sync endpoints, so
+# their threadpool thread waits on the pool while the event loop stays free.
+# Every web worker process starts its own pool, so by default the cores are
+# split between the WEB_CONCURRENCY workers (server.py sets this for
+# --workers) instead of each starting cpu_count hash processes.
+# HASH_WORKERS=0 hashes in the calling thread instead.
+WEB_CONCURRENCY = max(int(os.getenv("WEB_CONCURRENCY", 1)), 1)
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY)))
+
 pwd_context = CryptContext(
     schemes=["argon2"],
     deprecated="auto",
+    argon2__time_cost=ARGON2_TIME_COST,
+    argon2__memory_cost=ARGON2_MEMORY_COST,
+    argon2__parallelism=ARGON2_PARALLELISM,
 )
 
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+# These run inside the pool, so they stay module-level (picklable by name).
+def _hash(secret: str) -> str:
+    return pwd_context.hash(secret)
 
 
-def verify_password(password: str, hashed_password: str) -> bool:
+def _verify(secret: str, hashed: str, label: str) -> bool:
     try:
-        return pwd_context.verify(password, hashed_password)
+        return pwd_context.verify(secret, hashed)
     except UnknownHashError:
-        logger.error("Unknown hash format for password verification")
+        logger.error("Unknown hash format for %s verification", label)
         return False
     except Exception as e:
-        logger.exception("Unexpected error verifying password: %s", e)
+        logger.exception("Unexpected error verifying %s: %s", label, e)
         return False
 
 
-def hash_otp(otp: str) -> str:
-    return pwd_context.hash(otp)
-
-
-def verify_otp(otp: str, hashed_otp: str) -> bool:
+def _verify_and_update(secret: str, hashed: str) -> tuple[bool, str | None]:
     try:
-        return pwd_context.verify(otp, hashed_otp)
+        return pwd_context.verify_and_update(secret, hashed)
     except UnknownHashError:
-        logger.error("Unknown hash format for OTP verification")
-        return False
+        logger.error("Unknown hash format for password verification")
+        return False, None
     except Exception as e:
-        logger.exception("Unexpected error verifying OTP: %s", e)
-        return False
+        logger.exception("Unexpected error verifying password: %s", e)
+        return False, None
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_hash_pool() -> ProcessPoolExecutor | None:
+    global _pool
+    if HASH_WORKERS <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn, not fork: the server process has threads and open
+                # sockets that a forked child must not inherit.
+                _pool = ProcessPoolExecutor(HASH_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def start_hash_pool():
+    pool = get_hash_pool()
+    if pool is not None:
+        # Start every worker now rather than on the first logins.
+        for future in [pool.submit(os.getpid) for _ in range(HASH_WORKERS)]:
+            future.result()
+
+
+def close_hash_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _discard_broken(pool: ProcessPoolExecutor):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _run(fn, *args):
+    pool = get_hash_pool()
+    if pool is None:
+        return fn(*args)
+    try:
+        return pool.submit(fn, *args).result()
+    except BrokenProcessPool:
+        # A worker died (OOM kill); the next call starts a fresh pool.
+        logger.exception("Hash pool is broken, hashing in-process for this call")
+        _discard_broken(pool)
+        return fn(*args)
+
+
+def hash_password(password: str) -> str:
+    return _run(_hash, password)
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    return _run(_verify, password, hashed_password, "password")
+
+
+# Returns (valid, new_hash); new_hash is set when the stored hash was made
+# with other cost parameters and should replace it.
+def verify_and_update_password(password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return _run(_verify_and_update, password, hashed_password)
+
@@ -1,6 +1,12 @@
 import os
 import smtplib
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
 from email.message import EmailMessage
+from pathlib import Path
 
 from dotenv import load_dotenv
 
@@ -13,17 +19,336 @@ GMAIL_APP_PASSWORD = (
     or os.getenv("EMAIL_PASSWORD")
 )
 
+# "smtp" sends for real; "file" writes .eml files to EMAIL_FILE_DIR and
+# "memory" keeps the last EMAIL_MEMORY_LIMIT messages, for load tests.
+EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "smtp").lower()
+EMAIL_FILE_DIR = os.getenv("EMAIL_FILE_DIR", "sent_emails")
+EMAIL_MEMORY_LIMIT = int(os.getenv("EMAIL_MEMORY_LIMIT", 1000))
 
-def send_otp_email(receiver_email: str, otp: str) -> None:
-    if not GMAIL_USER or not GMAIL_APP_PASSWORD:
-        raise RuntimeError("System email is not configured")
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", 465))
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", 2))
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", 10))
+SMTP_KEEPALIVE_SECONDS = float(os.getenv("SMTP_KEEPALIVE_SECONDS", 30))
+SMTP_MAX_IDLE_SECONDS = float(os.getenv("SMTP_MAX_IDLE_SECONDS", 240))
+
+# Errors after which a session cannot be trusted for the next message.
+SESSION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError)
+
+
+class EmailMetrics:
+    def __init__(self, window: int = 500):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self._counters = {"sent": 0, "failed": 0, "batches": 0}
+
+    def record(self, sent: int, failed: int, elapsed: float):
+        with self._lock:
+            self._counters["sent"] += sent
+            self._counters["failed"] += failed
+            self._counters["batches"] += 1
+            if sent:
+                self._latencies.append(elapsed / sent)
+
+    def stats(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            counters = dict(self._counters)
+        if latencies:
+            counters["latency_ms"] = {
+                "avg": round(sum(latencies) / len(latencies) * 1000, 2),
+                "p50": round(latencies[len(latencies) // 2] * 1000, 2),
+                "p95": round(latencies[int(len(latencies) * 0.95)] * 1000, 2),
+                "max": round(latencies[-1] * 1000, 2),
+            }
+        return counters
+
+
+# Authenticated sessions are kept between messages. Like the database pool,
+# idle sessions are reused most-recently-used first; one idle past
+# SMTP_KEEPALIVE_SECONDS gets a NOOP before use, and one idle past
+# SMTP_MAX_IDLE_SECONDS is dropped, as servers close quiet sessions anyway.
+class SMTPPool:
+    def __init__(
+        self,
+        host: str = SMTP_HOST,
+        port: int = SMTP_PORT,
+        user: str | None = GMAIL_USER,
+        password: str | None = GMAIL_APP_PASSWORD,
+        size: int = SMTP_POOL_SIZE,
+        timeout: float = SMTP_TIMEOUT_SECONDS,
+        keepalive: float = SMTP_KEEPALIVE_SECONDS,
+        max_idle: float = SMTP_MAX_IDLE_SECONDS,
+    ):
+        if size < 1:
+            raise ValueError("SMTP pool needs at least one session")
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.size = size
+        self.timeout = timeout
+        self.keepalive = keepalive
+        self.max_idle = max_idle
+
+        self._cond = threading.Condition()
+        self._idle = []
+        self._open_sessions = 0
+        self._closed = False
+        self._counters = {"sessions_opened": 0, "sessions_closed": 0, "keepalive_failures": 0, "reconnects": 0}
+
+    def _connect(self):
+        if not self.user or not self.password:
+            raise RuntimeError("System email is not configured")
+        server = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        try:
+            server.login(self.user, self.password)
+        except Exception:
+            self._quit(server)
+            raise
+        with self._cond:
+            self._counters["sessions_opened"] += 1
+        return server
+
+    def _quit(self, server):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _checkout(self):
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("SMTP pool is closed")
+                if self._idle:
+                    server, returned_at = self._idle.pop()
+                    break
+                if self._open_sessions < self.size:
+                    self._open_sessions += 1
+                    server, returned_at = None, None
+                    break
+                self._cond.wait()
+
+        try:
+            if server is None:
+                return self._connect()
+            idle_for = time.monotonic() - returned_at
+            if idle_for > self.max_idle:
+                self._discard(server, release=False)
+                return self._connect()
+            if idle_for > self.keepalive:
+                try:
+                    if server.noop()[0] != 250:
+                        raise smtplib.SMTPServerDisconnected("NOOP rejected")
+                except SESSION_ERRORS + (smtplib.SMTPException,):
+                    with self._cond:
+                        self._counters["keepalive_failures"] += 1
+                    self._discard(server, release=False)
+                    return self._connect()
+            return server
+        except Exception:
+            self._release_slot()
+            raise
+
+    def _checkin(self, server):
+        with self._cond:
+            if self._closed:
+                self._open_sessions -= 1
+                self._quit(server)
+                self._counters["sessions_closed"] += 1
+            else:
+                self._idle.append((server, time.monotonic()))
+            self._cond.notify()
+
+    def _release_slot(self):
+        with self._cond:
+            self._open_sessions -= 1
+            self._cond.notify()
+
+    def _discard(self, server, release: bool = True):
+        self._quit(server)
+        with self._cond:
+            self._counters["sessions_closed"] += 1
+        if release:
+            self._release_slot()
+
+    @contextmanager
+    def session(self):
+        server = self._checkout()
+        try:
+            yield server
+        except SESSION_ERRORS:
+            self._discard(server)
+            raise
+        except BaseException:
+            self._checkin(server)
+            raise
+        self._checkin(server)
+
+    # Sends over one session; a dropped session is replaced once mid-batch.
+    # Returns (sent, failures) where failures pairs each rejected message
+    # with its error.
+    def send_messages(self, messages: list[EmailMessage]) -> tuple[int, list]:
+        sent, failures = 0, []
+        pending = list(messages)
+        reconnected = False
+        while pending:
+            try:
+                with self.session() as server:
+                    while pending:
+                        try:
+                            server.send_message(pending[0])
+                            sent += 1
+                        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                            failures.append((pending[0], e))
+                        pending.pop(0)
+            except SESSION_ERRORS:
+                if reconnected:
+                    raise
+                reconnected = True
+                with self._cond:
+                    self._counters["reconnects"] += 1
+        return sent, failures
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "backend": "smtp",
+                "open": self._open_sessions,
+                "idle": len(self._idle),
+                "size": self.size,
+                **self._counters,
+            }
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open_sessions -= len(idle)
+            self._counters["sessions_closed"] += len(idle)
+            self._cond.notify_all()
+        for server, _ in idle:
+            self._quit(server)
+
+
+class FileBackend:
+    def __init__(self, directory: str = EMAIL_FILE_DIR):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def send_messages(self, messages: list[EmailMessage]) -> tuple[int, list]:
+        for message in messages:
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:12]}.eml"
+            (self.directory / name).write_bytes(message.as_bytes())
+        return len(messages), []
+
+    def stats(self) -> dict:
+        return {"backend": "file", "directory": str(self.directory)}
+
+    def close(self):
+        pass
 
+
+class MemoryBackend:
+    def __init__(self, limit: int = EMAIL_MEMORY_LIMIT):
+        self.outbox = deque(maxlen=limit)
+
+    def send_messages(self, messages: list[EmailMessage]) -> tuple[int, list]:
+        self.outbox.extend(messages)
+        return len(messages), []
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "stored": len(self.outbox)}
+
+    def close(self):
+        pass
+
+
+EMAIL_BACKENDS = {"smtp": SMTPPool, "file": FileBackend, "memory": MemoryBackend}
+
+_backend = None
+_backend_lock = threading.Lock()
+_metrics = EmailMetrics()
+
+
+def get_email_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if EMAIL_BACKEND not in EMAIL_BACKENDS:
+                    raise RuntimeError(f"Unknown EMAIL_BACKEND {EMAIL_BACKEND!r}")
+                _backend = EMAIL_BACKENDS[EMAIL_BACKEND]()
+    return _backend
+
+
+def close_email_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is not None:
+            _backend.close()
+            _backend = None
+
+
+def email_stats() -> dict:
+    stats = _backend.stats() if _backend is not None else {"backend": EMAIL_BACKEND}
+    stats.update(_metrics.stats())
+    return stats
+
+
+def send_messages(messages: list[EmailMessage]) -> tuple[int, list]:
+    started = time.perf_counter()
+    try:
+        sent, failures = get_email_backend().send_messages(messages)
+    except Exception:
+        _metrics.record(0, len(messages), time.perf_counter() - started)
+        raise
+    _metrics.record(sent, len(failures), time.perf_counter() - started)
+    return sent, failures
+
+
+def send_message(message: EmailMessage):
+    _, failures = send_messages([message])
+    if failures:
+        raise failures[0][1]
+
+
+def otp_message(receiver_email: str, otp: str) -> EmailMessage:
     msg = EmailMessage()
     msg["Subject"] = "Your OTP code"
-    msg["From"] = GMAIL_USER
+    msg["From"] = GMAIL_USER or "no-reply@localhost"
     msg["To"] = receiver_email
     msg.set_content(f"Your otp is {otp}. It will expire in 5 minutes")
+    return msg
+
+
+def send_otp_email(receiver_email: str, otp: str) -> None:
+    send_message(otp_message(receiver_email, otp))
+
+
+if __name__ == "__main__":
+    import argparse
+    from concurrent.futures import ThreadPoolExecutor
+
+    parser = argparse.ArgumentParser(description="Send synthetic OTP emails through the configured backend")
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=1, help="messages per session checkout")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--to", default="load-test@example.com")
+    args = parser.parse_args()
 
-    with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-        server.login(GMAIL_USER, GMAIL_APP_PASSWORD)
-        server.send_message(msg)
+    batches = [
+        [otp_message(args.to, f"{n:06d}") for n in range(start, min(start + args.batch, args.messages))]
+        for start in range(0, args.messages, args.batch)
+    ]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as executor:
+        list(executor.map(send_messages, batches))
+    elapsed = time.perf_counter() - started
+    print(f"{args.messages} messages in {elapsed:.2f}s ({args.messages / elapsed:.0f}/s) via {EMAIL_BACKEND}")
+    print(email_stats())
+    close_email_backend()